@@ -1,12 +1,20 @@
 from .base import BaseLoRa
-import spidev
-import RPi.GPIO
+from .packet import RxPacket
+from .profile import RadioProfile
+from .profiler import SX126X_OPCODES
+# spidev and RPi.GPIO are only needed on the Pi, setSpiDevice and setGpio take emulated or other backends
+try :
+    import spidev
+except ImportError :
+    spidev = None
+try :
+    import RPi.GPIO
+except ImportError :
+    RPi = None
 import time
+import threading
 
-spi = spidev.SpiDev()
-gpio = RPi.GPIO
-gpio.setmode(RPi.GPIO.BCM)
-gpio.setwarnings(False)
+gpio = RPi.GPIO if RPi is not None else None
 
 class SX126x(BaseLoRa) :
     """Class for SX1261/62/68 and LLCC68 LoRa chipsets from Semtech"""
@@ -27,6 +35,11 @@ class SX126x(BaseLoRa) :
     REG_XTB_TRIM                           = 0x0912
     REG_EVENT_MASK                         = 0x0944
 
+    # registers never kept in the register shadow: the chip changes them by itself (RTC and timeout event when a
+    # timer is armed, OCP on SetPaConfig, XTA/XTB trim on SetDio3AsTcxoCtrl) or writing the same value again is
+    # the operation (write-1-to-clear event bits), so they are always read from and written to the chip
+    REG_NOT_SHADOWED                       = frozenset((REG_OCP_CONFIGURATION, REG_RTC_CONTROL, REG_XTA_TRIM, REG_XTB_TRIM, REG_EVENT_MASK))
+
     # SetSleep
     SLEEP_COLD_START                       = 0x00        # sleep mode: cold start, configuration is lost (default)
     SLEEP_WARM_START                       = 0x04        #             warm start, configuration is retained
@@ -201,6 +214,8 @@ class SX126x(BaseLoRa) :
     CAD_ON_16_SYMB                         = 0x04        #                                 16
     CAD_EXIT_STDBY                         = 0x00        # after CAD is done, always exit to STDBY_RC mode
     CAD_EXIT_RX                            = 0x01        # after CAD is done, exit to Rx mode if activity is detected
+    CAD_DET_PEAK                           = {5: 20, 6: 20, 7: 22, 8: 22, 9: 23, 10: 24, 11: 25, 12: 28}    # detection peak per SF for 2 symbol CAD
+    CAD_DET_MIN                            = 10          # detection minimum
 
     # GetStatus
     STATUS_DATA_AVAILABLE                  = 0x04        # command status: packet received and data can be retrieved
@@ -234,6 +249,11 @@ class SX126x(BaseLoRa) :
     POWER_SAVING_GAIN                      = 0x94        # power saving gain register value
     BOOSTED_GAIN                           = 0x96        # boosted gain register value
 
+    # Busy pin wait strategy
+    BUSY_WAIT_SPIN                         = 0           # busy wait: spin on busy pin
+    BUSY_WAIT_BACKOFF                      = 1           #            short spin then sleep with exponential backoff (default)
+    BUSY_WAIT_EDGE                         = 2           #            short spin then wait for busy pin falling edge
+
     # TX and RX operation status 
     STATUS_DEFAULT                         = 0           # default status (false)
     STATUS_TX_WAIT                         = 1
@@ -249,20 +269,32 @@ class SX126x(BaseLoRa) :
     STATUS_CAD_DETECTED                    = 11
     STATUS_CAD_DONE                        = 12
 
+    # SPI frame buffer size and shortest frame framed in it, shorter command frames are plain lists
+    SPI_FRAME_SIZE                         = 260
+    SPI_BURST_SIZE                         = 32
+
     # SPI and GPIO pin setting
+    _spi = None
+    _gpio = gpio                                         # GPIO backend, RPi.GPIO module unless set with setGpio
+    _spiDevice = None                                    # SPI device used instead of spidev.SpiDev, set with setSpiDevice
+    _spiLock = None
     _bus = 0
     _cs = 0
     _reset = 22
     _busy = 23
-    _cs_define = 21
+    _cs_define = 21                                      # manually toggled chip select pin, -1 to leave CS to spidev
     _irq = -1
     _txen = -1
     _rxen = -1
     _wake = -1
     _busyTimeout = 5000
+    _busyWait = BUSY_WAIT_BACKOFF
+    _busySpin = 0.0001
+    _busySleepMin = 0.00005
+    _busySleepMax = 0.001
     _spiSpeed = 7800000
-    _txState = gpio.LOW
-    _rxState = gpio.LOW
+    _txState = 0                                         # gpio.LOW
+    _rxState = 0
 
     # LoRa setting
     _dio = 1
@@ -276,6 +308,9 @@ class SX126x(BaseLoRa) :
     _payloadLength = 32
     _crcType = False
     _invertIq = False
+    _profile = None                                      # last profile applied with applyProfile, None when unknown
+    _frequency = None                                    # current RF frequency in Hz, None when unknown
+    _calBand = None                                      # image calibration band (calFreqMin, calFreqMax), None when unknown
 
     # Operation properties
     _bufferIndex = 0
@@ -283,10 +318,34 @@ class SX126x(BaseLoRa) :
     _statusWait = STATUS_DEFAULT
     _statusIrq = STATUS_DEFAULT
     _transmitTime = 0.0
+    _rxIrq = 0x0000
+    _rxTimestamp = 0.0
+    _edgeTime = None                                     # GPIO backend edgeTime(pin) for kernel edge timestamps, None when not supported
+
+    # Busy wait statistics
+    _busyCount = 0
+    _busyTimeouts = 0
+    _busyTimeLast = 0.0
+    _busyTimeTotal = 0.0
+    _busyTimeMax = 0.0
+    _busyOps = None                                      # opcode: [waits, timeouts, total, max], created on first wait
+
+    # Register shadow, None when disabled
+    _regShadow = None
+    _regHits = 0
+    _regMisses = 0
+    _regWrites = 0
+    _regSkips = 0
+    _regInvalidations = 0
+
+    # SPI transaction profiler, None when disabled
+    _profiler = None
 
     # callback functions
     _onTransmit = None
     _onReceive = None
+    _onCad = None
+    _irqHandler = None
 
 ### COMMON OPERATIONAL METHODS ###
 
@@ -295,7 +354,11 @@ class SX126x(BaseLoRa) :
         # set spi and gpio pins
         self.setSpi(bus, cs)
         self.setPins(reset, busy, irq, txen, rxen, wake)
-        # perform device reset
+        return self.restart()
+
+    def restart(self) -> bool :
+
+        # perform device reset, SPI and GPIO setup is kept so a wedged device can be recovered in place
         self.reset()
 
         # check if device connect and set modem to LoRa
@@ -309,15 +372,23 @@ class SX126x(BaseLoRa) :
     def end(self) :
 
         self.sleep(self.SLEEP_COLD_START)
-        spi.close()
-        gpio.cleanup()
+        self._spi.close()
+        # release only pins used by this device so other radios keep running
+        pins = [pin for pin in (self._reset, self._busy, self._cs_define, self._irq, self._txen, self._rxen, self._wake) if pin != -1]
+        if self._irq != -1 : self._gpio.remove_event_detect(self._irq)
+        self._irqHandler = None
+        self._gpio.cleanup(pins)
 
     def reset(self) -> bool :
 
         # put reset pin to low then wait busy pin to low
-        gpio.output(self._reset, gpio.LOW)
+        self._gpio.output(self._reset, self._gpio.LOW)
         time.sleep(0.001)
-        gpio.output(self._reset, gpio.HIGH)
+        self._gpio.output(self._reset, self._gpio.HIGH)
+        self._shadowInvalidate()
+        self._profile = None
+        self._frequency = None
+        self._calBand = None
         return not self.busyCheck()
 
     def sleep(self, option = SLEEP_WARM_START) :
@@ -331,8 +402,8 @@ class SX126x(BaseLoRa) :
 
         # wake device by set wake pin (cs pin) to low before spi transaction and put device in standby mode
         if (self._wake != -1) :
-            gpio.setup(self._wake, gpio.OUT)
-            gpio.output(self._wake, gpio.LOW)
+            self._gpio.setup(self._wake, self._gpio.OUT)
+            self._gpio.output(self._wake, self._gpio.LOW)
             time.sleep(0.0005)
         self.setStandby(self.STANDBY_RC)
         self._fixResistanceAntenna()
@@ -341,14 +412,115 @@ class SX126x(BaseLoRa) :
 
         self.setStandby(option)
 
-    def busyCheck(self, timeout: int = _busyTimeout) :
-
-        # wait for busy pin to LOW or timeout reached
-        t = time.time()
-        while gpio.input(self._busy) == gpio.HIGH :
-            if (time.time() - t) > (timeout / 1000) : return True
+    def busyCheck(self, timeout: int = _busyTimeout, opCode: int = None) :
+
+        # wait for busy pin to LOW or timeout reached, spin briefly then yield the CPU
+        # opCode is the command about to be sent, its wait is counted per opcode in busyStats()
+        t = time.monotonic()
+        deadline = t + timeout / 1000
+        spinEnd = t + self._busySpin
+        delay = self._busySleepMin
+        while self._gpio.input(self._busy) == self._gpio.HIGH :
+            now = time.monotonic()
+            if now > deadline :
+                self._busyTimeouts += 1
+                self._busyRecord(now - t, opCode, True)
+                return True
+            if self._busyWait == self.BUSY_WAIT_SPIN or now < spinEnd : continue
+            if self._busyWait == self.BUSY_WAIT_EDGE :
+                # bounded slices so a falling edge missed before arming only costs one slice
+                self._gpio.wait_for_edge(self._busy, self._gpio.FALLING, timeout=max(1, min(10, int((deadline - now) * 1000))))
+            else :
+                time.sleep(delay)
+                delay = min(delay * 2, self._busySleepMax)
+        self._busyRecord(time.monotonic() - t, opCode)
         return False
 
+    def _busyRecord(self, waited: float, opCode: int = None, timedOut: bool = False) :
+
+        self._busyCount += 1
+        self._busyTimeLast = waited
+        self._busyTimeTotal += waited
+        if waited > self._busyTimeMax : self._busyTimeMax = waited
+        if opCode is None : return
+        if self._busyOps is None : self._busyOps = {}
+        op = self._busyOps.get(opCode)
+        if op is None : op = self._busyOps[opCode] = [0, 0, 0.0, 0.0]
+        op[0] += 1
+        if timedOut : op[1] += 1
+        op[2] += waited
+        if waited > op[3] : op[3] = waited
+
+    def setBusyWait(self, mode = BUSY_WAIT_BACKOFF, spin: float = _busySpin, sleepMax: float = _busySleepMax) :
+
+        # select busy pin wait strategy, spin time and maximum backoff sleep in seconds
+        self._busyWait = mode
+        self._busySpin = spin
+        self._busySleepMax = sleepMax
+
+    def busyStats(self) -> dict :
+
+        # get time spent waiting busy pin: number of waits, timeouts, last, total and maximum wait in ms,
+        # and the same per command under 'opcodes' keyed by command name, longest total wait first
+        opcodes = {}
+        ops = sorted((self._busyOps or {}).items(), key=lambda item : -item[1][2])
+        for opCode, (count, timeouts, total, maximum) in ops :
+            opcodes[SX126X_OPCODES.get(opCode, f"0x{opCode:02X}")] = {
+                'count': count,
+                'timeouts': timeouts,
+                'total_ms': total * 1000,
+                'max_ms': maximum * 1000
+            }
+        return {
+            'count': self._busyCount,
+            'timeouts': self._busyTimeouts,
+            'last_ms': self._busyTimeLast * 1000,
+            'total_ms': self._busyTimeTotal * 1000,
+            'max_ms': self._busyTimeMax * 1000,
+            'opcodes': opcodes
+        }
+
+    def resetBusyStats(self) :
+
+        self._busyCount = 0
+        self._busyTimeouts = 0
+        self._busyTimeLast = 0.0
+        self._busyTimeTotal = 0.0
+        self._busyTimeMax = 0.0
+        self._busyOps = None
+
+    def setRegisterCache(self, enable: bool = True) :
+
+        # shadow register values to skip redundant reads and no-op writes, cleared on reset and sleep
+        self._regShadow = {} if enable else None
+
+    def registerCacheStats(self) -> dict :
+
+        # get register shadow counters: reads served from and missing the shadow, writes sent and skipped
+        return {
+            'enabled': self._regShadow is not None,
+            'hits': self._regHits,
+            'misses': self._regMisses,
+            'writes': self._regWrites,
+            'skipped': self._regSkips,
+            'saved': self._regHits + self._regSkips,
+            'invalidations': self._regInvalidations
+        }
+
+    def resetRegisterCacheStats(self) :
+
+        self._regHits = 0
+        self._regMisses = 0
+        self._regWrites = 0
+        self._regSkips = 0
+        self._regInvalidations = 0
+
+    def setSpiProfiler(self, profiler = None) :
+
+        # record every SPI transaction in a SpiProfiler (per opcode calls, bytes, busy wait and transfer time), None to stop
+        if profiler is not None and profiler.names is None : profiler.names = SX126X_OPCODES
+        self._profiler = profiler
+
     def setFallbackMode(self, fallbackMode) :
 
         self.setRxTxFallbackMode(fallbackMode)
@@ -364,11 +536,18 @@ class SX126x(BaseLoRa) :
         self._bus = bus
         self._cs = cs
         self._spiSpeed = speed
-        # open spi line and set bus id, chip select, and spi speed
-        spi.open(bus, cs)
-        spi.max_speed_hz = speed
-        spi.lsbfirst = False
-        spi.mode = 0
+        # preallocate SPI frame buffer for register and buffer bursts: opcode, up to 2 address bytes, status byte and 256 data bytes
+        self._txBuf = bytearray(self.SPI_FRAME_SIZE)
+        self._txView = memoryview(self._txBuf)
+        self._nopView = memoryview(bytes(self.SPI_FRAME_SIZE))
+        # open spi line owned by this device and set bus id, chip select, and spi speed
+        # lock serializes SPI transactions between caller thread and GPIO callback thread
+        self._spi = self._spiDevice if self._spiDevice is not None else spidev.SpiDev()
+        self._spiLock = threading.Lock()
+        self._spi.open(bus, cs)
+        self._spi.max_speed_hz = speed
+        self._spi.lsbfirst = False
+        self._spi.mode = 0
 
     def setPins(self, reset: int, busy: int, irq: int = -1, txen: int = -1, rxen: int = -1, wake: int = -1) :
 
@@ -379,12 +558,30 @@ class SX126x(BaseLoRa) :
         self._rxen = rxen
         self._wake = wake
         # set pins as input or output
-        gpio.setup(reset, gpio.OUT)
-        gpio.setup(busy, gpio.IN)
-        gpio.setup(self._cs_define, gpio.OUT)
-        if irq != -1 : gpio.setup(irq, gpio.IN)
-        if txen != -1 : gpio.setup(txen, gpio.OUT)
-        # if rxen != -1 : gpio.setup(rxen, gpio.OUT)
+        self._gpio.setmode(self._gpio.BCM)
+        self._gpio.setwarnings(False)
+        self._gpio.setup(reset, self._gpio.OUT)
+        self._gpio.setup(busy, self._gpio.IN)
+        if self._cs_define != -1 : self._gpio.setup(self._cs_define, self._gpio.OUT)
+        if irq != -1 : self._gpio.setup(irq, self._gpio.IN)
+        if txen != -1 : self._gpio.setup(txen, self._gpio.OUT)
+        # if rxen != -1 : self._gpio.setup(rxen, self._gpio.OUT)
+
+    def setSpiDevice(self, device) :
+
+        # set SPI device object used instead of spidev.SpiDev (call before begin), e.g. SX126xEmulator.spiDevice()
+        self._spiDevice = device
+
+    def setGpio(self, backend) :
+
+        # set GPIO backend (call before begin): RPi.GPIO module or a LoRaRF.gpio backend such as LgpioGpio
+        self._gpio = backend
+        self._edgeTime = getattr(backend, 'edgeTime', None)
+
+    def setCsPin(self, cs: int) :
+
+        # set manually toggled chip select pin (call before begin), -1 to use spidev hardware chip select only
+        self._cs_define = cs
 
     def setRfIrqPin(self, dioPinSelect: int) :
 
@@ -428,33 +625,42 @@ class SX126x(BaseLoRa) :
 
     def setFrequency(self, frequency: int) :
 
-        # perform image calibration before set frequency
-        if frequency < 446000000 :
-            calFreqMin = self.CAL_IMG_430
-            calFreqMax = self.CAL_IMG_440
-        elif frequency < 734000000 :
-            calFreqMin = self.CAL_IMG_470
-            calFreqMax = self.CAL_IMG_510
-        elif frequency < 828000000 :
-            calFreqMin = self.CAL_IMG_779
-            calFreqMax = self.CAL_IMG_787
-        elif frequency < 877000000 :
-            calFreqMin = self.CAL_IMG_863
-            calFreqMax = self.CAL_IMG_870
-        else :
-            calFreqMin = self.CAL_IMG_902
-            calFreqMax = self.CAL_IMG_928
-        self.calibrateImage(calFreqMin, calFreqMax)
+        # perform image calibration before set frequency, skipped when frequency stays in the calibrated band
+        band = self._calibrationBand(frequency)
+        if band != self._calBand :
+            self.calibrateImage(*band)
 
         # calculate frequency and set frequency setting
+        self._frequency = frequency
         rfFreq = int(frequency * 33554432 / 32000000)
         self.setRfFrequency(rfFreq)
 
+    def retune(self, frequency: int) -> bool :
+
+        # fast frequency change for channel hopping, a single SetRfFrequency command while inside the calibrated band
+        # falls back to setFrequency with image calibration and returns True when the band changed
+        if self._calibrationBand(frequency) != self._calBand :
+            self.setFrequency(frequency)
+            return True
+        self._frequency = frequency
+        self.setRfFrequency(int(frequency * 33554432 / 32000000))
+        return False
+
+    def _calibrationBand(self, frequency: int) -> tuple :
+
+        # image calibration band containing frequency
+        if frequency < 446000000 : return (self.CAL_IMG_430, self.CAL_IMG_440)
+        elif frequency < 734000000 : return (self.CAL_IMG_470, self.CAL_IMG_510)
+        elif frequency < 828000000 : return (self.CAL_IMG_779, self.CAL_IMG_787)
+        elif frequency < 877000000 : return (self.CAL_IMG_863, self.CAL_IMG_870)
+        return (self.CAL_IMG_902, self.CAL_IMG_928)
+
     def setTxPower(self, txPower: int, version = TX_POWER_SX1262) :
 
         #  maximum TX power is 22 dBm and 15 dBm for SX1261
         if txPower > 22 : txPower = 22
         elif txPower > 15 and version == self.TX_POWER_SX1261 : txPower = 15
+        self._profile = None
 
         paDutyCycle = 0x00
         hpMax = 0x00
@@ -518,6 +724,7 @@ class SX126x(BaseLoRa) :
         self._bw = bw
         self._cr = cr
         self._ldro = ldro
+        self._profile = None
 
         # valid spreading factor is between 5 and 12
         if sf > 12 : sf = 12
@@ -549,6 +756,7 @@ class SX126x(BaseLoRa) :
         self._payloadLength = payloadLength
         self._crcType = crcType
         self._invertIq = invertIq
+        self._profile = None
 
         # filter valid header type config
         if headerType != self.HEADER_IMPLICIT : headerType = self.HEADER_EXPLICIT
@@ -561,6 +769,34 @@ class SX126x(BaseLoRa) :
         self.setPacketParamsLoRa(preambleLength, headerType, payloadLength, crcType, invertIq)
         self._fixInvertedIq(invertIq)
 
+    def applyProfile(self, profile: RadioProfile) -> tuple :
+
+        # send only the command groups whose settings differ from the last applied profile, everything on first apply
+        last = self._profile
+        applied = []
+        if profile.frequency is not None and profile.frequency != self._frequency :
+            self.setFrequency(profile.frequency)
+            applied.append('frequency')
+        modulation = profile.modulation()
+        if last is None or modulation != last.modulation() :
+            self.setLoRaModulation(*modulation)
+            applied.append('modulation')
+        packet = profile.packet()
+        if last is None or packet != last.packet() :
+            (self._headerType, self._preambleLength, self._payloadLength, self._crcType, self._invertIq) = packet
+            headerType = self.HEADER_IMPLICIT if profile.headerType == self.HEADER_IMPLICIT else self.HEADER_EXPLICIT
+            crcType = self.CRC_ON if profile.crcType else self.CRC_OFF
+            invertIq = self.IQ_INVERTED if profile.invertIq else self.IQ_STANDARD
+            self.setPacketParamsLoRa(profile.preambleLength, headerType, profile.payloadLength, crcType, invertIq)
+            # IQ polarity workaround is a register read-modify-write, only needed when IQ setting changes
+            if last is None or packet[4] != last.packet()[4] : self._fixInvertedIq(profile.invertIq)
+            applied.append('packet')
+        if profile.txPower is not None and (last is None or (profile.txPower, profile.txPowerVersion) != (last.txPower, last.txPowerVersion)) :
+            self.setTxPower(profile.txPower, profile.txPowerVersion)
+            applied.append('txPower')
+        self._profile = profile
+        return tuple(applied)
+
     def setSpreadingFactor(self, sf: int) :
 
         self.setLoRaModulation(sf, self._bw, self._cr, self._ldro)
@@ -579,23 +815,23 @@ class SX126x(BaseLoRa) :
 
     def setHeaderType(self, headerType) :
 
-        self.setLoRaPacket(self._preambleLength, headerType, self._payloadLength, self._crcType, self._invertIq)
+        self.setLoRaPacket(headerType, self._preambleLength, self._payloadLength, self._crcType, self._invertIq)
 
     def setPreambleLength(self, preambleLength: int) :
 
-        self.setLoRaPacket(preambleLength, self._headerType, self._payloadLength, self._crcType, self._invertIq)
+        self.setLoRaPacket(self._headerType, preambleLength, self._payloadLength, self._crcType, self._invertIq)
 
     def setPayloadLength(self, payloadLength: int) :
 
-        self.setLoRaPacket(self._preambleLength, self._headerType, payloadLength, self._crcType, self._invertIq)
+        self.setLoRaPacket(self._headerType, self._preambleLength, payloadLength, self._crcType, self._invertIq)
 
     def setCrcEnable(self, crcType: bool = True) :
 
-        self.setLoRaPacket(self._preambleLength, self._headerType, self._payloadLength, crcType, self._invertIq)
+        self.setLoRaPacket(self._headerType, self._preambleLength, self._payloadLength, crcType, self._invertIq)
 
     def setInvertIq(self, invertIq: bool = True) :
 
-        self.setLoRaPacket(self._preambleLength, self._headerType, self._payloadLength, self._crcType, invertIq)
+        self.setLoRaPacket(self._headerType, self._preambleLength, self._payloadLength, self._crcType, invertIq)
 
     def setSyncWord(self, syncWord: int) :
 
@@ -606,7 +842,7 @@ class SX126x(BaseLoRa) :
         if syncWord <= 0xFF :
             buf = (
                 (syncWord & 0xF0) | 0x04,
-                (syncWord << 4) | 0x04
+                ((syncWord << 4) & 0xFF) | 0x04
             )
         self.writeRegister(self.REG_LORA_SYNC_WORD_MSB, buf, 2)
 
@@ -645,8 +881,8 @@ class SX126x(BaseLoRa) :
 
         # save current txen pin state and set txen pin to LOW
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.LOW)
+            self._txState = self._gpio.input(self._txen)
+            self._gpio.output(self._txen, self._gpio.LOW)
         self._fixLoRaBw500(self._bw)
 
     def endPacket(self, timeout: int = TX_SINGLE) -> bool :
@@ -671,9 +907,7 @@ class SX126x(BaseLoRa) :
         self._transmitTime = time.time()
 
         # set operation status to wait and attach TX interrupt handler
-        if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptTx, bouncetime=10)
+        if self._irq != -1 : self._attachInterrupt(self._interruptTx)
         return True
 
     def write(self, data, length: int = 0) :
@@ -695,11 +929,10 @@ class SX126x(BaseLoRa) :
 
         # prepare bytes or bytearray to be transmitted
         if type(data) is bytes or type(data) is bytearray :
-            dataList = tuple(data)
-            length = len(dataList)
+            length = len(data)
         else : raise TypeError("input data must be bytes or bytearray")
         # write data to buffer and update buffer index and payload
-        self.writeBuffer(self._bufferIndex, dataList, length)
+        self.writeBuffer(self._bufferIndex, data, length)
         self._bufferIndex = (self._bufferIndex + length) % 256
         self._payloadTxRx += length
 
@@ -725,22 +958,19 @@ class SX126x(BaseLoRa) :
 
         # save current txen pin state and set txen pin to high
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.HIGH)
+            self._txState = self._gpio.input(self._txen)
+            self._gpio.output(self._txen, self._gpio.HIGH)
 
         # set device to receive mode with configured timeout, single, or continuous operation
         self.setRx(rxTimeout)
 
         # set operation status to wait and attach RX interrupt handler
         if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
-            if timeout == self.RX_CONTINUOUS :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRxContinuous, bouncetime=10)
-            else :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+            if timeout == self.RX_CONTINUOUS : self._attachInterrupt(self._interruptRxContinuous)
+            else : self._attachInterrupt(self._interruptRx)
         return True
 
-    def listen(self, rxPeriod: int, sleepPeriod: int) -> bool :
+    def listen(self, rxPeriod: float, sleepPeriod: float) -> bool :
 
         # skip to enter RX mode when previous RX operation incomplete
         if self.getMode() == self.STATUS_MODE_RX : return False
@@ -751,24 +981,51 @@ class SX126x(BaseLoRa) :
         # set status to RX wait or RX continuous wait
         self._statusWait = self.STATUS_RX_WAIT
         self._statusIrq = 0x0000
-        # calculate RX period and sleep period config
-        rxPeriod = rxPeriod << 6
-        sleepPeriod = sleepPeriod << 6
+        # calculate RX period and sleep period config, periods in ms with 15.625 us resolution
+        rxPeriod = int(rxPeriod * 64)
+        sleepPeriod = int(sleepPeriod * 64)
         if rxPeriod > 0x00FFFFFF : rxPeriod = 0x00FFFFFF
         if sleepPeriod > 0x00FFFFFF : sleepPeriod = 0x00FFFFFF
 
         # save current txen pin state and set txen pin to high
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.HIGH)
+            self._txState = self._gpio.input(self._txen)
+            self._gpio.output(self._txen, self._gpio.HIGH)
 
         # set device to receive mode with configured receive and sleep period
         self.setRxDutyCycle(rxPeriod, sleepPeriod)
 
         # set operation status to wait and attach RX interrupt handler
-        if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+        if self._irq != -1 : self._attachInterrupt(self._interruptRx)
+        return True
+
+    def requestCad(self, cadSymbolNum: int = CAD_ON_2_SYMB, cadExitMode: int = CAD_EXIT_STDBY, timeout: int = RX_SINGLE, cadDetPeak: int = -1, cadDetMin: int = CAD_DET_MIN) -> bool :
+
+        # skip to start CAD when previous RX operation incomplete
+        if self.getMode() == self.STATUS_MODE_RX : return False
+
+        # clear previous interrupt and set CAD done and CAD detected as interrupt source, plus RX sources when exit to RX mode
+        irqMask = self.IRQ_CAD_DONE | self.IRQ_CAD_DETECTED
+        if cadExitMode == self.CAD_EXIT_RX : irqMask |= self.IRQ_RX_DONE | self.IRQ_TIMEOUT | self.IRQ_HEADER_ERR | self.IRQ_CRC_ERR
+        self._irqSetup(irqMask)
+
+        # set status to CAD wait
+        self._statusWait = self.STATUS_CAD_WAIT
+        self._statusIrq = 0x0000
+        # detection peak recommended for current spreading factor and RX timeout config after activity detected
+        if cadDetPeak == -1 : cadDetPeak = self.CAD_DET_PEAK.get(self._sf, self.CAD_DET_PEAK[12])
+        cadTimeout = timeout << 6
+        if cadTimeout > 0x00FFFFFF : cadTimeout = self.RX_SINGLE
+        self.setCadParams(cadSymbolNum, cadDetPeak, cadDetMin, cadExitMode, cadTimeout)
+
+        # save current txen pin state and set txen pin to high
+        if self._txen != -1 :
+            self._txState = self._gpio.input(self._txen)
+            self._gpio.output(self._txen, self._gpio.HIGH)
+
+        # start channel activity detection and attach CAD interrupt handler, no debounce so back to back CAD edges are kept
+        self.setCad()
+        if self._irq != -1 : self._attachInterrupt(self._interruptCad, None)
         return True
 
     def available(self) -> int :
@@ -806,6 +1063,24 @@ class SX126x(BaseLoRa) :
         # return array of bytes
         return bytes(buf)
 
+    def readPacket(self) -> bytes :
+
+        # read whole received payload in a single buffer burst and update buffer index and payload
+        length = self._payloadTxRx
+        if length == 0 : return bytes()
+        buf = self.readBuffer(self._bufferIndex, length)
+        self._bufferIndex = (self._bufferIndex + length) % 256
+        self._payloadTxRx = 0
+        # return array of bytes
+        return bytes(buf)
+
+    def receivePacket(self) -> RxPacket :
+
+        # capture payload, packet status, IRQ flags and RX done time of last incoming package in one snapshot
+        payload = self.readPacket()
+        (rssi, snr, signalRssi) = self.packetStatus()
+        return RxPacket(payload, rssi, snr, signalRssi, self._rxIrq, self._rxTimestamp)
+
     def purge(self, length: int = 0) :
 
         # subtract or reset received payload length
@@ -839,15 +1114,19 @@ class SX126x(BaseLoRa) :
             # for transmit, calculate transmit time and set back txen pin to previous state
             self._transmitTime = time.time() - self._transmitTime
             if self._txen != -1 :
-                gpio.output(self._txen, self._txState)
+                self._gpio.output(self._txen, self._txState)
         elif self._statusWait == self.STATUS_RX_WAIT :
             # for receive, get received payload length and buffer index and set back txen pin to previous state
+            self._rxTimestamp = time.monotonic()
+            self._rxIrq = irqStat
             (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
             if self._txen != -1 :
-                gpio.output(self._txen, self._txState)
+                self._gpio.output(self._txen, self._txState)
             self._fixRxTimeout()
         elif self._statusWait == self.STATUS_RX_CONTINUOUS :
             # for receive continuous, get received payload length and buffer index and clear IRQ status
+            self._rxTimestamp = time.monotonic()
+            self._rxIrq = irqStat
             (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
             self.clearIrqStatus(0x03FF)
 
@@ -870,6 +1149,8 @@ class SX126x(BaseLoRa) :
         elif statusIrq & self.IRQ_CRC_ERR : return self.STATUS_CRC_ERR
         elif statusIrq & self.IRQ_TX_DONE : return self.STATUS_TX_DONE
         elif statusIrq & self.IRQ_RX_DONE : return self.STATUS_RX_DONE
+        elif statusIrq & self.IRQ_CAD_DETECTED : return self.STATUS_CAD_DETECTED
+        elif statusIrq & self.IRQ_CAD_DONE : return self.STATUS_CAD_DONE
 
         # return TX or RX wait status
         return self._statusWait
@@ -902,6 +1183,13 @@ class SX126x(BaseLoRa) :
         (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
         return signalRssiPkt / -2.0
 
+    def packetStatus(self) -> tuple :
+
+        # get RSSI, SNR and signal RSSI of last incoming package from a single packet status read
+        (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
+        if snrPkt > 127 : snrPkt = snrPkt - 256
+        return (rssiPkt / -2.0, snrPkt / 4.0, signalRssiPkt / -2.0)
+
     def rssiInst(self) -> float :
 
         return self.getRssiInst() / -2.0
@@ -932,7 +1220,7 @@ class SX126x(BaseLoRa) :
         self._transmitTime = time.time() - self._transmitTime
         # set back txen pin to previous state
         if self._txen != -1 :
-            gpio.output(self._txen, self._txState)
+            self._gpio.output(self._txen, self._txState)
         # store IRQ status
         self._statusIrq = self.getIrqStatus()
 
@@ -942,12 +1230,14 @@ class SX126x(BaseLoRa) :
 
     def _interruptRx(self, channel) :
 
+        self._rxTimestamp = self._edgeTimestamp(channel)
         # set back txen pin to previous state
         if self._txen != -1 :
-            gpio.output(self._txen, self._txState)
+            self._gpio.output(self._txen, self._txState)
         self._fixRxTimeout()
         # store IRQ status
         self._statusIrq = self.getIrqStatus()
+        self._rxIrq = self._statusIrq
         # get received payload length and buffer index
         (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
 
@@ -957,8 +1247,10 @@ class SX126x(BaseLoRa) :
 
     def _interruptRxContinuous(self, channel) :
 
+        self._rxTimestamp = self._edgeTimestamp(channel)
         # store IRQ status
         self._statusIrq = self.getIrqStatus()
+        self._rxIrq = self._statusIrq
         # clear IRQ status
         self.clearIrqStatus(0x03FF)
         # get received payload length and buffer index
@@ -968,6 +1260,42 @@ class SX126x(BaseLoRa) :
         if callable(self._onReceive) :
             self._onReceive()
 
+    def _interruptCad(self, channel) :
+
+        # store and clear IRQ status so DIO1 rises again for RX done after activity detected
+        edgeTimestamp = self._edgeTimestamp(channel)
+        irqStat = self.getIrqStatus()
+        self.clearIrqStatus(0x03FF)
+        if irqStat & self.IRQ_RX_DONE :
+            self._rxTimestamp = edgeTimestamp
+            self._rxIrq = irqStat
+            (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+        if irqStat & (self.IRQ_RX_DONE | self.IRQ_TIMEOUT | self.IRQ_HEADER_ERR | self.IRQ_CRC_ERR) and self._txen != -1 :
+            self._gpio.output(self._txen, self._txState)
+        self._statusIrq = irqStat
+
+        # call onCad function
+        if callable(self._onCad) :
+            self._onCad()
+
+    def _edgeTimestamp(self, channel) -> float :
+
+        # DIO1 edge time in time.monotonic() seconds from the GPIO backend's kernel edge event, handler entry time
+        # when the backend does not timestamp edges (RPi.GPIO)
+        if self._edgeTime is not None :
+            timestamp = self._edgeTime(channel)
+            if timestamp is not None : return timestamp
+        return time.monotonic()
+
+    def _attachInterrupt(self, handler, bouncetime = 10) :
+
+        # re-register edge detection only when handler changes, repeated requests keep the existing one
+        if self._irqHandler == handler : return
+        self._gpio.remove_event_detect(self._irq)
+        if bouncetime : self._gpio.add_event_detect(self._irq, self._gpio.RISING, callback=handler, bouncetime=bouncetime)
+        else : self._gpio.add_event_detect(self._irq, self._gpio.RISING, callback=handler)
+        self._irqHandler = handler
+
     def onTransmit(self, callback) :
 
         # register onTransmit function to call every transmit done
@@ -978,10 +1306,20 @@ class SX126x(BaseLoRa) :
         # register onReceive function to call every receive done
         self._onReceive = callback
 
+    def onCad(self, callback) :
+
+        # register onCad function to call every CAD done and, for CAD exit to RX mode, every following RX done or timeout
+        self._onCad = callback
+
 ### SX126X API: OPERATIONAL MODES COMMANDS ###
 
     def setSleep(self, sleepConfig: int) :
         self._writeBytes(0x84, (sleepConfig,), 1)
+        self._shadowInvalidate()
+        if not sleepConfig & self.SLEEP_WARM_START :
+            self._profile = None
+            self._frequency = None
+            self._calBand = None
 
     def setStandby(self, stbyConfig: int) :
         self._writeBytes(0x80, (stbyConfig,), 1)
@@ -1033,10 +1371,12 @@ class SX126x(BaseLoRa) :
 
     def calibrate(self, calibParam: int) :
         self._writeBytes(0x89, (calibParam,), 1)
+        # image calibration bit recalibrates for the default band
+        if calibParam & 0x40 : self._calBand = None
 
     def calibrateImage(self, freq1: int, freq2: int) :
         buf = (freq1, freq2)
-        self._writeBytes(0x98, buf, 2)
+        if self._writeBytes(0x98, buf, 2) : self._calBand = (freq1, freq2)
 
     def setPaConfig(self, paDutyCycle: int, hpMax: int, deviceSel: int, paLut: int) :
         buf = (paDutyCycle, hpMax, deviceSel, paLut)
@@ -1048,25 +1388,48 @@ class SX126x(BaseLoRa) :
 ### SX126X API: REGISTER AND BUFFER ACCESS COMMANDS ###
 
     def writeRegister(self, address: int, data: tuple, nData: int) :
-        buf = (
-            (address >> 8) & 0xFF, 
+        shadow = self._regShadow
+        if shadow is not None :
+            data = tuple(data[:nData])
+            addresses = range(address, address + len(data))
+            if not self.REG_NOT_SHADOWED.isdisjoint(addresses) :
+                shadow = None
+            elif all(shadow.get(a) == value for a, value in zip(addresses, data)) :
+                self._regSkips += 1
+                return
+            self._regWrites += 1
+        addr = (
+            (address >> 8) & 0xFF,
             address & 0xFF
-        ) + tuple(data)
-        self._writeBytes(0x0D, buf, nData+2)
-
-    def readRegister(self, address: int, nData: int) -> tuple :
+        )
+        if self._writeBytes(0x0D, data, nData, addr, 2) and shadow is not None :
+            shadow.update(zip(addresses, data))
+
+    def readRegister(self, address: int, nData: int) -> list :
+        shadow = self._regShadow
+        if shadow is not None :
+            addresses = range(address, address + nData)
+            if not self.REG_NOT_SHADOWED.isdisjoint(addresses) :
+                shadow = None
+            else :
+                cached = [shadow.get(a) for a in addresses]
+                if None not in cached :
+                    self._regHits += 1
+                    return cached
+                self._regMisses += 1
         addr = (
             (address >> 8) & 0xFF,
             address & 0xFF
         )
-        buf = self._readBytes(0x1D, nData+1, addr, 2)
-        return buf[1:]
+        buf = self._readBytes(0x1D, nData+1, addr, 2)[1:]
+        if shadow is not None and len(buf) == nData :
+            shadow.update(zip(addresses, buf))
+        return buf
 
     def writeBuffer(self, offset: int, data: tuple, nData: int) :
-        buf = (offset,) + tuple(data)
-        self._writeBytes(0x0E, buf, nData+1)
+        self._writeBytes(0x0E, data, nData, (offset,), 1)
 
-    def readBuffer(self, offset: int, nData: int) -> tuple :
+    def readBuffer(self, offset: int, nData: int) -> list :
         buf = self._readBytes(0x1E, nData+1, (offset,), 1)
         return buf[1:]
 
@@ -1213,11 +1576,12 @@ class SX126x(BaseLoRa) :
         return buf[1]
 
     def getStats(self) -> tuple :
+        # packets received, CRC errors and header errors, 16 bit counters MSB first after the status byte
         buf = self._readBytes(0x10, 7)
         return (
-            (buf[1] >> 8) | buf[2],
-            (buf[3] >> 8) | buf[4],
-            (buf[5] >> 8) | buf[6]
+            (buf[1] << 8) | buf[2],
+            (buf[3] << 8) | buf[4],
+            (buf[5] << 8) | buf[6]
         )
 
     def resetStats(self) :
@@ -1225,8 +1589,9 @@ class SX126x(BaseLoRa) :
         self._writeBytes(0x00, buf, 6)
 
     def getDeviceErrors(self) -> int :
-        buf = self._readBytes(0x17, 2)
-        return buf[1]
+        # status byte followed by OpError MSB and LSB
+        buf = self._readBytes(0x17, 3)
+        return (buf[1] << 8) | buf[2]
 
     def clearDeviceErrors(self) :
         buf = (0, 0)
@@ -1262,20 +1627,56 @@ class SX126x(BaseLoRa) :
 
 ### SX126X API: UTILITIES ###
 
-    def _writeBytes(self, opCode: int, data: tuple, nBytes: int) :
-        if self.busyCheck() : return
-        gpio.output(self._cs_define, gpio.LOW)
-        buf = [opCode]
-        for i in range(nBytes) : buf.append(data[i])
-        spi.xfer2(buf)
-        gpio.output(self._cs_define, gpio.HIGH)
-
-    def _readBytes(self, opCode: int, nBytes: int, address: tuple = (), nAddress: int = 0) -> tuple :
-        if self.busyCheck() : return ()
-        gpio.output(self._cs_define, gpio.LOW)
-        buf = [opCode]
-        for i in range(nAddress) : buf.append(address[i])
-        for i in range(nBytes) : buf.append(0x00)
-        feedback = spi.xfer2(buf)
-        gpio.output(self._cs_define, gpio.HIGH)
-        return tuple(feedback[nAddress+1:])
+    def _shadowInvalidate(self) :
+
+        # register values are lost on reset and sleep
+        if self._regShadow :
+            self._regShadow.clear()
+            self._regInvalidations += 1
+
+    def _writeBytes(self, opCode: int, data: tuple, nBytes: int, address: tuple = (), nAddress: int = 0) :
+        with self._spiLock :
+            if self.busyCheck(opCode=opCode) : return False
+            if len(data) != nBytes : data = data[:nBytes]
+            end = nAddress + 1 + len(data)
+            if end < self.SPI_BURST_SIZE :
+                # short command frame as a list, cheaper to build than filling the preallocated frame
+                frame = [opCode, *address, *data]
+            else :
+                # opcode, address and data bytes in preallocated frame, never copy past the data actually given
+                txBuf = self._txBuf
+                txBuf[0] = opCode
+                start = nAddress + 1
+                if nAddress : txBuf[1:start] = address
+                txBuf[start:end] = data
+                frame = self._txView[:end]
+            profiler = self._profiler
+            if profiler is not None : t = time.monotonic()
+            if self._cs_define != -1 : self._gpio.output(self._cs_define, self._gpio.LOW)
+            self._spi.writebytes2(frame)
+            if self._cs_define != -1 : self._gpio.output(self._cs_define, self._gpio.HIGH)
+            if profiler is not None : profiler.record(opCode, end, self._busyTimeLast, time.monotonic() - t)
+            return True
+
+    def _readBytes(self, opCode: int, nBytes: int, address: tuple = (), nAddress: int = 0) -> list :
+        with self._spiLock :
+            if self.busyCheck(opCode=opCode) : return []
+            start = nAddress + 1
+            end = start + nBytes
+            if end < self.SPI_BURST_SIZE :
+                # short command frame as a list: opcode, address bytes and NOP bytes to clock out response
+                frame = [opCode, *address] + [0] * nBytes
+            else :
+                # opcode and address bytes in preallocated frame followed by NOP bytes to clock out response
+                txBuf = self._txBuf
+                txBuf[0] = opCode
+                if nAddress : txBuf[1:start] = address
+                self._txView[start:end] = self._nopView[:nBytes]
+                frame = self._txView[:end]
+            profiler = self._profiler
+            if profiler is not None : t = time.monotonic()
+            if self._cs_define != -1 : self._gpio.output(self._cs_define, self._gpio.LOW)
+            feedback = self._spi.xfer2(frame)
+            if self._cs_define != -1 : self._gpio.output(self._cs_define, self._gpio.HIGH)
+            if profiler is not None : profiler.record(opCode, end, self._busyTimeLast, time.monotonic() - t)
+            return feedback[start:end]
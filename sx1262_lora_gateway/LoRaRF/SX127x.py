@@ -1,12 +1,19 @@
 from .base import BaseLoRa
-import spidev
-import RPi.GPIO
+from .packet import RxPacket
+from .profile import RadioProfile
+# spidev and RPi.GPIO are only needed on the Pi, setSpiDevice and setGpio take emulated or other backends
+try :
+    import spidev
+except ImportError :
+    spidev = None
+try :
+    import RPi.GPIO
+except ImportError :
+    RPi = None
 import time
+import threading
 
-spi = spidev.SpiDev()
-gpio = RPi.GPIO
-gpio.setmode(RPi.GPIO.BCM)
-gpio.setwarnings(False)
+gpio = RPi.GPIO if RPi is not None else None
 
 class SX127x(BaseLoRa) :
     """Class for SX1276/77/78/79 LoRa chipsets from Semtech"""
@@ -89,6 +96,7 @@ class SX127x(BaseLoRa) :
     MODE_RX_CONTINUOUS                     = 0x05 # continuous receive
     MODE_RX_SINGLE                         = 0x06 # single receive
     MODE_CAD                               = 0x07 # channel activity detection (CAD)
+    STATUS_MODE_RX                         = 0x05 # getMode() in continuous receive, like SX126x.STATUS_MODE_RX
 
     # Rx operation mode
     RX_SINGLE                              = 0x000000    # Rx timeout duration: no timeout (Rx single mode)
@@ -151,6 +159,10 @@ class SX127x(BaseLoRa) :
     STATUS_CAD_DONE                        = 12
 
     # SPI and GPIO pin setting
+    _spi = None
+    _gpio = gpio                                         # GPIO backend, RPi.GPIO module unless set with setGpio
+    _spiDevice = None                                    # SPI device used instead of spidev.SpiDev, set with setSpiDevice
+    _spiLock = None                                      # serializes SPI transactions and register sequences between threads
     _bus = 0
     _cs = 0
     _reset = 22
@@ -158,8 +170,8 @@ class SX127x(BaseLoRa) :
     _txen = -1
     _rxen = -1
     _spiSpeed = 7800000
-    _txState = gpio.LOW
-    _rxState = gpio.LOW
+    _txState = 0                                         # gpio.LOW
+    _rxState = 0
 
     # LoRa setting
     _dio = 1
@@ -174,16 +186,25 @@ class SX127x(BaseLoRa) :
     _payloadLength = 32
     _crcType = False
     _invertIq = False
+    _profile = None                                      # last profile applied with applyProfile, None when unknown
+    _version = 0x12                                      # silicon version read on reset, 0x22 for SX1272
 
     # Operation properties
     _payloadTxRx = 32
     _statusWait = STATUS_DEFAULT
     _statusIrq = STATUS_DEFAULT
     _transmitTime = 0.0
+    _rxIrq = 0x00
+    _rxTimestamp = 0.0
+    _edgeTime = None                                     # GPIO backend edgeTime(pin) for kernel edge timestamps, None when not supported
 
     # callback functions
     _onTransmit = None
     _onReceive = None
+    _irqHandler = None
+
+    # SPI transaction profiler, None when disabled
+    _profiler = None
 
 ### COMMON OPERATIONAL METHODS ###
 
@@ -193,9 +214,15 @@ class SX127x(BaseLoRa) :
         self.setSpi(bus, cs)
         self.setPins(reset, irq, txen, rxen)
 
-        # perform device reset
+        # perform device reset and LoRa modem setup
+        return self.restart()
+
+    def restart(self) -> bool :
+
+        # perform device reset, SPI and GPIO setup is kept so a wedged device can be recovered in place
         if not self.reset() :
             return False
+        self._profile = None
 
         # set modem to LoRa
         self.setModem(self.LORA_MODEM)
@@ -207,15 +234,19 @@ class SX127x(BaseLoRa) :
     def end(self) :
 
         self.sleep()
-        spi.close()
-        gpio.cleanup()
+        self._spi.close()
+        # release only pins used by this device so other radios keep running
+        pins = [pin for pin in (self._reset, self._irq, self._txen, self._rxen) if pin != -1]
+        if self._irq != -1 : self._gpio.remove_event_detect(self._irq)
+        self._irqHandler = None
+        self._gpio.cleanup(pins)
 
     def reset(self) :
 
         # put reset pin to low then wait 5 ms
-        gpio.output(self._reset, gpio.LOW)
+        self._gpio.output(self._reset, self._gpio.LOW)
         time.sleep(0.001)
-        gpio.output(self._reset, gpio.HIGH)
+        self._gpio.output(self._reset, self._gpio.HIGH)
         time.sleep(0.005)
         # wait until device connected, return false when device too long to respond
         t = time.time()
@@ -224,6 +255,7 @@ class SX127x(BaseLoRa) :
             version = self.readRegister(self.REG_VERSION)
             if time.time() - t > 1 :
                 return False
+        self._version = version
         return True
 
     def sleep(self) :
@@ -240,6 +272,10 @@ class SX127x(BaseLoRa) :
 
         self.writeRegister(self.REG_OP_MODE, self._modem | self.MODE_STDBY)
 
+    def getMode(self) -> int :
+
+        return self.readRegister(self.REG_OP_MODE) & 0x07
+
 ### HARDWARE CONFIGURATION METHODS ###
 
     def setSpi(self, bus: int, cs: int, speed: int = _spiSpeed) :
@@ -247,11 +283,14 @@ class SX127x(BaseLoRa) :
         self._bus = bus
         self._cs = cs
         self._spiSpeed = speed
-        # open spi line and set bus id, chip select, and spi speed
-        spi.open(bus, cs)
-        spi.max_speed_hz = speed
-        spi.lsbfirst = False
-        spi.mode = 0
+        # open spi line owned by this device and set bus id, chip select, and spi speed
+        # reentrant lock so register sequences (read-modify-write, FIFO pointer then FIFO read) hold it across transactions
+        self._spi = self._spiDevice if self._spiDevice is not None else spidev.SpiDev()
+        self._spiLock = threading.RLock()
+        self._spi.open(bus, cs)
+        self._spi.max_speed_hz = speed
+        self._spi.lsbfirst = False
+        self._spi.mode = 0
 
     def setPins(self, reset: int, irq: int = -1, txen: int = -1, rxen: int = -1) :
 
@@ -260,10 +299,36 @@ class SX127x(BaseLoRa) :
         self._txen = txen
         self._rxen = rxen
         # set pins as input or output
-        gpio.setup(reset, gpio.OUT)
-        if irq != -1 : gpio.setup(irq, gpio.IN)
-        if txen != -1 : gpio.setup(txen, gpio.OUT)
-        if rxen != -1 : gpio.setup(rxen, gpio.OUT)
+        self._gpio.setmode(self._gpio.BCM)
+        self._gpio.setwarnings(False)
+        self._gpio.setup(reset, self._gpio.OUT)
+        if irq != -1 : self._gpio.setup(irq, self._gpio.IN)
+        if txen != -1 : self._gpio.setup(txen, self._gpio.OUT)
+        if rxen != -1 : self._gpio.setup(rxen, self._gpio.OUT)
+
+    def setSpiDevice(self, device) :
+
+        # set SPI device object used instead of spidev.SpiDev (call before begin)
+        self._spiDevice = device
+
+    def setGpio(self, backend) :
+
+        # set GPIO backend (call before begin): RPi.GPIO module or a LoRaRF.gpio backend such as LgpioGpio
+        self._gpio = backend
+        self._edgeTime = getattr(backend, 'edgeTime', None)
+
+    def setSpiProfiler(self, profiler = None) :
+
+        # record every SPI transaction in a SpiProfiler, keyed by register address with the write bit, None to stop
+        if profiler is not None and profiler.names is None :
+            names = {}
+            for name in dir(self) :
+                if name.startswith('REG_') :
+                    address = getattr(self, name)
+                    names.setdefault(address, f"read {name}")
+                    names.setdefault(address | 0x80, f"write {name}")
+            profiler.names = names
+        self._profiler = profiler
 
     def setCurrentProtection(self, current: int) :
 
@@ -301,9 +366,7 @@ class SX127x(BaseLoRa) :
         self._frequency = frequency
         # calculate frequency
         frf = int((frequency << 19) / 32000000)
-        self.writeRegister(self.REG_FRF_MSB, (frf >> 16) & 0xFF)
-        self.writeRegister(self.REG_FRF_MID, (frf >> 8) & 0xFF)
-        self.writeRegister(self.REG_FRF_LSB, frf & 0xFF)
+        self.writeRegisters(self.REG_FRF_MSB, ((frf >> 16) & 0xFF, (frf >> 8) & 0xFF, frf & 0xFF))
 
     def setTxPower(self, txPower: int, paPin: int) :
 
@@ -371,6 +434,30 @@ class SX127x(BaseLoRa) :
         self.setCrcEnable(crcType)
         # self.setInvertIq(invertIq)
 
+    def applyProfile(self, profile: RadioProfile) -> tuple :
+
+        # write only the setting groups that differ from the last applied profile, everything on first apply;
+        # TX power always goes to PA_BOOST (RFM95/96 modules have no RFO output), txPowerVersion is SX126x only
+        last = self._profile
+        applied = []
+        if profile.frequency is not None and (last is None or profile.frequency != last.frequency) :
+            self.setFrequency(profile.frequency)
+            applied.append('frequency')
+        modulation = profile.modulation()
+        if last is None or modulation != last.modulation() :
+            self.setLoRaModulation(*modulation)
+            applied.append('modulation')
+        packet = profile.packet()
+        if last is None or packet != last.packet() :
+            self.setLoRaPacket(*packet)
+            self.setInvertIq(profile.invertIq)
+            applied.append('packet')
+        if profile.txPower is not None and (last is None or profile.txPower != last.txPower) :
+            self.setTxPower(profile.txPower, self.TX_POWER_PA_BOOST)
+            applied.append('txPower')
+        self._profile = profile
+        return tuple(applied)
+
     def setSpreadingFactor(self, sf: int) :
 
         self._sf = sf
@@ -426,8 +513,7 @@ class SX127x(BaseLoRa) :
 
     def setPreambleLength(self, preambleLength: int) :
 
-        self.writeRegister(self.REG_PREAMBLE_MSB, (preambleLength >> 8) & 0xFF)
-        self.writeRegister(self.REG_PREAMBLE_LSB, preambleLength & 0xFF)
+        self.writeRegisters(self.REG_PREAMBLE_MSB, ((preambleLength >> 8) & 0xFF, preambleLength & 0xFF))
 
     def setPayloadLength(self, payloadLength: int) :
 
@@ -464,15 +550,16 @@ class SX127x(BaseLoRa) :
     def beginPacket(self) :
 
         # reset TX buffer base address, FIFO address pointer and payload length
-        self.writeRegister(self.REG_FIFO_TX_BASE_ADDR, self.readRegister(self.REG_FIFO_ADDR_PTR))
+        with self._spiLock :
+            self.writeRegister(self.REG_FIFO_TX_BASE_ADDR, self.readRegister(self.REG_FIFO_ADDR_PTR))
         self._payloadTxRx = 0
 
         # save current txen and rxen pin state and set txen pin to high and rxen pin to low
         if self._txen != -1 and self._rxen != -1 :
-            self._txState = gpio.input(self._txen)
-            self._rxState = gpio.input(self._rxen)
-            gpio.output(self._txen, gpio.HIGH)
-            gpio.output(self._rxen, gpio.LOW)
+            self._txState = self._gpio.input(self._txen)
+            self._rxState = self._gpio.input(self._rxen)
+            self._gpio.output(self._txen, self._gpio.HIGH)
+            self._gpio.output(self._rxen, self._gpio.LOW)
 
     def endPacket(self, timeout: int = 0) -> bool :
 
@@ -497,8 +584,7 @@ class SX127x(BaseLoRa) :
         # set TX done interrupt on DIO0 and attach TX interrupt handler
         if self._irq != -1 :
             self.writeRegister(self.REG_DIO_MAPPING_1, self.DIO0_TX_DONE)
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptTx, bouncetime=10)
+            self._attachInterrupt(self._interruptTx)
         return True
 
     def write(self, data, length: int = 0) :
@@ -512,22 +598,19 @@ class SX127x(BaseLoRa) :
         else :
             raise TypeError("input data must be list, tuple, integer or float")
 
-        # write data to buffer and update payload
-        for i in range(length) :
-            self.writeRegister(self.REG_FIFO, int(data[i]))
+        # write data to buffer in a single FIFO burst and update payload
+        self.writeFifo([int(data[i]) for i in range(length)])
         self._payloadTxRx += length
 
     def put(self, data) :
 
         # prepare bytes or bytearray to be transmitted
         if type(data) is bytes or type(data) is bytearray :
-            dataList = tuple(data)
-            length = len(dataList)
+            length = len(data)
         else : raise TypeError("input data must be bytes or bytearray")
 
-        # write data to buffer and update payload
-        for i in range(length) :
-            self.writeRegister(self.REG_FIFO, int(data[i]))
+        # write data to buffer in a single FIFO burst and update payload
+        self.writeFifo(data)
         self._payloadTxRx += length
 
 ### RECEIVE RELATED METHODS ###
@@ -544,10 +627,10 @@ class SX127x(BaseLoRa) :
 
         # save current txen and rxen pin state and set txen pin to low and rxen pin to high
         if self._txen != -1 and self._rxen != -1 :
-            self._txState = gpio.input(self._txen)
-            self._rxState = gpio.input(self._rxen)
-            gpio.output(self._txen, gpio.LOW)
-            gpio.output(self._rxen, gpio.HIGH)
+            self._txState = self._gpio.input(self._txen)
+            self._rxState = self._gpio.input(self._rxen)
+            self._gpio.output(self._txen, self._gpio.LOW)
+            self._gpio.output(self._rxen, self._gpio.HIGH)
 
         # set status to RX wait
         self._statusWait = self.STATUS_RX_WAIT
@@ -571,11 +654,10 @@ class SX127x(BaseLoRa) :
         # set RX done interrupt on DIO0 and attach RX interrupt handler
         if self._irq != -1 :
             self.writeRegister(self.REG_DIO_MAPPING_1, self.DIO0_RX_DONE)
-            gpio.remove_event_detect(self._irq)
             if timeout == self.RX_CONTINUOUS :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRxContinuous, bouncetime=10)
+                self._attachInterrupt(self._interruptRxContinuous)
             else :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+                self._attachInterrupt(self._interruptRx)
         return True
 
     def available(self) :
@@ -596,10 +678,8 @@ class SX127x(BaseLoRa) :
             self._payloadTxRx -= length
         else :
             self._payloadTxRx = 0
-        # read multiple bytes of received package in FIFO buffer
-        data = tuple()
-        for i in range(length) :
-            data = data + (self.readRegister(self.REG_FIFO),)
+        # read multiple bytes of received package in FIFO buffer with a single burst
+        data = tuple(self.readFifo(length))
 
         # return single byte or tuple
         if single : return data[0]
@@ -612,13 +692,25 @@ class SX127x(BaseLoRa) :
             self._payloadTxRx -= length
         else :
             self._payloadTxRx = 0
-        # read data from FIFO buffer and update payload length
-        data = tuple()
-        for i in range(length) :
-            data = data + (self.readRegister(self.REG_FIFO),)
+        # read data from FIFO buffer with a single burst and return array of bytes
+        return self.readFifo(length)
+
+    def readPacket(self) -> bytes :
+
+        # read whole received payload in a single FIFO burst, the DIO0 handler cannot move the FIFO pointer meanwhile
+        with self._spiLock :
+            length = self._payloadTxRx
+            if length == 0 : return bytes()
+            self._payloadTxRx = 0
+            return self.readFifo(length)
 
-        # return array of bytes
-        return bytes(data)
+    def receivePacket(self) -> RxPacket :
+
+        # capture payload, packet status, IRQ flags and RX done time of last incoming package in one snapshot
+        with self._spiLock :
+            payload = self.readPacket()
+            (rssi, snr) = self.packetStatus()
+            return RxPacket(payload, rssi, snr, rssi, self._rxIrq, self._rxTimestamp)
 
     def purge(self, length: int = 0) :
 
@@ -655,26 +747,28 @@ class SX127x(BaseLoRa) :
             # calculate transmit time and set back txen and rxen pin to previous state
             self._transmitTime = time.time() - self._transmitTime
             if self._txen != -1 and self._rxen != -1 :
-                gpio.output(self._txen, self._txState)
-                gpio.output(self._rxen, self._rxState)
+                self._gpio.output(self._txen, self._txState)
+                self._gpio.output(self._rxen, self._rxState)
 
         elif self._statusWait == self.STATUS_RX_WAIT :
             # terminate receive mode by setting mode to standby
             self.standby()
             # set pointer to RX buffer base address and get packet payload length
-            self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
-            self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+            with self._spiLock :
+                self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
+                self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
             # set back txen and rxen pin to previous state
             if self._txen != -1 and self._rxen != -1 :
-                gpio.output(self._txen, self._txState)
-                gpio.output(self._rxen, self._rxState)
+                self._gpio.output(self._txen, self._txState)
+                self._gpio.output(self._rxen, self._rxState)
 
         elif self._statusWait == self.STATUS_RX_CONTINUOUS :
             # set pointer to RX buffer base address and get packet payload length
-            self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
-            self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
-            # clear IRQ flag
-            self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
+            with self._spiLock :
+                self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
+                self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+                # clear IRQ flag
+                self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
 
         # store IRQ status
         self._statusIrq = irqFlag
@@ -712,7 +806,7 @@ class SX127x(BaseLoRa) :
         offset = self.RSSI_OFFSET_HF
         if self._frequency < self.BAND_THRESHOLD :
             offset = self.RSSI_OFFSET_LF
-        if self.readRegister(self.REG_VERSION) == 0x22 :
+        if self._version == 0x22 :
             offset = self.RSSI_OFFSET
         return self.readRegister(self.REG_PKT_RSSI_VALUE) - offset
 
@@ -721,10 +815,49 @@ class SX127x(BaseLoRa) :
         offset = self.RSSI_OFFSET_HF
         if self._frequency < self.BAND_THRESHOLD :
             offset = self.RSSI_OFFSET_LF
-        if self.readRegister(self.REG_VERSION) == 0x22 :
+        if self._version == 0x22 :
             offset = self.RSSI_OFFSET
         return self.readRegister(self.REG_RSSI_VALUE) - offset
 
+    def packetStatus(self) -> tuple :
+
+        # get RSSI and SNR of last incoming package from one burst read of the SNR and RSSI registers
+        (snrPkt, rssiPkt) = self.readRegisters(self.REG_PKT_SNR_VALUE, 2)
+        if snrPkt > 127 : snrPkt = snrPkt - 256
+        offset = self.RSSI_OFFSET_HF
+        if self._frequency < self.BAND_THRESHOLD :
+            offset = self.RSSI_OFFSET_LF
+        if self._version == 0x22 :
+            offset = self.RSSI_OFFSET
+        return (rssiPkt - offset, snrPkt / 4.0)
+
+    def getIrqStatus(self) -> int :
+
+        return self.readRegister(self.REG_IRQ_FLAGS)
+
+    def getStats(self) -> tuple :
+
+        # packets received, CRC errors and header errors like SX126x.getStats: valid header and valid packet counters
+        # restart on every transition into RX mode, there is no header error counter
+        (headerMsb, headerLsb, packetMsb, packetLsb) = self.readRegisters(self.REG_RX_HEADR_CNT_VALUE_MSB, 4)
+        headers = (headerMsb << 8) | headerLsb
+        packets = (packetMsb << 8) | packetLsb
+        return (headers, max(0, headers - packets), 0)
+
+    def resetStats(self) :
+
+        # counters are cleared by the chip when RX mode is entered
+        pass
+
+    def getDeviceErrors(self) -> int :
+
+        # no device error register on SX127x
+        return 0
+
+    def clearDeviceErrors(self) :
+
+        pass
+
     def snr(self) -> float :
 
         # get signal to noise ratio (SNR) of last incoming package
@@ -742,8 +875,8 @@ class SX127x(BaseLoRa) :
 
         # set back txen and rxen pin to previous state
         if self._txen != -1 and self._rxen != -1 :
-            gpio.output(self._txen, self._txState)
-            gpio.output(self._rxen, self._rxState)
+            self._gpio.output(self._txen, self._txState)
+            self._gpio.output(self._rxen, self._rxState)
 
         # call onTransmit function
         if callable(self._onTransmit) :
@@ -751,23 +884,27 @@ class SX127x(BaseLoRa) :
 
     def _interruptRx(self, channel) :
 
-        # store IRQ status
-        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
-        # set IRQ status to RX done when interrupt occured before register updated
-        if not self._statusIrq & 0xF0 :
-            self._statusIrq = self.IRQ_RX_DONE
+        # store IRQ status, RX buffer address and payload length from one burst read
+        self._rxTimestamp = self._edgeTimestamp(channel)
+        with self._spiLock :
+            (rxCurrentAddr, irqMask, irqFlags, rxNbBytes) = self.readRegisters(self.REG_FIFO_RX_CURRENT_ADDR, 4)
+            self._statusIrq = irqFlags
+            # set IRQ status to RX done when interrupt occured before register updated
+            if not self._statusIrq & 0xF0 :
+                self._statusIrq = self.IRQ_RX_DONE
+            self._rxIrq = self._statusIrq
 
-        # terminate receive mode by setting mode to standby
-        self.writeBits(self.REG_OP_MODE, self.MODE_STDBY, 0, 3)
+            # terminate receive mode by setting mode to standby
+            self.writeBits(self.REG_OP_MODE, self.MODE_STDBY, 0, 3)
 
-        # set back txen and rxen pin to previous state
-        if self._txen != -1 and self._rxen != -1 :
-            gpio.output(self._txen, self._txState)
-            gpio.output(self._rxen, self._rxState)
+            # set back txen and rxen pin to previous state
+            if self._txen != -1 and self._rxen != -1 :
+                self._gpio.output(self._txen, self._txState)
+                self._gpio.output(self._rxen, self._rxState)
 
-        # set pointer to RX buffer base address and get packet payload length
-        self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
-        self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+            # set pointer to RX buffer address of the packet and get packet payload length
+            self.writeRegister(self.REG_FIFO_ADDR_PTR, rxCurrentAddr)
+            self._payloadTxRx = rxNbBytes
 
         # call onReceive function
         if callable(self._onReceive) :
@@ -775,23 +912,44 @@ class SX127x(BaseLoRa) :
 
     def _interruptRxContinuous(self, channel) :
 
-        # store IRQ status
-        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
-        # set IRQ status to RX done when interrupt occured before register updated
-        if not self._statusIrq & 0xF0 :
-            self._statusIrq = self.IRQ_RX_DONE
-
-        # clear IRQ flag from last TX or RX operation
-        self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
+        # store IRQ status, RX buffer address and payload length from one burst read
+        self._rxTimestamp = self._edgeTimestamp(channel)
+        with self._spiLock :
+            (rxCurrentAddr, irqMask, irqFlags, rxNbBytes) = self.readRegisters(self.REG_FIFO_RX_CURRENT_ADDR, 4)
+            self._statusIrq = irqFlags
+            # set IRQ status to RX done when interrupt occured before register updated
+            if not self._statusIrq & 0xF0 :
+                self._statusIrq = self.IRQ_RX_DONE
+            self._rxIrq = self._statusIrq
+
+            # clear IRQ flag from last TX or RX operation
+            self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
 
-        # set pointer to RX buffer base address and get packet payload length
-        self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
-        self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+            # set pointer to RX buffer address of the packet and get packet payload length
+            self.writeRegister(self.REG_FIFO_ADDR_PTR, rxCurrentAddr)
+            self._payloadTxRx = rxNbBytes
 
         # call onReceive function
         if callable(self._onReceive) :
             self._onReceive()
 
+    def _edgeTimestamp(self, channel) -> float :
+
+        # DIO0 edge time in time.monotonic() seconds from the GPIO backend's kernel edge event, handler entry time
+        # when the backend does not timestamp edges (RPi.GPIO)
+        if self._edgeTime is not None :
+            timestamp = self._edgeTime(channel)
+            if timestamp is not None : return timestamp
+        return time.monotonic()
+
+    def _attachInterrupt(self, handler, bouncetime = 10) :
+
+        # re-register edge detection only when handler changes, repeated requests keep the existing one
+        if self._irqHandler == handler : return
+        self._gpio.remove_event_detect(self._irq)
+        self._gpio.add_event_detect(self._irq, self._gpio.RISING, callback=handler, bouncetime=bouncetime)
+        self._irqHandler = handler
+
     def onTransmit(self, callback) :
 
         # register onTransmit function to call every transmit done
@@ -806,10 +964,11 @@ class SX127x(BaseLoRa) :
 
     def writeBits(self, address: int, data: int, position: int, length: int) :
 
-        read = self._transfer(address & 0x7F, 0x00)
-        mask = (0xFF >> (8 - length)) << position
-        write = (data << position) | (read & ~mask)
-        self._transfer(address | 0x80, write)
+        with self._spiLock :
+            read = self._transfer(address & 0x7F, 0x00)
+            mask = (0xFF >> (8 - length)) << position
+            write = (data << position) | (read & ~mask)
+            self._transfer(address | 0x80, write)
 
     def writeRegister(self, address: int, data: int) :
 
@@ -819,10 +978,47 @@ class SX127x(BaseLoRa) :
 
         return self._transfer(address & 0x7F, 0x00)
 
+    def writeRegisters(self, address: int, data) :
+
+        # write consecutive registers from address in one transaction, the chip increments the address per byte
+        self._burst(address | 0x80, data)
+
+    def readRegisters(self, address: int, length: int) -> bytes :
+
+        # read consecutive registers from address in one transaction
+        return self._burst(address & 0x7F, bytes(length))
+
+    def writeFifo(self, data) :
+
+        # FIFO access does not increment the SPI address, every byte goes to the FIFO at FifoAddrPtr
+        if len(data) : self._burst(self.REG_FIFO | 0x80, data)
+
+    def readFifo(self, length: int) -> bytes :
+
+        if length == 0 : return bytes()
+        return self._burst(self.REG_FIFO, bytes(length))
+
     def _transfer(self, address: int, data: int) ->int:
 
         buf = [address, data]
-        feedback = spi.xfer2(buf)
+        profiler = self._profiler
+        with self._spiLock :
+            if profiler is not None : t = time.monotonic()
+            feedback = self._spi.xfer2(buf)
+            if profiler is not None : profiler.record(address, 2, 0.0, time.monotonic() - t)
         if (len(feedback) == 2) :
             return int(feedback[1])
         return -1
+
+    def _burst(self, address: int, data) -> bytes :
+
+        # address byte followed by data bytes in a single SPI transaction, returns the bytes clocked out after the address
+        buf = bytearray(1 + len(data))
+        buf[0] = address
+        buf[1:] = data
+        profiler = self._profiler
+        with self._spiLock :
+            if profiler is not None : t = time.monotonic()
+            feedback = self._spi.xfer2(buf)
+            if profiler is not None : profiler.record(address, len(buf), 0.0, time.monotonic() - t)
+        return bytes(feedback[1:])
@@ -1,3 +1,9 @@
 # __init__.py
 from .SX126x import SX126x
 from .SX127x import SX127x
+from .packet import RxPacket
+from .profile import RadioProfile
+from .aio import AsyncSX126x
+from .gpio import LgpioGpio, GpiodGpio, gpioBackend
+from .emulator import SX126xEmulator, EmulatedGpio
+from .profiler import SpiProfiler
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from .SX126x import SX126x
+from .packet import RxPacket
+
+# end of stream marker close() queues for waiting consumers
+_CLOSED = object()
+
+
+class AsyncSX126x :
+    """asyncio front end for an SX126x in continuous RX: DIO1 edges are handed to the event loop, nothing is polled"""
+
+    def __init__(self, radio: SX126x, queueSize: int = 32) :
+
+        # DIO1 edge detection is the only wake-up source
+        if radio._irq == -1 :
+            raise ValueError("AsyncSX126x needs the radio's DIO1 pin")
+        self.radio = radio
+        self._queueSize = queueSize
+        self._queue = None
+        self._loop = None
+        # guards the loop handoff between the GPIO callback thread and close()
+        self._lock = threading.Lock()
+        # packets dropped because the queue was full, CRC and header errors reported by the radio
+        self.dropped = 0
+        self.crcErrors = 0
+        self.headerErrors = 0
+
+    async def start(self) :
+
+        # bind to the running loop and put the radio in continuous RX, repeated calls are no-ops
+        if self._loop is not None : return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self._queueSize)
+        self.radio.onReceive(self._interrupt)
+        self.radio.request(self.radio.RX_CONTINUOUS)
+
+    def close(self) :
+
+        # detach from the radio and leave it in standby, then wake consumers waiting for a packet
+        self.radio.onReceive(None)
+        with self._lock :
+            loop, self._loop = self._loop, None
+        self.radio.standby()
+        if loop is None : return
+        try :
+            running = asyncio.get_running_loop()
+        except RuntimeError :
+            running = None
+        if running is loop :
+            self._end(self._queue)
+            return
+        try :
+            loop.call_soon_threadsafe(self._end, self._queue)
+        except RuntimeError :
+            # loop already closed, nothing can be waiting on it
+            pass
+
+    async def receive(self, timeout: float = None) -> RxPacket :
+
+        # wait for the next packet, None when timeout in seconds passes first
+        await self.start()
+        queue = self._queue
+        try :
+            packet = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError :
+            return None
+        if packet is _CLOSED :
+            # closed while waiting, leave the marker for other waiters
+            queue.put_nowait(_CLOSED)
+            return None
+        return packet
+
+    async def packets(self) :
+
+        # async iterator over received packets, for use as: async for packet in radio.packets()
+        # ends when close() is called
+        await self.start()
+        queue = self._queue
+        while True :
+            packet = await queue.get()
+            if packet is _CLOSED :
+                queue.put_nowait(_CLOSED)
+                return
+            yield packet
+
+    def _interrupt(self) :
+
+        # runs on the GPIO callback thread after the driver has read the IRQ status: drain the radio buffer
+        # right away so the next packet cannot overwrite it, then hand the snapshot to the event loop
+        with self._lock :
+            loop = self._loop
+            if loop is None : return
+            radio = self.radio
+            status = radio.status()
+            if status == radio.STATUS_RX_DONE :
+                packet = radio.receivePacket()
+                try :
+                    loop.call_soon_threadsafe(self._put, packet)
+                except RuntimeError :
+                    # event loop closed without close(), the packet has nowhere to go
+                    self.dropped += 1
+            elif status == radio.STATUS_CRC_ERR :
+                self.crcErrors += 1
+            elif status == radio.STATUS_HEADER_ERR :
+                self.headerErrors += 1
+
+    def _put(self, packet: RxPacket) :
+
+        # event loop thread
+        try :
+            self._queue.put_nowait(packet)
+        except asyncio.QueueFull :
+            self.dropped += 1
+
+    def _end(self, queue: asyncio.Queue) :
+
+        # event loop thread: queue the end of stream marker, making room by dropping the oldest packet if full
+        if queue.full() :
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(_CLOSED)
@@ -32,3 +32,38 @@ class BaseLoRa :
 
     def status(self):
         raise NotImplementedError
+
+    # event-driven receive interface shared by SX126x and SX127x, used by gateways that drive either chip
+
+    def restart(self)-> bool:
+        raise NotImplementedError
+
+    def applyProfile(self, profile)-> tuple:
+        raise NotImplementedError
+
+    def onReceive(self, callback):
+        raise NotImplementedError
+
+    def receivePacket(self):
+        raise NotImplementedError
+
+    def getMode(self)-> int:
+        raise NotImplementedError
+
+    def getStats(self)-> tuple:
+        raise NotImplementedError
+
+    def resetStats(self):
+        raise NotImplementedError
+
+    def getDeviceErrors(self)-> int:
+        raise NotImplementedError
+
+    def clearDeviceErrors(self):
+        raise NotImplementedError
+
+    def setGpio(self, backend):
+        raise NotImplementedError
+
+    def setSpiProfiler(self, profiler):
+        raise NotImplementedError
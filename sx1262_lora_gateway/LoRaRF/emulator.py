@@ -0,0 +1,364 @@
+import json
+import queue
+import random
+import threading
+import time
+
+
+class SX126xEmulator :
+    """SX126x command model for running the driver and gateway without a radio
+
+    Answers the opcodes the SX126x driver uses (status, IRQ, buffer, registers, RX buffer and packet status, stats,
+    device errors, RX/standby/sleep, frequency, CAD), holds BUSY high after each command and raises DIO1 through
+    an EmulatedGpio. Packets are placed in the buffer with inject(), received over the air with receive() or
+    generated at a configurable rate with startTraffic(). Every SPI transaction is counted per opcode.
+    """
+
+    MODE_SLEEP                             = 0x00
+    MODE_STDBY_RC                          = 0x20
+    MODE_STDBY_XOSC                        = 0x30
+    MODE_RX                                = 0x50
+
+    def __init__(self, gpio = None, busy: int = 20, irq: int = 16, reset: int = -1) :
+
+        self.gpio = gpio
+        self.busyPin = busy
+        self.irqPin = irq
+        self.resetPin = reset
+        # BUSY stays high for busyTime seconds after every command, or busyOpcodes[opcode] when listed
+        self.busyTime = 0.0
+        self.busyOpcodes = {}
+        self.busyUntil = 0.0
+        # BUSY high time after a reset through the reset pin
+        self.resetTime = 0.0
+        # channel activity detection: packets on air per frequency, DIO1 raised on CAD done and RX done
+        self.cadTime = 0.002
+        self.onAir = []
+        # packets sent with receive() while the chip was not in RX
+        self.missed = 0
+        self._traffic = None
+        self.resetCounters()
+        self.powerOnReset()
+        if gpio is not None : gpio.attachChip(self)
+
+    def powerOnReset(self) :
+
+        # chip state after the reset pin was pulled low: standby, no IRQ, empty buffer, registers and counters cleared
+        self.mode = self.MODE_STDBY_RC
+        self.irq = 0x0000
+        self.buffer = bytearray(256)
+        self.registers = {}
+        self.rxLength = 0
+        self.rxOffset = 0
+        self.packetStatus = (80, 32, 84)
+        # GetStats counters: packets received, CRC errors, header errors
+        self.counters = [0, 0, 0]
+        # GetDeviceErrors OpError bits
+        self.deviceErrors = 0x0000
+        self.frequency = 0
+        self.cadExit = 0
+        if self.resetTime : self.busyUntil = time.monotonic() + self.resetTime
+
+    def resetCounters(self) :
+
+        self.transactions = 0
+        self.bytes = 0
+        self.opcodes = {}
+
+    def spiDevice(self) :
+
+        # spidev.SpiDev look-alike wired to this chip, for SX126x.setSpiDevice()
+        return EmulatedSpiDev(self)
+
+    def busy(self) -> bool :
+
+        return time.monotonic() < self.busyUntil
+
+    def _raiseDio1(self) :
+
+        if self.gpio is not None : self.gpio.fire(self.irqPin)
+
+    def inject(self, payload: bytes, offset: int = 0, rssi: float = -40.0, snr: float = 8.0) :
+
+        # place a received packet in the buffer and raise RX_DONE, DIO1 is left to the caller
+        payload = bytes(payload)
+        self.buffer[offset:offset + len(payload)] = payload
+        self.rxLength = len(payload)
+        self.rxOffset = offset
+        self.packetStatus = (int(-rssi * 2) & 0xFF, int(snr * 4) & 0xFF, int(-rssi * 2) & 0xFF)
+        self.irq |= 0x0002
+        self.counters[0] = (self.counters[0] + 1) & 0xFFFF
+
+    def receive(self, payload: bytes, rssi: float = -40.0, snr: float = 8.0) -> bool :
+
+        # packet arriving over the air: received with a DIO1 edge when the chip is in RX, missed otherwise
+        if self.mode != self.MODE_RX :
+            self.missed += 1
+            return False
+        self.inject(payload, 0, rssi, snr)
+        self._raiseDio1()
+        return True
+
+    def transmit(self, frequency: int, payload: bytes, preambleTime: float, airtime: float) :
+
+        # start a packet on air on frequency, seen by CAD while its preamble lasts
+        now = time.monotonic()
+        self.onAir = [p for p in self.onAir if p[3] > now]
+        self.onAir.append((frequency, now, now + preambleTime, now + airtime, bytes(payload)))
+
+    def startTraffic(self, rate: float, payload = None, jitter: float = 0.5) :
+
+        # receive packets at rate per second from a background thread, intervals spread by +/- jitter
+        # payload is bytes or a callable taking the sequence number, default a small JSON document
+        self.stopTraffic()
+        if payload is None :
+            payload = lambda seq : json.dumps({"dev": "emulator", "seq": seq, "value": round(random.uniform(0, 100), 2)}).encode()
+        running = threading.Event()
+        running.set()
+        def traffic() :
+            seq = 0
+            while running.is_set() :
+                time.sleep(random.uniform(1 - jitter, 1 + jitter) / rate)
+                if not running.is_set() : break
+                self.receive(payload(seq) if callable(payload) else payload)
+                seq += 1
+        self._traffic = running
+        threading.Thread(target=traffic, name="emulator-traffic", daemon=True).start()
+
+    def stopTraffic(self) :
+
+        if self._traffic is not None :
+            self._traffic.clear()
+            self._traffic = None
+
+    def _cadDone(self, cadStart: float) :
+
+        now = time.monotonic()
+        packet = None
+        for p in self.onAir :
+            # activity only detected when the whole CAD window falls in the preamble
+            if abs(p[0] - self.frequency) < 1000 and p[1] <= cadStart and now <= p[2] :
+                packet = p
+        self.irq |= 0x0080
+        if packet is not None :
+            self.irq |= 0x0100
+        if packet is not None and self.cadExit :
+            threading.Timer(max(0.0, packet[3] - now), self._rxDone, (packet,)).start()
+        else :
+            self.mode = self.MODE_STDBY_RC
+        self._raiseDio1()
+
+    def _rxDone(self, packet) :
+
+        self.inject(packet[4])
+        self.mode = self.MODE_STDBY_RC
+        self._raiseDio1()
+
+    def xfer(self, data) -> list :
+
+        op = data[0]
+        n = len(data)
+        self.transactions += 1
+        self.bytes += n
+        self.opcodes[op] = self.opcodes.get(op, 0) + 1
+        busy = self.busyOpcodes.get(op, self.busyTime)
+        if busy :
+            self.busyUntil = time.monotonic() + busy
+        status = self.mode
+        out = [0] * n
+        if op == 0xC0 :                                   # GetStatus
+            out[1] = status
+        elif op == 0x12 :                                 # GetIrqStatus
+            out[1:4] = [status, self.irq >> 8, self.irq & 0xFF]
+        elif op == 0x02 :                                 # ClearIrqStatus
+            self.irq &= ~((data[1] << 8) | data[2])
+        elif op == 0x13 :                                 # GetRxBufferStatus
+            out[1:4] = [status, self.rxLength, self.rxOffset]
+        elif op == 0x14 :                                 # GetPacketStatus
+            out[1:5] = [status, *self.packetStatus]
+        elif op == 0x10 :                                 # GetStats
+            out[1] = status
+            for i, value in enumerate(self.counters) :
+                out[2 + 2 * i:4 + 2 * i] = [value >> 8, value & 0xFF]
+        elif op == 0x00 :                                 # ResetStats
+            self.counters = [0, 0, 0]
+        elif op == 0x17 :                                 # GetDeviceErrors
+            out[1:4] = [status, self.deviceErrors >> 8, self.deviceErrors & 0xFF]
+        elif op == 0x07 :                                 # ClearDeviceErrors
+            self.deviceErrors = 0x0000
+        elif op == 0x15 :                                 # GetRssiInst
+            out[1:3] = [status, 180]
+        elif op == 0x1E :                                 # ReadBuffer
+            offset = data[1]
+            for i in range(3, n) :
+                out[i] = self.buffer[(offset + i - 3) % 256]
+        elif op == 0x0E :                                 # WriteBuffer
+            offset = data[1]
+            for i in range(2, n) :
+                self.buffer[(offset + i - 2) % 256] = data[i]
+        elif op == 0x1D :                                 # ReadRegister
+            address = (data[1] << 8) | data[2]
+            for i in range(4, n) :
+                out[i] = self.registers.get(address + i - 4, 0)
+        elif op == 0x0D :                                 # WriteRegister
+            address = (data[1] << 8) | data[2]
+            for i in range(3, n) :
+                self.registers[address + i - 3] = data[i]
+        elif op == 0x82 :                                 # SetRx
+            self.mode = self.MODE_RX
+        elif op == 0x80 :                                 # SetStandby
+            self.mode = self.MODE_STDBY_XOSC if data[1] else self.MODE_STDBY_RC
+        elif op == 0x84 :                                 # SetSleep
+            self.mode = self.MODE_SLEEP
+        elif op == 0x86 :                                 # SetRfFrequency
+            rf = (data[1] << 24) | (data[2] << 16) | (data[3] << 8) | data[4]
+            self.frequency = round(rf * 32000000 / 33554432)
+        elif op == 0x88 :                                 # SetCadParams
+            self.cadExit = data[4]
+        elif op == 0xC5 :                                 # SetCad
+            self.mode = self.MODE_RX
+            threading.Timer(self.cadTime, self._cadDone, (time.monotonic(),)).start()
+        return out
+
+
+class EmulatedSpiDev :
+    """spidev.SpiDev look-alike that sends every transfer to an SX126xEmulator"""
+
+    max_speed_hz = 0
+    lsbfirst = False
+    mode = 0
+
+    def __init__(self, chip: SX126xEmulator) :
+
+        self.chip = chip
+
+    def open(self, bus: int, cs: int) :
+
+        pass
+
+    def close(self) :
+
+        pass
+
+    def xfer2(self, data) -> list :
+
+        return self.chip.xfer(data)
+
+    xfer3 = xfer2
+
+    def writebytes2(self, data) :
+
+        self.chip.xfer(data)
+
+
+class EmulatedGpio :
+    """GPIO backend for SX126xEmulator chips, with the RPi.GPIO calls the LoRaRF drivers use
+
+    BUSY inputs follow the attached chips, a low level on a chip's reset pin resets it and DIO1 edges raised with
+    fire() are dispatched on one thread with their monotonic timestamp (edgeTime()). Every edge is delivered like
+    the kernel edge event queue, or with debounce=True edges within bouncetime of the last one are dropped the way
+    RPi.GPIO does.
+    """
+
+    BCM = 11
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, debounce: bool = False) :
+
+        self.debounce = debounce
+        self.levels = {}
+        self.callbacks = {}
+        self.bouncetimes = {}
+        # edge event consumers that see every edge with its timestamp in ns, before any debounce
+        self.rawCallbacks = {}
+        self._chips = []
+        self._edgeTimes = {}
+        self._accepted = {}
+        self._events = queue.Queue()
+        threading.Thread(target=self._dispatch, name="emulator-gpio", daemon=True).start()
+
+    def attachChip(self, chip: SX126xEmulator) :
+
+        chip.gpio = self
+        if chip not in self._chips : self._chips.append(chip)
+
+    def _dispatch(self) :
+
+        while True :
+            pin, t = self._events.get()
+            raw = self.rawCallbacks.get(pin)
+            if raw is not None : raw(t)
+            callback = self.callbacks.get(pin)
+            if callback is None : continue
+            bounce = self.bouncetimes.get(pin)
+            if self.debounce and bounce and t - self._accepted.get(pin, -10**18) < bounce * 1000000 : continue
+            self._accepted[pin] = t
+            self._edgeTimes[pin] = t
+            callback(pin)
+
+    def fire(self, pin: int) :
+
+        # queue a rising edge on pin, stamped now
+        self._events.put((pin, time.monotonic_ns()))
+
+    def setmode(self, mode) :
+
+        pass
+
+    def setwarnings(self, flag) :
+
+        pass
+
+    def setup(self, pin: int, direction: int, **kwargs) :
+
+        self.levels.setdefault(pin, self.LOW)
+
+    def output(self, pin: int, value: int) :
+
+        self.levels[pin] = value
+        if value == self.LOW :
+            for chip in self._chips :
+                if chip.resetPin == pin : chip.powerOnReset()
+
+    def input(self, pin: int) -> int :
+
+        for chip in self._chips :
+            if chip.busyPin == pin and chip.busy() : return self.HIGH
+        return self.levels.get(pin, self.LOW)
+
+    def wait_for_edge(self, pin: int, edge: int, timeout: int = None) :
+
+        # only the BUSY falling edge of an attached chip is modelled
+        remaining = max((chip.busyUntil for chip in self._chips if chip.busyPin == pin), default=0.0) - time.monotonic()
+        if timeout is not None and remaining > timeout / 1000 :
+            time.sleep(timeout / 1000)
+            return None
+        if remaining > 0 : time.sleep(remaining)
+        return pin
+
+    def edgeTime(self, pin: int) -> float :
+
+        # timestamp of the edge being handled on pin, in time.monotonic() seconds
+        timestamp = self._edgeTimes.get(pin)
+        return None if timestamp is None else timestamp / 1e9
+
+    def add_event_detect(self, pin: int, edge: int, callback = None, bouncetime: int = None) :
+
+        self.callbacks[pin] = callback
+        self.bouncetimes[pin] = bouncetime
+
+    def remove_event_detect(self, pin: int) :
+
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self, pins = None) :
+
+        if pins is None : self.callbacks.clear()
+        else :
+            for pin in ([pins] if isinstance(pins, int) else pins) : self.callbacks.pop(pin, None)
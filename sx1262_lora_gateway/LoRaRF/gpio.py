@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+def _monotonicSeconds(timestamp: int) -> float :
+
+    # kernel edge event timestamp in ns to time.monotonic() seconds: events use CLOCK_MONOTONIC unless the line uses the
+    # realtime event clock, which is told apart by which clock the timestamp is closer to
+    now = time.monotonic_ns()
+    wall = time.time_ns()
+    if abs(timestamp - wall) < abs(timestamp - now) : timestamp -= wall - now
+    return timestamp / 1e9
+
+
+class LgpioGpio :
+    """GPIO backend on the lgpio character device library, with the RPi.GPIO calls the LoRaRF drivers use
+
+    Edge callbacks are fed from the kernel edge event queue by lgpio's alert thread: every queued edge is
+    delivered, bouncetime is ignored instead of dropping edges that follow within the debounce window.
+    """
+
+    BCM = 11
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, chip: int = 0) :
+
+        import lgpio
+        self._lgpio = lgpio
+        self._handle = lgpio.gpiochip_open(chip)
+        self._edges = {self.RISING: lgpio.RISING_EDGE, self.FALLING: lgpio.FALLING_EDGE, self.BOTH: lgpio.BOTH_EDGES}
+        self._callbacks = {}
+        self._waiters = {}
+        self._edgeTimes = {}
+
+    def setmode(self, mode) :
+
+        # lines are addressed by offset on the GPIO chip, which matches BCM numbering
+        pass
+
+    def setwarnings(self, flag) :
+
+        pass
+
+    def setup(self, pin: int, direction: int) :
+
+        if direction == self.OUT : self._lgpio.gpio_claim_output(self._handle, pin, 0)
+        else : self._lgpio.gpio_claim_input(self._handle, pin)
+
+    def output(self, pin: int, value: int) :
+
+        self._lgpio.gpio_write(self._handle, pin, value)
+
+    def input(self, pin: int) -> int :
+
+        return self._lgpio.gpio_read(self._handle, pin)
+
+    def add_event_detect(self, pin: int, edge: int, callback = None, bouncetime: int = None) :
+
+        # claim the line for edge alerts, lgpio passes (chip, gpio, level, timestamp) to its callback
+        self.remove_event_detect(pin)
+        self._lgpio.gpio_claim_alert(self._handle, pin, self._edges[edge])
+        if callback is None : return
+        def alert(chip, gpio, level, timestamp) :
+            # level 2 is a watchdog timeout, not an edge; the edge time is kept for edgeTime() while callback runs
+            if level == 2 : return
+            self._edgeTimes[gpio] = timestamp
+            callback(gpio)
+        self._callbacks[pin] = self._lgpio.callback(self._handle, pin, self._edges[edge], alert)
+
+    def remove_event_detect(self, pin: int) :
+
+        cb = self._callbacks.pop(pin, None)
+        self._waiters.pop(pin, None)
+        if cb is not None :
+            cb.cancel()
+            self._lgpio.gpio_claim_input(self._handle, pin)
+
+    def edgeTime(self, pin: int) -> float :
+
+        # kernel timestamp of the edge being handled on pin, in time.monotonic() seconds, None before the first edge
+        timestamp = self._edgeTimes.get(pin)
+        return None if timestamp is None else _monotonicSeconds(timestamp)
+
+    def wait_for_edge(self, pin: int, edge: int, timeout: int = None) :
+
+        # edge alert is claimed on first use and kept, timeout in ms, returns None on timeout like RPi.GPIO
+        waiter = self._waiters.get(pin)
+        if waiter is None :
+            waiter = threading.Event()
+            self.add_event_detect(pin, edge, lambda gpio : waiter.set())
+            self._waiters[pin] = waiter
+        waiter.clear()
+        if waiter.wait(None if timeout is None else timeout / 1000) : return pin
+        return None
+
+    def cleanup(self, pins = None) :
+
+        if pins is None : pins = list(self._callbacks)
+        elif isinstance(pins, int) : pins = [pins]
+        for pin in pins :
+            self.remove_event_detect(pin)
+            self._lgpio.gpio_free(self._handle, pin)
+
+
+class GpiodGpio :
+    """GPIO backend on libgpiod v2 (python3-gpiod), with the RPi.GPIO calls the LoRaRF drivers use
+
+    Each pin is its own line request. Edge callbacks run on one thread per pin reading the kernel edge
+    event queue, every queued edge is delivered and bouncetime is ignored.
+    """
+
+    BCM = 11
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    # seconds remove_event_detect() waits for the edge dispatch thread to finish its callback
+    JOIN_TIMEOUT = 1.0
+
+    def __init__(self, chip: str = "/dev/gpiochip0") :
+
+        import gpiod
+        from gpiod.line import Direction, Value, Edge
+        self._gpiod = gpiod
+        self._chip = chip
+        self._direction = Direction
+        self._values = (Value.INACTIVE, Value.ACTIVE)
+        self._active = Value.ACTIVE
+        self._edges = {self.RISING: Edge.RISING, self.FALLING: Edge.FALLING, self.BOTH: Edge.BOTH}
+        self._requests = {}
+        self._threads = {}
+        self._waiting = set()
+        self._edgeTimes = {}
+
+    def setmode(self, mode) :
+
+        pass
+
+    def setwarnings(self, flag) :
+
+        pass
+
+    def _request(self, pin: int, settings) :
+
+        request = self._requests.get(pin)
+        if request is None :
+            self._requests[pin] = self._gpiod.request_lines(self._chip, consumer="LoRaRF", config={pin: settings})
+        else :
+            request.reconfigure_lines(config={pin: settings})
+
+    def setup(self, pin: int, direction: int) :
+
+        if direction == self.OUT :
+            settings = self._gpiod.LineSettings(direction=self._direction.OUTPUT, output_value=self._values[0])
+        else :
+            settings = self._gpiod.LineSettings(direction=self._direction.INPUT)
+        self._request(pin, settings)
+
+    def output(self, pin: int, value: int) :
+
+        self._requests[pin].set_value(pin, self._values[value])
+
+    def input(self, pin: int) -> int :
+
+        return 1 if self._requests[pin].get_value(pin) == self._active else 0
+
+    def add_event_detect(self, pin: int, edge: int, callback = None, bouncetime: int = None) :
+
+        self.remove_event_detect(pin)
+        self._request(pin, self._gpiod.LineSettings(direction=self._direction.INPUT, edge_detection=self._edges[edge]))
+        if callback is None : return
+        request = self._requests[pin]
+        running = threading.Event()
+        running.set()
+        def dispatch() :
+            # one callback per edge read from the kernel queue, bursts included
+            while running.is_set() :
+                if not request.wait_edge_events(0.1) : continue
+                for event in request.read_edge_events() :
+                    if not running.is_set() : break
+                    self._edgeTimes[pin] = event.timestamp_ns
+                    callback(pin)
+        thread = threading.Thread(target=dispatch, name=f"gpiod-{pin}", daemon=True)
+        self._threads[pin] = (thread, running)
+        thread.start()
+
+    def remove_event_detect(self, pin: int) :
+
+        entry = self._threads.pop(pin, None)
+        self._waiting.discard(pin)
+        if entry is not None :
+            thread, running = entry
+            running.clear()
+            # bounded join: a callback blocked on a lock held by the caller would otherwise never let it return,
+            # the thread exits on its own once that callback returns since running is cleared
+            if thread is not threading.current_thread() : thread.join(self.JOIN_TIMEOUT)
+        if pin in self._requests :
+            self._request(pin, self._gpiod.LineSettings(direction=self._direction.INPUT))
+
+    def edgeTime(self, pin: int) -> float :
+
+        # kernel timestamp of the edge being handled on pin, in time.monotonic() seconds, None before the first edge
+        timestamp = self._edgeTimes.get(pin)
+        return None if timestamp is None else _monotonicSeconds(timestamp)
+
+    def wait_for_edge(self, pin: int, edge: int, timeout: int = None) :
+
+        # edge detection is enabled on first use and kept, events queued since the last wait are drained first
+        request = self._requests[pin]
+        if pin not in self._waiting :
+            self._request(pin, self._gpiod.LineSettings(direction=self._direction.INPUT, edge_detection=self._edges[edge]))
+            self._waiting.add(pin)
+        elif request.wait_edge_events(0) :
+            request.read_edge_events()
+        if request.wait_edge_events(None if timeout is None else timeout / 1000) :
+            request.read_edge_events()
+            return pin
+        return None
+
+    def cleanup(self, pins = None) :
+
+        if pins is None : pins = list(self._requests)
+        elif isinstance(pins, int) : pins = [pins]
+        for pin in pins :
+            self.remove_event_detect(pin)
+            request = self._requests.pop(pin, None)
+            if request is not None : request.release()
+
+
+def gpioBackend(name: str = "rpi") :
+
+    # GPIO backend by name: "rpi" for the RPi.GPIO module (or the rpi-lgpio shim), "lgpio" or "gpiod" for a
+    # native character device backend, "lgpio:4" or "gpiod:/dev/gpiochip4" select another GPIO chip,
+    # "emulator" for SX126xEmulator chips without hardware
+    name, _, chip = name.partition(":")
+    try :
+        if name == "rpi" :
+            import RPi.GPIO
+            return RPi.GPIO
+        if name == "lgpio" :
+            return LgpioGpio(int(chip) if chip else 0)
+        if name == "gpiod" :
+            return GpiodGpio(chip if chip else "/dev/gpiochip0")
+    except ImportError as error :
+        # native backends are optional installs, say which package is missing instead of a bare traceback
+        package = {"rpi": "rpi-lgpio", "lgpio": "lgpio", "gpiod": "gpiod"}[name]
+        _logger.error(f"GPIO backend '{name}' is not available: {error}. Install the '{package}' Python package or select another backend")
+        raise
+    if name == "emulator" :
+        from .emulator import EmulatedGpio
+        return EmulatedGpio()
+    raise ValueError(f"Unknown GPIO backend '{name}'")
@@ -0,0 +1,30 @@
+import time
+
+
+class RxPacket :
+    """Snapshot of a received packet: payload, signal quality, IRQ flags and arrival time"""
+
+    __slots__ = ('payload', 'rssi', 'snr', 'signalRssi', 'irq', 'timestamp')
+
+    def __init__(self, payload: bytes, rssi: float, snr: float, signalRssi: float, irq: int, timestamp: float) :
+
+        self.payload = payload
+        self.rssi = rssi
+        self.snr = snr
+        self.signalRssi = signalRssi
+        self.irq = irq
+        # time.monotonic() at RX done, from the DIO1 edge when the GPIO backend timestamps edges
+        self.timestamp = timestamp
+
+    def wallTime(self) -> float :
+
+        # RX done time mapped from the monotonic clock to time.time() seconds
+        return time.time() - (time.monotonic() - self.timestamp)
+
+    def __len__(self) :
+
+        return len(self.payload)
+
+    def __repr__(self) :
+
+        return f"RxPacket({len(self.payload)} bytes, rssi={self.rssi}, snr={self.snr}, signalRssi={self.signalRssi}, irq=0x{self.irq:04X})"
@@ -0,0 +1,80 @@
+import math
+
+
+class RadioProfile :
+    """Declarative LoRa radio settings applied in one pass with SX126x.applyProfile()"""
+
+    __slots__ = ('frequency', 'sf', 'bw', 'cr', 'ldro', 'headerType', 'preambleLength', 'payloadLength', 'crcType', 'invertIq', 'txPower', 'txPowerVersion')
+
+    # symbol time from which low data rate optimization is required, in seconds
+    LDRO_SYMBOL_TIME = 0.01638
+
+    def __init__(self, frequency: int = None, sf: int = 7, bw: int = 125000, cr: int = 5, ldro: bool = None,
+                 headerType: int = 0x00, preambleLength: int = 12, payloadLength: int = 32, crcType: bool = False, invertIq: bool = False,
+                 txPower: int = None, txPowerVersion: int = 0x02) :
+
+        # frequency in Hz and TX power in dBm, None leaves the radio setting untouched
+        self.frequency = frequency
+        self.sf = sf
+        # bandwidth in Hz and code rate denominator (4/5 to 4/8)
+        self.bw = bw
+        self.cr = cr
+        # None derives low data rate optimization from spreading factor and bandwidth
+        self.ldro = ldro
+        self.headerType = headerType
+        self.preambleLength = preambleLength
+        self.payloadLength = payloadLength
+        self.crcType = crcType
+        self.invertIq = invertIq
+        self.txPower = txPower
+        self.txPowerVersion = txPowerVersion
+
+    def symbolTime(self) -> float :
+
+        # LoRa symbol time in seconds
+        return (1 << self.sf) / self.bw
+
+    def ldroEnabled(self) -> bool :
+
+        if self.ldro is not None : return bool(self.ldro)
+        return self.symbolTime() >= self.LDRO_SYMBOL_TIME
+
+    def preambleTime(self) -> float :
+
+        # preamble duration in seconds, including the 4.25 symbol sync word and start of frame
+        return (self.preambleLength + 4.25) * self.symbolTime()
+
+    def timeOnAir(self, payloadLength: int = None) -> float :
+
+        # LoRa packet time on air in seconds (SX126x datasheet 6.1.4), configured payload length when not given
+        if payloadLength is None : payloadLength = self.payloadLength
+        header = 20 if self.headerType == 0x00 else 0
+        crc = 16 if self.crcType else 0
+        if self.sf < 7 :
+            bits = 8 * payloadLength + crc - 4 * self.sf + header
+            symbols = self.preambleLength + 6.25 + 8 + math.ceil(max(bits, 0) / (4 * self.sf)) * self.cr
+        else :
+            bits = 8 * payloadLength + crc - 4 * self.sf + 8 + header
+            symbols = self.preambleLength + 4.25 + 8 + math.ceil(max(bits, 0) / (4 * (self.sf - 2 * self.ldroEnabled()))) * self.cr
+        return symbols * self.symbolTime()
+
+    def listenPeriods(self, detectSymbols: int = 2, wakeup: float = 0.001) -> tuple :
+
+        # RX and sleep period in seconds for duty-cycled listen so that any preamble of preambleLength symbols
+        # spans a whole RX window: preamble >= 2 * rxPeriod + sleepPeriod, None when the preamble is too short
+        rxPeriod = detectSymbols * self.symbolTime() + wakeup
+        sleepPeriod = self.preambleLength * self.symbolTime() - 2 * rxPeriod
+        if sleepPeriod <= 0 : return None
+        return (rxPeriod, sleepPeriod)
+
+    def modulation(self) -> tuple :
+
+        return (self.sf, self.bw, self.cr, self.ldroEnabled())
+
+    def packet(self) -> tuple :
+
+        return (self.headerType, self.preambleLength, self.payloadLength, bool(self.crcType), bool(self.invertIq))
+
+    def __repr__(self) :
+
+        return f"RadioProfile(frequency={self.frequency}, sf={self.sf}, bw={self.bw}, cr=4/{self.cr}, ldro={self.ldroEnabled()}, preamble={self.preambleLength}, crc={bool(self.crcType)}, invertIq={bool(self.invertIq)}, txPower={self.txPower})"
@@ -0,0 +1,88 @@
+import bisect
+import threading
+
+# SX126x command opcodes by name, for SpiProfiler.stats()
+SX126X_OPCODES = {
+    0x80: "SetStandby", 0x84: "SetSleep", 0xC1: "SetFs", 0x83: "SetTx", 0x82: "SetRx",
+    0x9F: "StopTimerOnPreamble", 0x94: "SetRxDutyCycle", 0xC5: "SetCad", 0xD1: "SetTxContinuousWave",
+    0xD2: "SetTxInfinitePreamble", 0x96: "SetRegulatorMode", 0x89: "Calibrate", 0x98: "CalibrateImage",
+    0x95: "SetPaConfig", 0x93: "SetRxTxFallbackMode", 0x0D: "WriteRegister", 0x1D: "ReadRegister",
+    0x0E: "WriteBuffer", 0x1E: "ReadBuffer", 0x08: "SetDioIrqParams", 0x12: "GetIrqStatus",
+    0x02: "ClearIrqStatus", 0x9D: "SetDio2AsRfSwitchCtrl", 0x97: "SetDio3AsTcxoCtrl", 0x86: "SetRfFrequency",
+    0x8A: "SetPacketType", 0x11: "GetPacketType", 0x8E: "SetTxParams", 0x8B: "SetModulationParams",
+    0x8C: "SetPacketParams", 0x88: "SetCadParams", 0x8F: "SetBufferBaseAddress", 0xA0: "SetLoRaSymbNumTimeout",
+    0xC0: "GetStatus", 0x15: "GetRssiInst", 0x13: "GetRxBufferStatus", 0x14: "GetPacketStatus",
+    0x17: "GetDeviceErrors", 0x07: "ClearDeviceErrors", 0x10: "GetStats", 0x00: "ResetStats"
+}
+
+# transfer latency histogram bucket upper bounds in microseconds, the last bucket is open ended
+LATENCY_BUCKETS = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class SpiProfiler :
+    """Per-opcode SPI transaction profile for the LoRaRF drivers: calls, bytes, BUSY wait and transfer latency histogram
+
+    Attach with setSpiProfiler() on a radio. Without a profiler the drivers only test for None per transaction.
+    SX126x transactions are keyed by command opcode, SX127x transactions by register address with the write bit.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS, names: dict = None) :
+
+        self.buckets = tuple(buckets)
+        # opcode to name for stats(), set by the driver the profiler is attached to when not given
+        self.names = names
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) :
+
+        with self._lock :
+            # opcode: [calls, bytes, busy time, transfer time, max transfer time, histogram]
+            self._ops = {}
+            self.transactions = 0
+            self.bytes = 0
+            self.busyTime = 0.0
+            self.transferTime = 0.0
+
+    def record(self, opcode: int, nBytes: int, busy: float, transfer: float) :
+
+        # one SPI transaction: frame length in bytes, BUSY wait before it and transfer time in seconds
+        with self._lock :
+            op = self._ops.get(opcode)
+            if op is None :
+                op = self._ops[opcode] = [0, 0, 0.0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            op[0] += 1
+            op[1] += nBytes
+            op[2] += busy
+            op[3] += transfer
+            if transfer > op[4] : op[4] = transfer
+            op[5][bisect.bisect_left(self.buckets, transfer * 1e6)] += 1
+            self.transactions += 1
+            self.bytes += nBytes
+            self.busyTime += busy
+            self.transferTime += transfer
+
+    def stats(self) -> dict :
+
+        # totals and per-opcode counters, most called opcode first, histogram keyed by bucket upper bound in us
+        names = self.names or {}
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        with self._lock :
+            ops = sorted(self._ops.items(), key=lambda item : -item[1][0])
+            opcodes = {}
+            for opcode, (calls, nBytes, busy, transfer, transferMax, histogram) in ops :
+                opcodes[names.get(opcode, f"0x{opcode:02X}")] = {
+                    'calls': calls,
+                    'bytes': nBytes,
+                    'busy_ms': round(busy * 1000, 3),
+                    'avg_us': round(transfer / calls * 1e6, 1),
+                    'max_us': round(transferMax * 1e6, 1),
+                    'histogram_us': {label: count for label, count in zip(labels, histogram) if count}
+                }
+            return {
+                'transactions': self.transactions,
+                'bytes': self.bytes,
+                'busy_ms': round(self.busyTime * 1000, 3),
+                'transfer_ms': round(self.transferTime * 1000, 3),
+                'opcodes': opcodes
+            }
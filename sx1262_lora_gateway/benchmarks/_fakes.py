@@ -0,0 +1,250 @@
+"""
+Hardware stand-ins for running the benchmarks off-target.
+
+install() registers fake `spidev`, `RPi.GPIO`, `lgpio` and `gpiod` modules
+(and `paho.mqtt.client` when it is not installed) so LoRaRF and lora_gateway.py
+can be imported on a build box. The fake SPI device and GPIO are backed by
+LoRaRF.emulator: SX126xEmulator answers the opcodes the driver uses and counts
+every transaction, EmulatedGpio models BUSY, reset and DIO1 edges.
+"""
+
+import os
+import sys
+import types
+import threading
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# one emulated chip per SPI bus/chip select, filled by install(); CHIP sits on spidev0.0
+CHIPS = {}
+CHIP = None
+# EmulatedGpio behind the fake RPi.GPIO module, debouncing like RPi.GPIO
+GPIO = None
+
+# RPi.GPIO calls the drivers use, bound from GPIO onto the fake module
+RPI_GPIO_NAMES = ('BCM', 'IN', 'OUT', 'LOW', 'HIGH', 'RISING', 'FALLING', 'BOTH', 'setmode', 'setwarnings', 'setup',
+                  'output', 'input', 'wait_for_edge', 'add_event_detect', 'remove_event_detect', 'cleanup')
+
+
+class FakeSpiDev:
+    """spidev.SpiDev stand-in: picks the emulated chip for the bus/chip select it is opened on"""
+
+    max_speed_hz = 0
+    lsbfirst = False
+    mode = 0
+
+    def open(self, bus, cs):
+        if (bus, cs) not in CHIPS:
+            CHIPS[(bus, cs)] = EMULATOR.SX126xEmulator(GPIO)
+        self.chip = CHIPS[(bus, cs)]
+
+    def close(self):
+        pass
+
+    def xfer2(self, data):
+        return self.chip.xfer(data)
+
+    xfer3 = xfer2
+
+    def writebytes2(self, data):
+        self.chip.xfer(data)
+
+
+class FakeSX127x:
+    """SPI device for an SX127x driver: register file with address auto-increment and a 256-byte FIFO
+
+    Pass it to SX127x.setSpiDevice(). inject() puts a received packet in the FIFO and sets RX done the way
+    the chip does in continuous RX, transactions counts every xfer2.
+    """
+
+    REG_VERSION = 0x42
+
+    def __init__(self):
+        self.regs = bytearray(0x80)
+        self.regs[self.REG_VERSION] = 0x12
+        self.fifo = bytearray(256)
+        self.transactions = 0
+
+    def open(self, bus, cs):
+        pass
+
+    def close(self):
+        pass
+
+    def xfer2(self, data):
+        self.transactions += 1
+        address = data[0]
+        write = address & 0x80
+        reg = address & 0x7F
+        out = [0]
+        for byte in data[1:]:
+            if reg == 0x00:
+                # FIFO at FifoAddrPtr, the SPI address stays on the FIFO
+                ptr = self.regs[0x0D]
+                out.append(0 if write else self.fifo[ptr])
+                if write:
+                    self.fifo[ptr] = byte
+                self.regs[0x0D] = (ptr + 1) & 0xFF
+                continue
+            out.append(0 if write else self.regs[reg])
+            if write:
+                # IRQ flags are cleared by writing ones
+                self.regs[reg] = self.regs[reg] & ~byte & 0xFF if reg == 0x12 else byte
+            reg = (reg + 1) & 0x7F
+        return out
+
+    def inject(self, payload, address=0x00, rssi=-90, snr=6.0):
+        self.fifo[address:address + len(payload)] = payload
+        self.regs[0x10] = address
+        self.regs[0x13] = len(payload)
+        self.regs[0x12] |= 0x50
+        # valid header and valid packet counters
+        for reg in (0x15, 0x17):
+            self.regs[reg] = (self.regs[reg] + 1) & 0xFF
+        self.regs[0x19] = int(snr * 4) & 0xFF
+        self.regs[0x1A] = rssi + 157
+
+
+class FakeLgpio(types.ModuleType):
+    """lgpio look-alike on top of the emulated GPIO pin levels and edge queue"""
+
+    RISING_EDGE = 1
+    FALLING_EDGE = 2
+    BOTH_EDGES = 3
+
+    def __init__(self):
+        super().__init__('lgpio')
+
+    def gpiochip_open(self, chip): return chip
+    def gpiochip_close(self, handle): pass
+    def gpio_claim_output(self, handle, pin, level=0, lFlags=0): GPIO.levels[pin] = level
+    def gpio_claim_input(self, handle, pin, lFlags=0): GPIO.levels.setdefault(pin, GPIO.LOW)
+    def gpio_claim_alert(self, handle, pin, eFlags, lFlags=0, notify_handle=None): GPIO.levels.setdefault(pin, GPIO.LOW)
+    def gpio_free(self, handle, pin): GPIO.rawCallbacks.pop(pin, None)
+    def gpio_write(self, handle, pin, level): GPIO.levels[pin] = level
+    def gpio_read(self, handle, pin): return GPIO.input(pin)
+
+    def callback(self, handle, pin, edge=RISING_EDGE, func=None):
+        GPIO.rawCallbacks[pin] = lambda t: func(handle, pin, 1, t)
+        return types.SimpleNamespace(cancel=lambda: GPIO.rawCallbacks.pop(pin, None))
+
+
+class FakeLineRequest:
+    """gpiod v2 LineRequest look-alike for one line"""
+
+    def __init__(self, config):
+        self.pending = []
+        self.cond = threading.Condition()
+        self.reconfigure_lines(config)
+
+    def _edge(self, t):
+        with self.cond:
+            self.pending.append(t)
+            self.cond.notify_all()
+
+    def reconfigure_lines(self, config):
+        for pin, settings in config.items():
+            self.pin = pin
+            if settings.edge_detection is not None:
+                GPIO.rawCallbacks[pin] = self._edge
+            else:
+                GPIO.rawCallbacks.pop(pin, None)
+            if settings.output_value is not None:
+                GPIO.levels[pin] = settings.output_value
+
+    def set_value(self, pin, value): GPIO.levels[pin] = value
+    def get_value(self, pin): return GPIO.input(pin)
+    def release(self): GPIO.rawCallbacks.pop(self.pin, None)
+
+    def wait_edge_events(self, timeout=None):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.pending, timeout)
+
+    def read_edge_events(self):
+        with self.cond:
+            events, self.pending = self.pending, []
+        return [types.SimpleNamespace(timestamp_ns=t, line_offset=self.pin) for t in events]
+
+
+def _fake_gpiod():
+    gpiod = types.ModuleType('gpiod')
+    line = types.ModuleType('gpiod.line')
+    line.Direction = types.SimpleNamespace(INPUT='input', OUTPUT='output')
+    line.Value = types.SimpleNamespace(INACTIVE=0, ACTIVE=1)
+    line.Edge = types.SimpleNamespace(RISING='rising', FALLING='falling', BOTH='both')
+    gpiod.line = line
+    gpiod.LineSettings = lambda direction=None, edge_detection=None, output_value=None: types.SimpleNamespace(
+        direction=direction, edge_detection=edge_detection, output_value=output_value)
+    gpiod.request_lines = lambda path, consumer=None, config=None: FakeLineRequest(config)
+    return gpiod, line
+
+
+class FakeMqttClient:
+
+    def __init__(self, *args, **kwargs):
+        self.published = []
+        self.on_publish_hook = None
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+        if self.on_publish_hook is not None:
+            self.on_publish_hook(topic, payload)
+        return types.SimpleNamespace(rc=0)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def _importable(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def install(force_hardware=True):
+    """Register the fakes and put the gateway directory on sys.path"""
+    global CHIP, GPIO, EMULATOR
+    if GATEWAY_DIR not in sys.path:
+        sys.path.insert(0, GATEWAY_DIR)
+    if force_hardware or not _importable('spidev'):
+        sys.modules['spidev'] = types.SimpleNamespace(SpiDev=FakeSpiDev)
+    # the drivers pick RPi.GPIO up when LoRaRF is imported, so the fake module is registered first
+    # and gets the emulator's GPIO calls bound onto it right after
+    rpi_gpio = None
+    if force_hardware or not _importable('RPi.GPIO'):
+        rpi_gpio = types.ModuleType('RPi.GPIO')
+        rpi = types.ModuleType('RPi')
+        rpi.GPIO = rpi_gpio
+        sys.modules['RPi'] = rpi
+        sys.modules['RPi.GPIO'] = rpi_gpio
+    import LoRaRF.emulator as EMULATOR
+    GPIO = EMULATOR.EmulatedGpio(debounce=True)
+    if rpi_gpio is not None:
+        for name in RPI_GPIO_NAMES:
+            setattr(rpi_gpio, name, getattr(GPIO, name))
+    CHIP = CHIPS[(0, 0)] = EMULATOR.SX126xEmulator(GPIO)
+    if force_hardware or not _importable('lgpio'):
+        sys.modules['lgpio'] = FakeLgpio()
+    if force_hardware or not _importable('gpiod'):
+        gpiod, line = _fake_gpiod()
+        sys.modules['gpiod'] = gpiod
+        sys.modules['gpiod.line'] = line
+    if not _importable('paho.mqtt.client'):
+        client = types.ModuleType('paho.mqtt.client')
+        client.Client = FakeMqttClient
+        client.MQTT_ERR_SUCCESS = 0
+        client.CallbackAPIVersion = types.SimpleNamespace(VERSION1=1, VERSION2=2)
+        sys.modules['paho'] = types.ModuleType('paho')
+        sys.modules['paho.mqtt'] = types.ModuleType('paho.mqtt')
+        sys.modules['paho.mqtt.client'] = client
+    return CHIP, GPIO
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+DIO1-to-consumer wake-up latency and CPU use: AsyncSX126x vs the threaded callback path.
+
+Packets are injected into the fake SX126x at random intervals and a DIO1 edge
+is raised for each one. Latency is measured from the injection (RX done) to
+the moment the consumer has the packet: an `async for` over
+AsyncSX126x.packets() on the event loop, or the gateway's main thread taking
+it off rx_queue after the RadioReceiver thread drained it. While packets
+arrive, a second asyncio run adds a 1 ms asyncio.sleep ticker on the loop to
+show how late other coroutines are woken (the ticker's own CPU shows in that
+row). CPU is process time over the whole run and over a quiet second.
+
+    python3 benchmarks/bench_async.py --packets 100 --interval 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import queue
+import random
+import threading
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import SX126x, AsyncSX126x
+
+IRQ_PIN = 16
+
+
+def new_radio():
+    lora = SX126x()
+    lora.begin(0, 0, 18, 20, IRQ_PIN, -1, -1)
+    return lora
+
+
+def injector(packets, interval, arrivals):
+    def inject():
+        for seq in range(packets):
+            time.sleep(random.uniform(0.5, 1.5) * interval)
+            arrivals[seq] = time.monotonic()
+            chip.inject(json.dumps({'dev': 'bench', 'seq': seq}).encode())
+            gpio.fire(IRQ_PIN)
+    thread = threading.Thread(target=inject, daemon=True)
+    thread.start()
+    return thread
+
+
+def seq_of(packet):
+    return json.loads(packet.payload)['seq']
+
+
+def run_threaded(packets, interval):
+    lora = new_radio()
+    receiver = gw.RadioReceiver('bench', lora, True)
+    lora.request(lora.RX_CONTINUOUS)
+    receiver.start()
+
+    arrivals, latencies = {}, []
+    cpu = time.process_time()
+    wall = time.monotonic()
+    thread = injector(packets, interval, arrivals)
+    while len(latencies) < packets:
+        try:
+            _, packet = gw.rx_queue.get(timeout=1.0)
+        except queue.Empty:
+            if not thread.is_alive():
+                break
+            continue
+        latencies.append((time.monotonic() - arrivals[seq_of(packet)]) * 1000)
+    busy_cpu = (time.process_time() - cpu) / (time.monotonic() - wall)
+
+    cpu = time.process_time()
+    time.sleep(1.0)
+    idle_cpu = time.process_time() - cpu
+    receiver.stop()
+    receiver.join()
+    return latencies, [], busy_cpu, idle_cpu
+
+
+async def run_async(packets, interval, ticking):
+    radio = AsyncSX126x(new_radio())
+    await radio.start()
+
+    lateness = []
+    async def ticker():
+        while True:
+            t = time.monotonic()
+            await asyncio.sleep(0.001)
+            lateness.append((time.monotonic() - t - 0.001) * 1000)
+    tick = asyncio.create_task(ticker()) if ticking else None
+
+    arrivals, latencies = {}, []
+    cpu = time.process_time()
+    wall = time.monotonic()
+    thread = injector(packets, interval, arrivals)
+    while len(latencies) < packets:
+        packet = await radio.receive(timeout=1.0)
+        if packet is None:
+            if not thread.is_alive():
+                break
+            continue
+        latencies.append((time.monotonic() - arrivals[seq_of(packet)]) * 1000)
+    busy_cpu = (time.process_time() - cpu) / (time.monotonic() - wall)
+    if tick is not None:
+        tick.cancel()
+
+    cpu = time.process_time()
+    await asyncio.sleep(1.0)
+    idle_cpu = time.process_time() - cpu
+    radio.close()
+    return latencies, lateness, busy_cpu, idle_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--packets', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=0.02, help='mean seconds between packets')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{'path':<17} {'rx':>4} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'tick late p95 ms':>17} {'CPU busy':>9} {'CPU idle s':>11}")
+    for name, run in (('threaded', lambda: run_threaded(args.packets, args.interval)),
+                      ('asyncio', lambda: asyncio.run(run_async(args.packets, args.interval, False))),
+                      ('asyncio+1ms tick', lambda: asyncio.run(run_async(args.packets, args.interval, True)))):
+        latencies, lateness, busy_cpu, idle_cpu = run()
+        late = f"{_fakes.percentile(lateness, 95):.3f}" if lateness else '-'
+        print(f"{name:<17} {len(latencies):>4} {_fakes.percentile(latencies, 50):>8.3f} {_fakes.percentile(latencies, 95):>8.3f} "
+              f"{max(latencies, default=0.0):>8.3f} {late:>17} {busy_cpu:>9.1%} {idle_cpu:>11.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+BUSY pin wait strategies: CPU time vs added latency per command.
+
+The fake SX126x holds BUSY high for a fixed time after every command; each
+strategy then issues the same command stream. Wall time includes the BUSY
+period itself, CPU time is process time spent while waiting.
+
+    python3 benchmarks/bench_busy_wait.py --commands 200
+"""
+
+import argparse
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x
+
+
+def run(lora, mode, busy_time, commands):
+    lora.setBusyWait(mode)
+    lora.resetBusyStats()
+    chip.busyTime = busy_time
+    chip.busyUntil = 0.0
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(commands):
+        lora.getStatus()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    chip.busyTime = 0.0
+    busy = lora.busyStats()
+    return wall / commands * 1e6, cpu / commands * 1e6, busy['total_ms'] / commands * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=200)
+    args = parser.parse_args()
+
+    lora = SX126x()
+    lora.begin(0, 0, 18, chip.busyPin, -1, -1, -1)
+    modes = (('spin', lora.BUSY_WAIT_SPIN), ('backoff', lora.BUSY_WAIT_BACKOFF), ('edge', lora.BUSY_WAIT_EDGE))
+    print(f"{'BUSY us':>8} {'mode':<8} {'wall us/cmd':>12} {'CPU us/cmd':>11} {'BUSY wait us':>13}")
+    for busy_time in (0.00005, 0.0005, 0.003):
+        for name, mode in modes:
+            wall, cpu, waited = run(lora, mode, busy_time, args.commands)
+            print(f"{busy_time * 1e6:>8.0f} {name:<8} {wall:>12.1f} {cpu:>11.1f} {waited:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
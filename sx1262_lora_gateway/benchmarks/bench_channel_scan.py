@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+CAD channel scanning: packets caught vs number of scanned channels.
+
+Runs the gateway's ChannelScanner against the fake SX126x, which reports
+activity when a whole CAD window falls inside a packet's preamble and raises
+DIO1 on CAD done and RX done. Packets are sent one at a time on random
+channels; the catch rate is compared with the scanner's own estimate from
+the measured sweep time (switch + CAD per channel) and the preamble length.
+
+    python3 benchmarks/bench_channel_scan.py --packets 40 --sf 7
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import SX126x
+
+IRQ_PIN = 16
+
+
+def run(channels, packets, sf, cad_symbols):
+    gw.mqtt_client = _fakes.FakeMqttClient()
+    gw.mqtt_connected = True
+    radio = dict(gw.PRIMARY_RADIO, sf=sf, irq=IRQ_PIN)
+    profile = gw.radio_profile(radio)
+    frequencies = [902300000 + i * 200000 for i in range(channels)]
+
+    lora = SX126x()
+    lora.begin(0, 0, 18, 20, IRQ_PIN, -1, -1)
+    lora.applyProfile(profile)
+    chip.irqPin = IRQ_PIN
+    chip.cadTime = cad_symbols * profile.symbolTime()
+    scanner = gw.ChannelScanner('bench', lora, profile, frequencies, cad_symbols)
+    scanner.start()
+
+    payload = json.dumps({'dev': 'bench', 'seq': 0}).encode()
+    airtime = profile.timeOnAir(len(payload))
+    for _ in range(packets):
+        time.sleep(random.uniform(0.5, 1.5) * airtime)
+        chip.transmit(random.choice(frequencies), payload, profile.preambleTime(), airtime)
+        time.sleep(airtime)
+        while gw.service_rx_queue(timeout=0.0):
+            pass
+    time.sleep(0.1)
+    scanner.stop()
+    scanner.join()
+    while gw.service_rx_queue(timeout=0.0):
+        pass
+
+    scan = scanner.scan_stats()
+    channel_stats = scan['channels'].values()
+    return {
+        'channels': channels,
+        'caught': scanner.received / packets,
+        'expected': scan['expected_catch_rate'],
+        'sweep_ms': scan['sweep_ms'],
+        'preamble_ms': scan['preamble_ms'],
+        'cad_ms': sum(c['cad_ms'] for c in channel_stats) / channels,
+        'switch_ms': sum(c['switch_ms'] for c in channel_stats) / channels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--packets', type=int, default=40)
+    parser.add_argument('--sf', type=int, default=7)
+    parser.add_argument('--cad-symbols', type=int, default=2, choices=(1, 2, 4, 8, 16))
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{'channels':>8} {'caught':>7} {'expected':>9} {'sweep ms':>9} {'preamble ms':>12} {'CAD ms':>7} {'switch ms':>10}")
+    for channels in (1, 2, 4, 8):
+        r = run(channels, args.packets, args.sf, args.cad_symbols)
+        print(f"{r['channels']:>8} {r['caught']:>7.0%} {r['expected']:>9.0%} {r['sweep_ms']:>9.2f} {r['preamble_ms']:>12.2f} {r['cad_ms']:>7.2f} {r['switch_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+MQTT fan-out modes: publishes and time per received packet.
+
+Runs ME201W packets through handle_lora_packet() with each fanout_mode
+(full, json and selected with --fields) and counts the MQTT publishes one
+packet becomes, with and without change-only publishing of the fields when
+only the timestamp and uptime change between packets.
+
+    python3 benchmarks/bench_fanout.py --packets 5000
+"""
+
+import argparse
+import json
+import logging
+import time
+import types
+
+import _fakes
+
+_fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import RxPacket
+
+
+def me201w(seq):
+    return json.dumps({
+        'dev': 'ME201W', 'ts': 1729170000 + seq, 'up': seq * 60,
+        'water': {'level': 85.2, 'percent': 76, 'raw_distance': 114.8, 'state': 0},
+        'thr': {'high': 200, 'low': 20},
+        'batt': {'voltage': 4.15, 'unit': 95},
+        'stat': {'instHeight': 200, 'sensorState': 'Normal'}
+    }).encode()
+
+
+def run(mode, fields, changes_only, packets):
+    client = _fakes.FakeMqttClient()
+    gw.mqtt_client = client
+    gw.setup_fanout(mode, fields)
+    gw.delta_filter = gw.DeltaFilter(refresh=300) if changes_only else None
+    gw.stats['fanout_packets'] = gw.stats['fanout_publishes'] = 0
+    receiver = gw.RadioReceiver('bench', types.SimpleNamespace(_irq=-1), False, profile=gw.radio_profile(gw.PRIMARY_RADIO))
+    payloads = [me201w(seq) for seq in range(packets)]
+    start = time.perf_counter()
+    for payload in payloads:
+        gw.handle_lora_packet(receiver, RxPacket(payload, -60.0, 9.5, -61.0, 0x0002, time.monotonic()))
+    elapsed = time.perf_counter() - start
+    return gw.stats['fanout_publishes'] / packets, elapsed / packets * 1e6, client.published[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--packets', type=int, default=5000)
+    parser.add_argument('--fields', default='water/level,water/state,batt/voltage,rssi,last_seen')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    gw.mqtt_connected = True
+    # the ME201W names itself in 'dev', giving the json mode its per-device topic
+    gw.AIRTIME_DEVICE_KEY = 'dev'
+
+    print(f"{'mode':<10} {'changes only':<13} {'publishes/pkt':>13} {'us/pkt':>8}  last topic")
+    for mode in ('full', 'json', 'selected'):
+        for changes_only in (False, True):
+            if mode == 'json' and changes_only:
+                continue
+            per_packet, us, topic = run(mode, args.fields, changes_only, args.packets)
+            print(f"{mode:<10} {'yes' if changes_only else 'no':<13} {per_packet:>13.2f} {us:>8.1f}  {topic}")
+
+
+if __name__ == '__main__':
+    main()
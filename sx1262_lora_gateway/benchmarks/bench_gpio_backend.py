@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Per-transaction overhead of the GPIO backends, manual vs hardware chip select, and DIO1 edge bursts.
+
+Times GetStatus round trips through SX126x with the RPi.GPIO, lgpio and gpiod
+backends, once with the driver toggling the manual CS pin around every
+transfer and once with chip select left to spidev. Off-target all three
+backends run on fakes, so the numbers show the driver-side call overhead
+only; run with --hardware on the Pi to time the real libraries, spidev and
+radio (a backend that is not installed there falls back to its fake).
+
+The burst test raises --burst DIO1 edges 1 ms apart: RPi.GPIO's bouncetime=10
+keeps only the first, the character device backends deliver every edge from
+the kernel event queue (fakes only, it needs an edge source).
+
+    python3 benchmarks/bench_gpio_backend.py --transactions 5000
+"""
+
+import argparse
+import sys
+import time
+
+import _fakes
+
+HARDWARE = '--hardware' in sys.argv
+chip, gpio = _fakes.install(force_hardware=not HARDWARE)
+
+from LoRaRF import SX126x, gpioBackend
+
+BACKENDS = ('rpi', 'lgpio', 'gpiod')
+IRQ_PIN = 16
+
+
+def new_radio(backend, cs_pin, irq=-1):
+    lora = SX126x()
+    lora.setCsPin(cs_pin)
+    lora.setGpio(gpioBackend(backend))
+    lora.begin(0, 0, 18, 20, irq, -1, -1)
+    return lora
+
+
+def measure(backend, cs_pin, transactions):
+    lora = new_radio(backend, cs_pin)
+    for _ in range(100):
+        lora.getStatus()
+    t = time.perf_counter()
+    for _ in range(transactions):
+        lora.getStatus()
+    elapsed = time.perf_counter() - t
+    lora.end()
+    return elapsed / transactions * 1e6
+
+
+def burst(backend, edges):
+    lora = new_radio(backend, -1, IRQ_PIN)
+    delivered = []
+    lora.onReceive(lambda: delivered.append(1))
+    lora.request(lora.RX_CONTINUOUS)
+    for _ in range(edges):
+        chip.inject(b'burst')
+        gpio.fire(IRQ_PIN)
+        time.sleep(0.001)
+    time.sleep(0.1)
+    lora.end()
+    return len(delivered)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=5000)
+    parser.add_argument('--burst', type=int, default=5, help='DIO1 edges in one burst')
+    parser.add_argument('--hardware', action='store_true', help='use the real spidev and GPIO libraries')
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'manual CS us/tx':>16} {'hw CS us/tx':>12} {'CS overhead us':>15} {'burst edges':>12}")
+    for backend in BACKENDS:
+        manual = measure(backend, 21, args.transactions)
+        hardware = measure(backend, -1, args.transactions)
+        edges = '-' if args.hardware else f"{burst(backend, args.burst)}/{args.burst}"
+        print(f"{backend:<8} {manual:>16.2f} {hardware:>12.2f} {manual - hardware:>15.2f} {edges:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+JSON codec throughput: json vs ujson vs orjson on captured gateway payloads.
+
+Decodes the packet payloads the gateway parses (ME201W water sensor, the
+emulator's default packet) and encodes the documents it publishes (a json
+fan-out document and gateway/stats captured from a short run), with every
+installed library and with the gateway's JsonCodec. Also times the eager
+debug pretty-print the parser used to format at INFO level against the
+guarded one.
+
+    python3 benchmarks/bench_json_codec.py --iterations 20000
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import time
+import types
+
+import _fakes
+
+_fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import RxPacket
+
+ME201W = (b'{"dev":"ME201W","ts":1729170000,"up":86400,"water":{"level":85.2,"percent":76,"raw_distance":114.8,"state":0},'
+          b'"thr":{"high":200,"low":20},"batt":{"voltage":4.15,"unit":95},"stat":{"instHeight":200,"sensorState":"Normal"}}')
+EMULATOR = b'{"dev": "emulator", "seq": 1234, "value": 56.78}'
+
+
+def capture_documents():
+    # what the json fan-out and publish_statistics() hand to MQTT after a few packets
+    client = _fakes.FakeMqttClient()
+    gw.mqtt_client = client
+    gw.mqtt_connected = True
+    gw.AIRTIME_DEVICE_KEY = 'dev'
+    gw.setup_fanout('json', '')
+    receiver = gw.RadioReceiver('bench', types.SimpleNamespace(_irq=-1), False, profile=gw.radio_profile(gw.PRIMARY_RADIO))
+    for _ in range(10):
+        gw.handle_lora_packet(receiver, RxPacket(ME201W, -60.0, 9.5, -61.0, 0x0002, time.monotonic()))
+    document = client.published[-1][1]
+    gw.publish_statistics([])
+    stats = client.published[-1][1]
+    return json.loads(document), json.loads(stats)
+
+
+def rate(func, arg, iterations, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / iterations * 1e6
+
+
+def codecs():
+    found = []
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            print(f"({name} not installed)")
+            continue
+        found.append((name, module.loads, module.dumps))
+    codec = gw.JsonCodec('auto')
+    found.append((f"JsonCodec ({codec.name})", codec.loads, codec.dumps))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    document, stats = capture_documents()
+    libraries = codecs()
+
+    print(f"{'decode':<10} {'bytes':>5} {'codec':<22} {'us/doc':>7} {'MB/s':>7}")
+    for name, payload in (('me201w', ME201W.decode()), ('emulator', EMULATOR.decode())):
+        for library, loads, _ in libraries:
+            us = rate(loads, payload, args.iterations)
+            print(f"{name:<10} {len(payload):>5} {library:<22} {us:>7.2f} {len(payload) / us:>7.1f}")
+
+    print()
+    print(f"{'encode':<10} {'bytes':>5} {'codec':<22} {'us/doc':>7} {'MB/s':>7}")
+    for name, obj in (('device', document), ('stats', stats)):
+        size = len(json.dumps(obj))
+        for library, _, dumps in libraries:
+            us = rate(dumps, obj, args.iterations)
+            print(f"{name:<10} {size:>5} {library:<22} {us:>7.2f} {size / us:>7.1f}")
+
+    # debug formatting at INFO level, the way parse_payload() did it before and does it now
+    logging.disable(logging.NOTSET)
+    gw.logger.setLevel(logging.INFO)
+    data = json.loads(ME201W)
+
+    def eager(data):
+        gw.logger.debug(f"Parsed data: {json.dumps(data, indent=2)}")
+
+    def guarded(data):
+        if gw.logger.isEnabledFor(logging.DEBUG):
+            gw.logger.debug(f"Parsed data: {json.dumps(data, indent=2)}")
+
+    print()
+    print(f"{'debug log at INFO':<22} {'us/pkt':>7}")
+    for name, func in (('eager f-string', eager), ('isEnabledFor guard', guarded)):
+        print(f"{name:<22} {rate(func, data, args.iterations):>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Payload drain cost: per-byte read() loop vs single-burst readPacket().
+
+Counts SPI transactions and wall time per packet for 16/64/255-byte payloads
+against the fake SX126x.
+
+    python3 benchmarks/bench_packet_read.py --iterations 500
+"""
+
+import argparse
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x
+
+
+def drain_per_byte(lora):
+    message = []
+    while lora.available() > 0:
+        message.append(lora.read())
+    return bytes(message)
+
+
+def drain_burst(lora):
+    return lora.readPacket()
+
+
+def measure(lora, drain, size, iterations):
+    payload = bytes(range(size))
+    chip.inject(payload)
+    elapsed = 0.0
+    transactions = 0
+    for _ in range(iterations):
+        lora._payloadTxRx, lora._bufferIndex = size, 0
+        chip.resetCounters()
+        t = time.perf_counter()
+        data = drain(lora)
+        elapsed += time.perf_counter() - t
+        transactions += chip.transactions
+        assert data == payload
+    return transactions / iterations, elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    lora = SX126x()
+    lora.begin(0, 0, 18, 20, -1, -1, -1)
+    print(f"{'bytes':>5} {'method':<10} {'SPI tx/pkt':>11} {'us/pkt':>10}")
+    for size in (16, 64, 255):
+        for name, drain in (('read()', drain_per_byte), ('readPacket', drain_burst)):
+            tx, us = measure(lora, drain, size, args.iterations)
+            print(f"{size:>5} {name:<10} {tx:>11.0f} {us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
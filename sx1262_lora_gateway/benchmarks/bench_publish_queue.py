@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Publish queue under a slow broker: drop-oldest vs block overflow policy.
+
+Runs the emulated radio at --rate packets/s into the gateway with a
+PublishWorker whose fake MQTT client spends --publish-ms in every publish,
+so the publish stage falls behind the radio. Reports packets published,
+dropped from the queue, blocked radio-thread time and the waits that ran
+out after rx_queue_block_ms, queue high water and packets the radio
+completed but the receive thread never drained.
+
+    python3 benchmarks/bench_publish_queue.py --rate 200 --publish-ms 1.0 --duration 3
+"""
+
+import argparse
+import logging
+import time
+
+import _fakes
+
+_fakes.install()
+
+import lora_gateway as gw
+
+
+def run(policy, rate, publish_ms, duration, queue_size):
+    client = _fakes.FakeMqttClient()
+    gw.mqtt_client = client
+    gw.mqtt_connected = True
+    gw.LORA_GPIO_BACKEND = 'emulator'
+    gw.LORA_EMULATOR_RATE = rate
+    gw.RX_QUEUE_POLICY = policy
+    gw.RX_QUEUE_SIZE = queue_size
+    gw.rx_queue = gw.queue.Queue(maxsize=queue_size)
+    for key in ('messages_received', 'rx_queue_dropped', 'rx_queue_blocked', 'rx_queue_block_timeouts', 'rx_queue_high_water'):
+        gw.stats[key] = 0
+    gw.stats['rx_queue_blocked_time'] = 0.0
+
+    lora = gw.setup_lora(gw.PRIMARY_RADIO)
+    chip = lora._spi.chip
+    receiver = gw.RadioReceiver('load', lora, True, profile=gw.radio_profile(gw.PRIMARY_RADIO))
+    publisher = gw.PublishWorker()
+    receiver.sample_counters()
+    published = []
+    client.on_publish_hook = lambda topic, payload: (time.sleep(publish_ms / 1000), topic.endswith('/seq') and published.append(1))
+    receiver.start()
+    publisher.start()
+    time.sleep(duration)
+    chip.stopTraffic()
+    time.sleep(0.2)
+    counters = receiver.sample_counters()
+    receiver.stop()
+    receiver.join()
+    # let the publish stage finish what is queued
+    while not gw.rx_queue.empty():
+        time.sleep(0.05)
+    publisher.stop()
+    publisher.join()
+    return {
+        'policy': policy,
+        'drained': receiver.received,
+        'published': len(published),
+        'dropped': gw.stats['rx_queue_dropped'],
+        'blocked_ms': gw.stats['rx_queue_blocked_time'] * 1000,
+        'timeouts': gw.stats['rx_queue_block_timeouts'],
+        'high_water': gw.stats['rx_queue_high_water'],
+        'radio_only': counters['pipeline_missed'] + chip.missed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=float, default=200.0, help='packets per second')
+    parser.add_argument('--publish-ms', type=float, default=1.0, help='time spent in every MQTT publish')
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--queue-size', type=int, default=32)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    print(f"{'policy':<12} {'drained':>8} {'published':>10} {'q dropped':>10} {'blocked ms':>11} {'timeouts':>9} {'high water':>11} {'radio only':>11}")
+    for policy in ('drop-oldest', 'block'):
+        r = run(policy, args.rate, args.publish_ms, args.duration, args.queue_size)
+        print(f"{r['policy']:<12} {r['drained']:>8} {r['published']:>10} {r['dropped']:>10} {r['blocked_ms']:>11.1f} {r['timeouts']:>9} {r['high_water']:>11} {r['radio_only']:>11}")
+
+
+if __name__ == '__main__':
+    main()
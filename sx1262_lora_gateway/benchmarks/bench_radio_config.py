@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Radio config phase at startup: per-setting setters vs one RadioProfile pass.
+
+Replays the configuration that setup_lora() used to issue (frequency, SF, BW,
+CR, header, preamble, CRC, IQ, TX power) and the equivalent
+SX126x.applyProfile() call against the fake SX126x, after begin(). BUSY is
+held high for --busy-us after every command to approximate the chip's
+command processing time. A second applyProfile() with only the spreading
+factor changed shows the cost of a reconfiguration.
+
+    python3 benchmarks/bench_radio_config.py --runs 50 --busy-us 50
+"""
+
+import argparse
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x, RadioProfile
+
+FREQUENCY = 915000000
+PROFILE = dict(frequency=FREQUENCY, sf=7, bw=125000, cr=5, headerType=SX126x.HEADER_EXPLICIT,
+               preambleLength=8, crcType=True, invertIq=False, txPower=20)
+
+
+def configure_setters(lora):
+    lora.setFrequency(FREQUENCY)
+    lora.setSpreadingFactor(7)
+    lora.setBandwidth(125000)
+    lora.setCodeRate(5)
+    lora.setHeaderType(lora.HEADER_EXPLICIT)
+    lora.setPreambleLength(8)
+    lora.setCrcEnable(True)
+    lora.setInvertIq(False)
+    lora.setTxPower(20, lora.TX_POWER_SX1262)
+
+
+def configure_profile(lora):
+    lora.applyProfile(RadioProfile(**PROFILE))
+
+
+def reconfigure_profile(lora):
+    lora.applyProfile(RadioProfile(**dict(PROFILE, sf=9)))
+
+
+def measure(configure, runs, busy_time, prepare=None):
+    elapsed = 0.0
+    transactions = 0
+    nbytes = 0
+    for _ in range(runs):
+        lora = SX126x()
+        lora.begin(0, 0, 18, chip.busyPin, -1, -1, -1)
+        if prepare is not None:
+            prepare(lora)
+        chip.busyTime = busy_time
+        chip.resetCounters()
+        t = time.perf_counter()
+        configure(lora)
+        elapsed += time.perf_counter() - t
+        chip.busyTime = 0.0
+        transactions += chip.transactions
+        nbytes += chip.bytes
+    return transactions / runs, nbytes / runs, elapsed / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--busy-us', type=float, default=50.0, help='BUSY high time after each command')
+    args = parser.parse_args()
+
+    print(f"{'method':<18} {'SPI tx':>7} {'bytes':>7} {'ms':>8}")
+    methods = (
+        ('setters', configure_setters, None),
+        ('applyProfile', configure_profile, None),
+        ('reapply sf only', reconfigure_profile, configure_profile),
+    )
+    for name, configure, prepare in methods:
+        tx, nbytes, ms = measure(configure, args.runs, args.busy_us / 1e6, prepare)
+        print(f"{name:<18} {tx:>7.0f} {nbytes:>7.0f} {ms:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
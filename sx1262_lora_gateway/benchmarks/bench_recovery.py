@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Radio recovery time: in-process reset + profile re-apply vs a full setup_lora().
+
+Wedges the fake SX126x (out of RX, or with a PLL lock device error) and lets
+the receive thread's health check find it, then times RadioReceiver.recover()
+from detection until the radio is back in continuous RX. For comparison the
+same radio is brought up from scratch with setup_lora(), which is the
+startup path an add-on restart goes through before the container, Python
+start-up and the MQTT reconnect are even counted. BUSY is held high for
+--busy-us after every command.
+
+    python3 benchmarks/bench_recovery.py --runs 20 --busy-us 50
+"""
+
+import argparse
+import logging
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+import lora_gateway as gw
+
+PLL_LOCK_ERR = 0x0040
+
+
+def wedge_mode():
+    chip.mode = 0x20
+
+
+def wedge_device_error():
+    chip.deviceErrors |= PLL_LOCK_ERR
+
+
+def measure_recovery(receiver, wedge, runs):
+    times = []
+    for _ in range(runs):
+        recoveries = receiver.recoveries
+        wedge()
+        # health check is due on the thread's next wake-up
+        receiver.next_health_check = 0.0
+        receiver.dio1.set()
+        while receiver.recoveries == recoveries:
+            time.sleep(0.001)
+        assert chip.mode == 0x50 and not chip.deviceErrors
+        times.append(receiver.last_recovery['ms'])
+    return times
+
+
+def measure_setup(runs):
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        gw.setup_lora(gw.PRIMARY_RADIO)
+        times.append((time.perf_counter() - t) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--busy-us', type=float, default=50.0, help='BUSY high time after each command')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    gw.mqtt_client = _fakes.FakeMqttClient()
+    gw.mqtt_connected = True
+    gw.RADIO_HEALTH_INTERVAL = 1
+    chip.busyTime = args.busy_us / 1e6
+
+    lora = gw.setup_lora(gw.PRIMARY_RADIO)
+    receiver = gw.RadioReceiver('bench', lora, True, profile=gw.radio_profile(gw.PRIMARY_RADIO))
+    receiver.start()
+
+    print(f"{'path':<28} {'mean ms':>8} {'p95 ms':>8}")
+    for name, times in (
+        ('recover (left RX)', measure_recovery(receiver, wedge_mode, args.runs)),
+        ('recover (device error)', measure_recovery(receiver, wedge_device_error, args.runs)),
+    ):
+        print(f"{name:<28} {sum(times) / len(times):>8.2f} {_fakes.percentile(times, 95):>8.2f}")
+    receiver.stop()
+    receiver.join()
+
+    times = measure_setup(args.runs)
+    print(f"{'setup_lora (restart path)':<28} {sum(times) / len(times):>8.2f} {_fakes.percentile(times, 95):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Register round trips per packet and per reconfiguration, with and without the SX126x register shadow.
+
+A single-RX cycle (request, RX done, _fixRxTimeout workaround) is repeated for
+an untimed and a timed receive, and a reconfiguration (SF/BW change, IQ
+polarity, TX BW500 fix, wake) is repeated against the fake SX126x. Only
+ReadRegister/WriteRegister transactions are counted. The RX cycle touches
+only registers in REG_NOT_SHADOWED, so the shadow saves nothing there.
+
+    python3 benchmarks/bench_register_cache.py --iterations 200
+"""
+
+import argparse
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x
+
+READ_REGISTER = 0x1D
+WRITE_REGISTER = 0x0D
+
+
+def rx_cycle(lora, timeout):
+    lora.request(timeout)
+    chip.inject(b'\x00' * 16)
+    lora.wait()
+    lora.readPacket()
+    chip.mode = 0x20
+
+
+def reconfigure(lora, index):
+    sf, bw = (7, 125000) if index % 2 else (9, 500000)
+    lora.setLoRaModulation(sf, bw, 5)
+    lora.setInvertIq(bool(index % 2))
+    lora.beginPacket()
+    lora.wake()
+
+
+def measure(lora, step, iterations):
+    # first pass fills the shadow, counted separately
+    chip.resetCounters()
+    step(0)
+    first = chip.opcodes.get(READ_REGISTER, 0) + chip.opcodes.get(WRITE_REGISTER, 0)
+    chip.resetCounters()
+    lora.resetRegisterCacheStats()
+    for i in range(iterations):
+        step(i + 1)
+    steady = (chip.opcodes.get(READ_REGISTER, 0) + chip.opcodes.get(WRITE_REGISTER, 0)) / iterations
+    return first, steady, lora.registerCacheStats()['saved'] / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'operation':<16} {'cache':<6} {'first':>6} {'reg tx/op':>10} {'saved/op':>9}")
+    for cache in (False, True):
+        lora = SX126x()
+        lora.begin(0, 0, 18, 20, -1, -1, -1)
+        lora.setRegisterCache(cache)
+        steps = (
+            ('rx single', lambda i: rx_cycle(lora, lora.RX_SINGLE)),
+            ('rx timed', lambda i: rx_cycle(lora, 1000)),
+            ('reconfigure', lambda i: reconfigure(lora, i)),
+        )
+        for name, step in steps:
+            first, steady, saved = measure(lora, step, args.iterations)
+            print(f"{name:<16} {'on' if cache else 'off':<6} {first:>6} {steady:>10.2f} {saved:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Back-to-back frequency changes across 902-928 MHz: image calibration every time vs cached band vs retune().
+
+Hops between --channels evenly spaced frequencies covering the range
+config.yaml allows, in shuffled order. The fake SX126x holds BUSY high for
+--busy-us after every command and for --cal-ms after CalibrateImage (an
+assumed figure, adjust to the part in use); the time a hop takes is the BUSY
+wait of the next command, so every hop is followed by a GetStatus.
+
+    python3 benchmarks/bench_retune.py --hops 500 --cal-ms 3.5
+"""
+
+import argparse
+import random
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x
+
+CALIBRATE_IMAGE = 0x98
+
+
+def hop_recalibrate(lora, frequency):
+    # original driver behaviour: image calibration on every setFrequency
+    lora._calBand = None
+    lora.setFrequency(frequency)
+
+
+def hop_set_frequency(lora, frequency):
+    lora.setFrequency(frequency)
+
+
+def hop_retune(lora, frequency):
+    lora.retune(frequency)
+
+
+def measure(lora, hop, frequencies):
+    times = []
+    chip.resetCounters()
+    for frequency in frequencies:
+        t = time.perf_counter()
+        hop(lora, frequency)
+        lora.getStatus()
+        times.append((time.perf_counter() - t) * 1000)
+    calibrations = chip.opcodes.get(CALIBRATE_IMAGE, 0)
+    # the trailing GetStatus is not part of the hop
+    transactions = chip.transactions / len(frequencies) - 1
+    return transactions, calibrations, sum(times) / len(times), _fakes.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hops', type=int, default=500)
+    parser.add_argument('--channels', type=int, default=64)
+    parser.add_argument('--busy-us', type=float, default=50.0, help='BUSY high time after each command')
+    parser.add_argument('--cal-ms', type=float, default=3.5, help='BUSY high time after CalibrateImage')
+    args = parser.parse_args()
+
+    step = 26000000 // (args.channels - 1)
+    channels = [902000000 + i * step for i in range(args.channels)]
+    frequencies = [random.choice(channels) for _ in range(args.hops)]
+
+    lora = SX126x()
+    lora.begin(0, 0, 18, chip.busyPin, -1, -1, -1)
+    lora.setFrequency(channels[0])
+    chip.busyTime = args.busy_us / 1e6
+    chip.busyOpcodes[CALIBRATE_IMAGE] = args.cal_ms / 1000
+
+    print(f"{args.hops} hops over {args.channels} channels, 902-928 MHz")
+    print(f"{'method':<14} {'SPI tx/hop':>11} {'cal':>5} {'mean ms':>8} {'p95 ms':>8} {'hops/s':>8}")
+    for name, hop in (('recalibrate', hop_recalibrate), ('setFrequency', hop_set_frequency), ('retune', hop_retune)):
+        tx, calibrations, mean, p95 = measure(lora, hop, frequencies)
+        print(f"{name:<14} {tx:>11.1f} {calibrations:>5} {mean:>8.3f} {p95:>8.3f} {1000 / mean:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+RX-done-to-publish latency: polled main loop vs DIO1 interrupt pipeline.
+
+Packets are injected into the fake SX126x at random intervals and a DIO1 edge
+is raised for each one. Latency is measured from the injection (RX done) to
+the MQTT publish of the packet's `seq` leaf. Idle SPI traffic is counted
+while no packets arrive.
+
+    python3 benchmarks/bench_rx_latency.py --packets 50 --interval 0.3
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import SX126x
+
+IRQ_PIN = 16
+
+
+def run(mode, packets, interval):
+    interrupt_mode = mode == 'interrupt'
+    client = _fakes.FakeMqttClient()
+    gw.mqtt_client = client
+    gw.mqtt_connected = True
+
+    published = {}
+    def on_publish(topic, payload):
+        if topic.endswith('/seq'):
+            published[int(payload)] = time.monotonic()
+    client.on_publish_hook = on_publish
+
+    lora = SX126x()
+    lora.begin(0, 0, 18, 20, IRQ_PIN, 6, -1)
+    receiver = gw.RadioReceiver(mode, lora, interrupt_mode)
+    lora.request(lora.RX_CONTINUOUS)
+    receiver.start()
+
+    arrivals = {}
+    def inject():
+        for seq in range(packets):
+            time.sleep(random.uniform(0.5, 1.5) * interval)
+            arrivals[seq] = time.monotonic()
+            chip.inject(json.dumps({'dev': 'bench', 'seq': seq}).encode())
+            gpio.fire(IRQ_PIN)
+
+    injector = threading.Thread(target=inject, daemon=True)
+    injector.start()
+    deadline = time.monotonic() + packets * interval * 2 + 2
+    while (injector.is_alive() or len(published) < packets) and time.monotonic() < deadline:
+        gw.service_rx_queue(timeout=0.05)
+
+    latencies = [(published[seq] - arrivals[seq]) * 1000 for seq in published if seq in arrivals]
+
+    # SPI transactions issued by the receive thread while the channel is quiet
+    chip.resetCounters()
+    t = time.monotonic()
+    while time.monotonic() - t < 1.0:
+        gw.service_rx_queue(timeout=0.05)
+    idle_rate = chip.transactions / (time.monotonic() - t)
+    receiver.stop()
+    receiver.join()
+
+    return {
+        'mode': mode,
+        'received': len(latencies),
+        'lost': packets - len(latencies),
+        'p50': _fakes.percentile(latencies, 50),
+        'p95': _fakes.percentile(latencies, 95),
+        'max': max(latencies) if latencies else 0.0,
+        'idle_spi': idle_rate,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--packets', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.3, help='mean seconds between packets')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{'mode':<10} {'rx':>4} {'lost':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'idle SPI/s':>11}")
+    for mode in ('poll', 'interrupt'):
+        r = run(mode, args.packets, args.interval)
+        print(f"{r['mode']:<10} {r['received']:>4} {r['lost']:>5} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f} {r['idle_spi']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+SX126x SPI framing throughput: per-byte list building vs preallocated frames.
+
+Runs the same command mix through the original list/tuple framing and the
+current framing (short list frames for commands, a preallocated bytearray
+frame for register and buffer bursts) against a null spidev that does no
+I/O, so only the Python-side cost of building and unpacking frames is
+measured. Each command alternates both framings for --rounds rounds and
+keeps the best rate of each, the per-command cost is small enough for
+scheduler noise to swamp a single run.
+
+    python3 benchmarks/bench_spi_framing.py --seconds 0.2 --rounds 5
+"""
+
+import argparse
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+from LoRaRF import SX126x
+
+
+class NullSpiDev:
+
+    def xfer2(self, data):
+        return [0] * len(data)
+
+    def writebytes2(self, data):
+        pass
+
+
+class LegacyFraming(SX126x):
+    """Original framing: list built one byte at a time, tuple results, same busy wait and chip select handling"""
+
+    def writeRegister(self, address, data, nData):
+        buf = ((address >> 8) & 0xFF, address & 0xFF) + tuple(data)
+        self._writeBytes(0x0D, buf, nData+2)
+
+    def readRegister(self, address, nData):
+        buf = self._readBytes(0x1D, nData+1, ((address >> 8) & 0xFF, address & 0xFF), 2)
+        return buf[1:]
+
+    def writeBuffer(self, offset, data, nData):
+        buf = (offset,) + tuple(data)
+        self._writeBytes(0x0E, buf, nData+1)
+
+    def readBuffer(self, offset, nData):
+        buf = self._readBytes(0x1E, nData+1, (offset,), 1)
+        return buf[1:]
+
+    def _writeBytes(self, opCode, data, nBytes, address=(), nAddress=0):
+        with self._spiLock:
+            if self.busyCheck(opCode=opCode): return
+            if self._cs_define != -1: gpio.output(self._cs_define, gpio.LOW)
+            buf = [opCode]
+            for i in range(nBytes): buf.append(data[i])
+            self._spi.xfer2(buf)
+            if self._cs_define != -1: gpio.output(self._cs_define, gpio.HIGH)
+
+    def _readBytes(self, opCode, nBytes, address=(), nAddress=0):
+        with self._spiLock:
+            if self.busyCheck(opCode=opCode): return ()
+            if self._cs_define != -1: gpio.output(self._cs_define, gpio.LOW)
+            buf = [opCode]
+            for i in range(nAddress): buf.append(address[i])
+            for i in range(nBytes): buf.append(0x00)
+            feedback = self._spi.xfer2(buf)
+            if self._cs_define != -1: gpio.output(self._cs_define, gpio.HIGH)
+            return tuple(feedback[nAddress+1:])
+
+
+PAYLOAD = tuple(range(64))
+
+COMMANDS = {
+    'setStandby': lambda r: r.setStandby(r.STANDBY_RC),
+    'setPacketParams': lambda r: r.setPacketParamsLoRa(8, 0, 255, 1, 0),
+    'getIrqStatus': lambda r: r.getIrqStatus(),
+    'getPacketStatus': lambda r: r.getPacketStatus(),
+    'readRegister(1)': lambda r: r.readRegister(r.REG_LORA_SYNC_WORD_MSB, 1),
+    'writeRegister(2)': lambda r: r.writeRegister(r.REG_LORA_SYNC_WORD_MSB, (0x34, 0x44), 2),
+    'readBuffer(64)': lambda r: r.readBuffer(0, 64),
+    'writeBuffer(64)': lambda r: r.writeBuffer(0, PAYLOAD, 64),
+    'readBuffer(255)': lambda r: r.readBuffer(0, 255),
+}
+
+
+def rate(radio, command, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            command(radio)
+        count += 100
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=0.2, help='time per command, framing and round')
+    parser.add_argument('--rounds', type=int, default=5, help='alternating rounds per command, best rate is kept')
+    args = parser.parse_args()
+
+    legacy = LegacyFraming()
+    current = SX126x()
+    legacy.begin(0, 0, 18, 20, -1, -1, -1)
+    current.begin(0, 0, 18, 20, -1, -1, -1)
+    legacy._spi = NullSpiDev()
+    current._spi = NullSpiDev()
+
+    print(f"{'command':<18} {'legacy cmd/s':>13} {'current cmd/s':>14} {'speedup':>8}")
+    for name, command in COMMANDS.items():
+        old = new = 0.0
+        for _ in range(args.rounds):
+            old = max(old, rate(legacy, command, args.seconds))
+            new = max(new, rate(current, command, args.seconds))
+        print(f"{name:<18} {old:>13.0f} {new:>14.0f} {new / old:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
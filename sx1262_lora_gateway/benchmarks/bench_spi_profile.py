@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+SPI transaction profile: cost of the profiler and SPI transactions per received packet.
+
+First runs a command mix against a null spidev with and without an
+SpiProfiler attached, so the per-transaction cost of the instrumentation is
+what remains. Then receives packets on the fake SX126x through the gateway
+receive pipeline (polled and interrupt) and prints the per-opcode profile
+divided by the packets drained.
+
+    python3 benchmarks/bench_spi_profile.py --seconds 1 --packets 200
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import _fakes
+
+chip, gpio = _fakes.install()
+
+import lora_gateway as gw
+from LoRaRF import SX126x, SpiProfiler
+
+IRQ_PIN = 16
+
+
+class NullSpiDev:
+
+    def xfer2(self, data):
+        return [0] * len(data)
+
+    def writebytes2(self, data):
+        pass
+
+
+COMMANDS = (
+    lambda r: r.getIrqStatus(),
+    lambda r: r.clearIrqStatus(0x03FF),
+    lambda r: r.getRxBufferStatus(),
+    lambda r: r.getPacketStatus(),
+    lambda r: r.readBuffer(0, 32),
+)
+
+
+def rate(radio, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(20):
+            for command in COMMANDS:
+                command(radio)
+        count += 20 * len(COMMANDS)
+    return count / seconds
+
+
+def overhead(seconds):
+    radio = SX126x()
+    radio.begin(0, 0, 18, 20, -1, -1, -1)
+    radio._spi = NullSpiDev()
+    off = rate(radio, seconds)
+    radio.setSpiProfiler(SpiProfiler())
+    on = rate(radio, seconds)
+    radio.setSpiProfiler(None)
+    return off, on
+
+
+def receive(mode, packets):
+    gw.mqtt_client = _fakes.FakeMqttClient()
+    gw.mqtt_connected = True
+    lora = SX126x()
+    lora.begin(0, 0, 18, 20, IRQ_PIN, 6, -1)
+    lora.request(lora.RX_CONTINUOUS)
+    lora.setSpiProfiler(SpiProfiler())
+    receiver = gw.RadioReceiver(mode, lora, mode == 'interrupt')
+    receiver.start()
+    for seq in range(packets):
+        # one packet at a time so the polled loop sees each one
+        received = receiver.received
+        # past the fake RPi.GPIO bouncetime, so every DIO1 edge gets through
+        time.sleep(0.012)
+        chip.inject(json.dumps({'dev': 'bench', 'seq': seq}).encode())
+        gpio.fire(IRQ_PIN)
+        deadline = time.monotonic() + 0.5
+        while receiver.received == received and time.monotonic() < deadline:
+            gw.service_rx_queue(timeout=0.01)
+    receiver.stop()
+    receiver.join()
+    return receiver.spi_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=1.0, help='time per overhead run')
+    parser.add_argument('--packets', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    off, on = overhead(args.seconds)
+    print(f"{'profiler':<10} {'cmd/s':>10} {'us/cmd':>8}")
+    print(f"{'off':<10} {off:>10.0f} {1e6 / off:>8.2f}")
+    print(f"{'on':<10} {on:>10.0f} {1e6 / on:>8.2f}")
+    print(f"profiler cost: {1e6 / on - 1e6 / off:.2f} us per transaction when attached")
+
+    for mode in ('poll', 'interrupt'):
+        stats = receive(mode, args.packets)
+        packets = stats['packets'] or 1
+        print(f"\n{mode}: {stats['packets']} packets, {stats['transactions_per_packet']} transactions per packet "
+              f"({stats['transactions']} total incl. idle polling)")
+        print(f"  {'opcode':<20} {'per packet':>10} {'bytes/pkt':>10} {'avg us':>8}")
+        for name, op in stats['opcodes'].items():
+            print(f"  {name:<20} {op['calls'] / packets:>10.2f} {op['bytes'] / packets:>10.1f} {op['avg_us']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+SX127x packet drain: two-byte register transfers vs burst FIFO and register block reads.
+
+Runs the continuous RX interrupt handler and packet read for 16/64/255-byte
+payloads against a fake SX127x register file. The per-register path is the
+original driver (IRQ flags, RX address and length read one register at a
+time, FIFO read one byte per transaction, RSSI/SNR with a version read), the
+burst path is the current handler plus receivePacket().
+
+    python3 benchmarks/bench_sx127x_burst.py --iterations 500
+"""
+
+import argparse
+import time
+
+import _fakes
+
+_fakes.install()
+
+from LoRaRF import SX127x
+
+DIO0_PIN = 16
+
+
+class PerRegister(SX127x):
+    """Original SX127x receive path: one SPI transaction per register and per FIFO byte"""
+
+    def _interruptRxContinuous(self, channel):
+        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
+        if not self._statusIrq & 0xF0:
+            self._statusIrq = self.IRQ_RX_DONE
+        self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
+        self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
+        self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+
+    def drain(self):
+        data = tuple()
+        for _ in range(self._payloadTxRx):
+            data = data + (self.readRegister(self.REG_FIFO),)
+        self._payloadTxRx = 0
+        offset = self.RSSI_OFFSET_HF if self.readRegister(self.REG_VERSION) != 0x22 else self.RSSI_OFFSET
+        rssi = self.readRegister(self.REG_PKT_RSSI_VALUE) - offset
+        snr = self.readRegister(self.REG_PKT_SNR_VALUE) / 4.0
+        return bytes(data), rssi, snr
+
+
+class Burst(SX127x):
+
+    def drain(self):
+        packet = self.receivePacket()
+        return packet.payload, packet.rssi, packet.snr
+
+
+def measure(cls, size, iterations):
+    device = _fakes.FakeSX127x()
+    lora = cls()
+    lora.setSpiDevice(device)
+    lora.begin(0, 0, 18, DIO0_PIN, -1, -1)
+    payload = bytes(range(size))
+    elapsed = 0.0
+    for _ in range(iterations):
+        device.inject(payload)
+        device.transactions = 0
+        t = time.perf_counter()
+        lora._interruptRxContinuous(DIO0_PIN)
+        data, rssi, snr = lora.drain()
+        elapsed += time.perf_counter() - t
+        assert data == payload
+    return device.transactions, elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'payload':>8} {'per-reg xfers':>14} {'burst xfers':>12} {'per-reg us':>11} {'burst us':>9} {'speedup':>8}")
+    for size in (16, 64, 255):
+        old_xfers, old_us = measure(PerRegister, size, args.iterations)
+        new_xfers, new_us = measure(Burst, size, args.iterations)
+        print(f"{size:>8} {old_xfers:>14} {new_xfers:>12} {old_us:>11.1f} {new_us:>9.1f} {old_us / new_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Per-field fan-out: recursive topic building vs cached topic plans.
+
+Flattens and publishes representative parsed payloads (the ME201W water
+sensor document, a small flat one and one with a list) through a no-op MQTT
+client, with the old recursive publish_nested() walk, publish_fields() with
+the topic plan cache disabled and publish_fields() with it enabled. Also
+rotates more device shapes than --cache-size to show LRU evictions.
+
+    python3 benchmarks/bench_topic_plan.py --iterations 20000
+"""
+
+import argparse
+import logging
+import time
+import types
+
+import _fakes
+
+_fakes.install()
+
+import lora_gateway as gw
+
+PAYLOADS = {
+    'me201w': {
+        'dev': 'ME201W', 'ts': 1729170000,
+        'water': {'level': 85.2, 'percent': 76, 'raw_distance': 114.8, 'state': 0},
+        'thr': {'high': 200, 'low': 20},
+        'batt': {'voltage': 4.15, 'unit': 95},
+        'stat': {'instHeight': 200, 'sensorState': 'Normal'}
+    },
+    'flat': {'temp': 21.5, 'hum': 48, 'batt': 3.01},
+    'list': {'dev': 'probe', 'samples': [12.1, 12.3, 12.2, 12.6, 12.4, 12.5, 12.2, 12.3], 'ok': True}
+}
+
+
+class NullClient:
+    """MQTT client whose publish() does nothing, so the walk and topic strings dominate"""
+
+    result = types.SimpleNamespace(rc=0)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        return self.result
+
+
+def publish_nested(obj, path=""):
+    # the per-packet walk publish_fields() replaces, kept as the baseline
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            new_path = f"{path}/{key}" if path else key
+            if isinstance(value, (dict, list)):
+                publish_nested(value, new_path)
+            else:
+                gw.publish_to_mqtt(f"{gw.MQTT_PREFIX}/{new_path}", str(value))
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            new_path = f"{path}/{i}"
+            if isinstance(item, (dict, list)):
+                publish_nested(item, new_path)
+            else:
+                gw.publish_to_mqtt(f"{gw.MQTT_PREFIX}/{new_path}", str(item))
+
+
+def published(publish, data):
+    client = _fakes.FakeMqttClient()
+    gw.mqtt_client = client
+    publish(data)
+    return client.published
+
+
+def measure(publish, payloads, iterations, repeat=5):
+    # best of repeat runs, the walk is short enough for scheduler noise to matter
+    gw.mqtt_client = NullClient()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(iterations):
+            publish(payloads[i % len(payloads)])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--cache-size', type=int, default=64)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    gw.mqtt_connected = True
+
+    methods = (
+        ('publish_nested', lambda: publish_nested),
+        ('plan, no cache', lambda: gw.TopicPlanCache(0)),
+        ('plan, cached', lambda: gw.TopicPlanCache(args.cache_size))
+    )
+    print(f"{'payload':<10} {'leaves':>6} {'method':<16} {'us/pkt':>8} {'speedup':>8}")
+    for name, data in PAYLOADS.items():
+        baseline = None
+        for method, make in methods:
+            cache = make()
+            if isinstance(cache, gw.TopicPlanCache):
+                gw.topic_plans = cache
+                publish = gw.publish_fields
+            else:
+                publish = cache
+            expected = published(publish_nested, data)
+            assert published(publish, data) == expected
+            us = measure(publish, [data], args.iterations)
+            baseline = baseline or us
+            print(f"{name:<10} {len(expected):>6} {method:<16} {us:>8.2f} {baseline / us:>7.2f}x")
+
+    # more device/shape combinations than the cache holds: every lookup misses once the LRU churns
+    print()
+    print(f"{'devices':>7} {'cache':>5} {'us/pkt':>8} {'hit rate':>8} {'evictions':>9}")
+    for devices in (args.cache_size // 2, args.cache_size * 2):
+        payloads = [dict(PAYLOADS['me201w'], device=f"node{n}") for n in range(devices)]
+        gw.topic_plans = gw.TopicPlanCache(args.cache_size)
+        us = measure(gw.publish_fields, payloads, args.iterations)
+        cache = gw.topic_plans.stats()
+        print(f"{devices:>7} {args.cache_size:>5} {us:>8.2f} {cache['hit_rate']:>8.3f} {cache['evictions']:>9}")
+
+
+if __name__ == '__main__':
+    main()
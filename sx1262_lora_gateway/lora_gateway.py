@@ -8,8 +8,13 @@ Supports any ESP32/Arduino LoRa transmitter with SX126x radios
 import os
 import sys
 import json
+import math
 import time
+import queue
 import logging
+import threading
+import importlib
+from collections import OrderedDict
 from datetime import datetime
 import paho.mqtt.client as mqtt
 
@@ -22,7 +27,7 @@ sys.path.append('/LoRaRF')
 os.environ.setdefault('RPI_LGPIO_REVISION', 'a020d3')
 
 # Import LoRaRF SX126x driver
-from LoRaRF import SX126x
+from LoRaRF import SX126x, SX127x, RadioProfile, SX126xEmulator, SpiProfiler, gpioBackend
 
 # Configuration from environment variables
 LORA_FREQ = float(os.getenv('LORA_FREQ', '915.0'))
@@ -36,6 +41,21 @@ LORA_SW_MSB = os.getenv('LORA_SW_MSB')
 LORA_SW_LSB = os.getenv('LORA_SW_LSB')
 LORA_SW_FORCE = os.getenv('LORA_SW_FORCE')  # e.g. '0x3424' to force 16-bit direct
 LORA_POWER = int(os.getenv('LORA_POWER', '20'))
+# Radio chip of the primary radio: 'sx126x' (SX1262 HAT) or 'sx127x' (SX1276/78, RFM95/96 with DIO0 on the IRQ pin)
+LORA_CHIP = os.getenv('LORA_CHIP', 'sx126x').lower()
+# How the driver waits on the BUSY pin: 'backoff' (spin then sleep), 'edge' or 'spin'
+LORA_BUSY_WAIT = os.getenv('LORA_BUSY_WAIT', 'backoff').lower()
+# Shadow known register values in the driver to skip redundant register reads/writes
+LORA_REGISTER_CACHE = os.getenv('LORA_REGISTER_CACHE', 'false').lower() == 'true'
+# Profile every SPI transaction per opcode (calls, bytes, BUSY wait, transfer time), published to gateway/spi_stats
+LORA_SPI_PROFILE = os.getenv('LORA_SPI_PROFILE', 'false').lower() == 'true'
+# GPIO backend shared by all radios: 'rpi' (RPi.GPIO / rpi-lgpio shim), 'lgpio' or 'gpiod' character device,
+# 'emulator' runs every radio on an SX126xEmulator for testing and load tests without hardware
+LORA_GPIO_BACKEND = os.getenv('LORA_GPIO_BACKEND', 'rpi').lower()
+# Packets per second each emulated radio receives with LORA_GPIO_BACKEND=emulator (no HAT needed)
+LORA_EMULATOR_RATE = float(os.getenv('LORA_EMULATOR_RATE', '1.0'))
+# Leave chip select to the SPI controller's CE line instead of toggling a GPIO around every transaction
+LORA_HARDWARE_CS = os.getenv('LORA_HARDWARE_CS', 'false').lower() == 'true'
 
 MQTT_HOST = os.getenv('MQTT_HOST', 'core-mosquitto')
 MQTT_PORT = int(os.getenv('MQTT_PORT', '1883'))
@@ -43,6 +63,49 @@ MQTT_USER = os.getenv('MQTT_USER', '')
 MQTT_PASS = os.getenv('MQTT_PASS', '')
 MQTT_PREFIX = os.getenv('MQTT_PREFIX', 'lora/gateway')
 
+# Receive pipeline: 'interrupt' waits on DIO1 edges, 'poll' checks the radio every 100 ms,
+# 'listen' duty-cycles RX and sleep on the primary radio with DIO1 edges
+RX_MODE = os.getenv('RX_MODE', 'interrupt').lower()
+RX_QUEUE_SIZE = int(os.getenv('RX_QUEUE_SIZE', '32'))
+# What a radio thread does when the publish queue is full: 'drop-oldest' discards the oldest queued packet,
+# 'block' waits up to RX_QUEUE_BLOCK_MS for the publish thread to make room, then drops the oldest one
+RX_QUEUE_POLICY = os.getenv('RX_QUEUE_POLICY', 'drop-oldest').lower()
+RX_QUEUE_BLOCK_MS = int(os.getenv('RX_QUEUE_BLOCK_MS', '50'))
+
+# Additional radios on other SPI chip selects, e.g.
+# "name=hat2,cs=1,reset=23,busy=24,irq=25,txen=-1,sf=9;name=..."
+LORA_EXTRA_RADIOS = os.getenv('LORA_EXTRA_RADIOS', '')
+
+# Channel scanning on the primary radio: comma-separated MHz list, CAD on each in turn
+LORA_SCAN_CHANNELS = os.getenv('LORA_SCAN_CHANNELS', '')
+LORA_SCAN_CAD_SYMBOLS = int(os.getenv('LORA_SCAN_CAD_SYMBOLS', '2'))
+
+# Radio health checks from each receive thread: device errors, chip mode and DIO1 silence, in seconds (0 disables)
+RADIO_HEALTH_INTERVAL = int(os.getenv('RADIO_HEALTH_INTERVAL', '30'))
+RADIO_IRQ_TIMEOUT = int(os.getenv('RADIO_IRQ_TIMEOUT', '0'))
+
+# Payload field naming the sending device for per-device airtime and topic plans (packets without it count as 'unknown')
+AIRTIME_DEVICE_KEY = os.getenv('AIRTIME_DEVICE_KEY', 'device')
+
+# Payload shapes (per device) whose flattened topic list is kept for the per-field fan-out, 0 rebuilds it every packet
+TOPIC_PLAN_CACHE_SIZE = int(os.getenv('TOPIC_PLAN_CACHE_SIZE', '64'))
+
+# How each packet fans out to MQTT: 'full' (signal quality, /data, every field, last_seen, airtime, latency),
+# 'json' (one enriched JSON document per device on <prefix>/devices/<device>) or 'selected' (FANOUT_FIELDS only)
+FANOUT_MODE = os.getenv('FANOUT_MODE', 'full').lower()
+# Field paths and per-packet topics (data, rssi, snr, last_seen, airtime_ms, rx_latency_ms) published in 'selected' mode
+FANOUT_FIELDS = os.getenv('FANOUT_FIELDS', '')
+
+# Change-only publishing of payload fields: a field topic is only republished when its value changes
+PUBLISH_CHANGES_ONLY = os.getenv('PUBLISH_CHANGES_ONLY', 'false').lower() == 'true'
+# Numeric deadbands per field path, e.g. "water/level=0.5,batt/voltage=0.02", '*' sets the default for all numbers
+PUBLISH_DEADBAND = os.getenv('PUBLISH_DEADBAND', '')
+# Seconds after which an unchanged field is published again anyway (0 never refreshes)
+PUBLISH_REFRESH_INTERVAL = int(os.getenv('PUBLISH_REFRESH_INTERVAL', '300'))
+
+# JSON library for packet payloads and published documents: 'auto' (orjson, then ujson, then json), 'orjson', 'ujson' or 'json'
+JSON_CODEC = os.getenv('JSON_CODEC', 'auto').lower()
+
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'info').upper()
 
 # Setup logging
@@ -52,15 +115,77 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class JsonCodec:
+    """loads()/dumps() on orjson or ujson when installed, the standard library json otherwise
+    
+    Documents the fast library rejects but json handles (orjson cannot encode integers beyond 64 bits) go through json instead.
+    dumps() returns bytes with orjson and str otherwise, either is a valid MQTT payload.
+    """
+    
+    libraries = ('orjson', 'ujson', 'json')
+    
+    def __init__(self, name='auto'):
+        self.fallbacks = 0
+        if name != 'auto' and name not in self.libraries:
+            logger.warning(f"Unknown JSON codec '{name}', picking the fastest installed")
+            name = 'auto'
+        for library in (self.libraries if name == 'auto' else (name,) + self.libraries):
+            try:
+                module = importlib.import_module(library)
+            except ImportError:
+                if library == name:
+                    logger.warning(f"JSON codec '{name}' is not installed, picking the fastest installed")
+                continue
+            self.name = library
+            self._loads = module.loads
+            self._dumps = module.dumps
+            return
+    
+    def loads(self, text):
+        try:
+            return self._loads(text)
+        except ValueError:
+            if self._loads is json.loads:
+                raise
+        # Raises json.JSONDecodeError when the text really is not JSON
+        data = json.loads(text)
+        self.fallbacks += 1
+        return data
+    
+    def dumps(self, obj):
+        try:
+            return self._dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            if self._dumps is json.dumps:
+                raise
+        data = json.dumps(obj)
+        self.fallbacks += 1
+        return data
+
+# JSON codec for packet payloads and every JSON document the gateway publishes
+codec = JsonCodec(JSON_CODEC)
+
 # MQTT client
 mqtt_client = None
+# GPIO backend opened by the first radio set up, shared by the others
+gpio_backend = None
 mqtt_connected = False
 
+# (receiver, packet) pairs drained by the radio threads, waiting to be published by the publish thread
+rx_queue = queue.Queue(maxsize=RX_QUEUE_SIZE)
+
 # Statistics
 stats = {
     'messages_received': 0,
+    'rx_queue_dropped': 0,
+    'rx_queue_blocked': 0,
+    'rx_queue_blocked_time': 0.0,
+    'rx_queue_block_timeouts': 0,
+    'rx_queue_high_water': 0,
     'messages_parsed': 0,
     'mqtt_published': 0,
+    'fanout_packets': 0,
+    'fanout_publishes': 0,
     'errors': 0,
     'start_time': datetime.now().isoformat()
 }
@@ -104,69 +229,409 @@ def publish_to_mqtt(topic, payload, retain=False):
         stats['errors'] += 1
         return False
 
-def parse_and_publish_data(payload):
-    """Parse JSON data and publish to MQTT topics"""
+def payload_shape(obj, leaves):
+    """Structure of a parsed JSON value as nested tuples, appending its leaf values to leaves in publish order
+    
+    A dict is (keys, child, ...), a list (length, child, ...) and a leaf None, so equal shapes flatten to the same topics.
+    """
+    kind = type(obj)
+    if kind is dict:
+        shape = [tuple(obj)]
+        items = obj.values()
+    elif kind is list:
+        shape = [len(obj)]
+        items = obj
+    else:
+        leaves.append(obj)
+        return None
+    for value in items:
+        kind = type(value)
+        if kind is dict or kind is list:
+            shape.append(payload_shape(value, leaves))
+        else:
+            leaves.append(value)
+            shape.append(None)
+    return tuple(shape)
+
+def topic_plan(shape):
+    """Topics of the leaves of a payload shape, in the order payload_shape() collects their values"""
+    topics = []
+    def walk(shape, path):
+        if shape is None:
+            # Leaf node
+            topics.append(f"{MQTT_PREFIX}/{path}")
+        elif type(shape[0]) is int:
+            for i, item in enumerate(shape[1:]):
+                walk(item, f"{path}/{i}")
+        else:
+            for key, value in zip(shape[0], shape[1:]):
+                walk(value, f"{path}/{key}" if path else key)
+    # A bare value at the top level has no field to publish
+    if shape is not None:
+        walk(shape, "")
+    return topics
+
+class TopicPlanCache:
+    """Flattened topic lists keyed by device and payload shape, least recently used evicted first (publish thread only)
+    
+    A plan is (leaf indices, topics); with an allowlist of field paths it only keeps those leaves, without one the indices are None.
+    """
+    
+    def __init__(self, size, fields=None):
+        self.size = size
+        self.fields = None if fields is None else frozenset(f"{MQTT_PREFIX}/{field}" for field in fields)
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def build(self, shape):
+        topics = topic_plan(shape)
+        if self.fields is None:
+            return None, topics
+        indices = [index for index, topic in enumerate(topics) if topic in self.fields]
+        return indices, [topics[index] for index in indices]
+    
+    def plan(self, device, shape):
+        key = (device, shape)
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self.plans.move_to_end(key)
+            return plan
+        self.misses += 1
+        plan = self.build(shape)
+        if self.size > 0:
+            self.plans[key] = plan
+            if len(self.plans) > self.size:
+                self.plans.popitem(last=False)
+                self.evictions += 1
+        return plan
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': self.size,
+            'entries': len(self.plans),
+            'fields': len(self.fields) if self.fields is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+topic_plans = TopicPlanCache(TOPIC_PLAN_CACHE_SIZE)
+
+def parse_deadbands(spec):
+    """Parse PUBLISH_DEADBAND ('path=threshold,...') into thresholds keyed by field topic, '*' stays the default"""
+    deadbands = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        path, _, value = item.partition('=')
+        path = path.strip().strip('/')
+        if not path or not value.strip():
+            raise ValueError(f"Expected 'path=threshold' in '{item.strip()}'")
+        deadbands[path if path == '*' else f"{MQTT_PREFIX}/{path}"] = abs(float(value))
+    return deadbands
+
+class DeltaFilter:
+    """Last published value per field topic: a field goes out when it changes beyond its deadband or its refresh is due (publish thread only)"""
+    
+    def __init__(self, deadbands=None, refresh=0):
+        self.deadbands = dict(deadbands or {})
+        self.default_deadband = self.deadbands.pop('*', 0.0)
+        self.refresh = refresh
+        # topic: (payload, value, monotonic time) as last published
+        self.last = {}
+        self.sent = 0
+        self.suppressed = 0
+        self.refreshed = 0
+    
+    def select(self, topics, values, now):
+        """(topic, payload) pairs of the fields to publish now, remembering them as the last published values"""
+        messages = []
+        for topic, value in zip(topics, values):
+            payload = str(value)
+            last = self.last.get(topic)
+            if last is not None:
+                last_payload, last_value, sent = last
+                if self.refresh and now - sent >= self.refresh:
+                    self.refreshed += 1
+                elif payload == last_payload:
+                    self.suppressed += 1
+                    continue
+                else:
+                    # Numbers (not bools) within the deadband of the last published value are held back
+                    deadband = self.deadbands.get(topic, self.default_deadband)
+                    kind, last_kind = type(value), type(last_value)
+                    if (deadband and (kind is int or kind is float) and (last_kind is int or last_kind is float)
+                            and abs(value - last_value) < deadband):
+                        self.suppressed += 1
+                        continue
+            self.last[topic] = (payload, value, now)
+            messages.append((topic, payload))
+        self.sent += len(messages)
+        return messages
+    
+    def stats(self):
+        fields = self.sent + self.suppressed
+        return {
+            'enabled': True,
+            'sent': self.sent,
+            'suppressed': self.suppressed,
+            'refreshed': self.refreshed,
+            'suppressed_ratio': round(self.suppressed / fields, 4) if fields else 0.0,
+            'topics': len(self.last),
+            'refresh_interval': self.refresh,
+            'deadbands': len(self.deadbands) + (1 if self.default_deadband else 0)
+        }
+
+# Set up by main() when PUBLISH_CHANGES_ONLY is on
+delta_filter = None
+
+def publish_fields(data):
+    """Publish every (allowlisted) leaf of a parsed payload to its own topic, with the topic list reused for payloads of the same shape; returns the publish count"""
+    leaves = []
+    shape = payload_shape(data, leaves)
+    indices, topics = topic_plans.plan(packet_device(data), shape)
+    if indices is not None:
+        # Allowlisted fields only
+        leaves = [leaves[index] for index in indices]
+    if delta_filter is not None:
+        return publish_many(delta_filter.select(topics, leaves, time.monotonic()))
+    return publish_many(zip(topics, map(str, leaves)))
+
+def publish_many(messages):
+    """Publish (topic, payload) pairs, checking the connection once for the batch; returns how many were published"""
+    global stats
+    if not mqtt_connected:
+        logger.warning("MQTT not connected, skipping publish")
+        return 0
+    published = 0
+    for topic, payload in messages:
+        try:
+            result = mqtt_client.publish(topic, payload)
+            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                published += 1
+            else:
+                logger.error(f"MQTT publish failed with code {result.rc}")
+        except Exception as e:
+            logger.error(f"Error publishing to MQTT: {e}")
+            stats['errors'] += 1
+    stats['mqtt_published'] += published
+    return published
+
+def parse_payload(payload):
+    """Parse a JSON payload; returns the data or None when it is not valid JSON"""
     try:
-        data = json.loads(payload)
-        stats['messages_parsed'] += 1
-        
+        data = codec.loads(payload)
+    except ValueError as e:
+        logger.error(f"JSON decode error: {e}")
+        logger.error(f"Raw payload: {payload}")
+        stats['errors'] += 1
+        return None
+    stats['messages_parsed'] += 1
+    # Pretty-printing is only worth it when it gets logged
+    if logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"Parsed data: {json.dumps(data, indent=2)}")
-        
+    return data
+
+def parse_and_publish_data(payload, rx_time=None):
+    """Parse JSON data and publish to MQTT topics, last_seen is the packet's RX time when given; returns the parsed data (or None) and the publish count"""
+    data = parse_payload(payload)
+    if data is None:
+        return None, 0
+    try:
         # Publish complete JSON payload to /data topic
-        publish_to_mqtt(f"{MQTT_PREFIX}/data", payload)
+        published = publish_to_mqtt(f"{MQTT_PREFIX}/data", payload)
         
-        # Recursively publish all nested JSON fields as individual topics
+        # Publish all nested JSON fields as individual topics
         # This allows Home Assistant to easily create sensors for any field
-        def publish_nested(obj, path=""):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    new_path = f"{path}/{key}" if path else key
-                    if isinstance(value, (dict, list)):
-                        publish_nested(value, new_path)
-                    else:
-                        # Leaf node - publish individual value
-                        publish_to_mqtt(f"{MQTT_PREFIX}/{new_path}", str(value))
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    new_path = f"{path}/{i}"
-                    if isinstance(item, (dict, list)):
-                        publish_nested(item, new_path)
-                    else:
-                        publish_to_mqtt(f"{MQTT_PREFIX}/{new_path}", str(item))
-        
-        publish_nested(data)
+        published += publish_fields(data)
         
         # Publish timestamp
-        publish_to_mqtt(f"{MQTT_PREFIX}/last_seen", datetime.now().isoformat())
+        published += publish_to_mqtt(f"{MQTT_PREFIX}/last_seen", (rx_time or datetime.now()).isoformat())
         
         # Log a summary (show first few keys)
         summary_keys = list(data.keys())[:5]
         logger.info(f"Published data with keys: {summary_keys}")
         
-        return True
+        return data, published
         
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
-        logger.error(f"Raw payload: {payload}")
-        stats['errors'] += 1
-        return False
     except Exception as e:
         logger.error(f"Error parsing data: {e}")
         stats['errors'] += 1
-        return False
+        return data, 0
+
+def packet_device(data):
+    """Sending device named by the AIRTIME_DEVICE_KEY payload field, None when the payload has none"""
+    device = data.get(AIRTIME_DEVICE_KEY) if isinstance(data, dict) else None
+    return None if device is None else str(device)
+
+def account_packet(receiver, packet, data):
+    """Airtime of the packet from the radio's profile and its payload length in seconds, None without a profile"""
+    if receiver.profile is None:
+        return None
+    return receiver.account_airtime(len(packet.payload), packet_device(data), packet.timestamp)
+
+def packet_latency(receiver, packet):
+    """RX done to now in milliseconds, recorded for the radio's latency stats"""
+    latency_ms = (time.monotonic() - packet.timestamp) * 1000
+    receiver.latencies.append(latency_ms)
+    return latency_ms
+
+def fanout_full(receiver, packet, payload):
+    """Signal quality, the whole document on /data, every field, last_seen, airtime and latency each on their own topic"""
+    # Publish signal quality (extra radios under their own sub-topic)
+    published = publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/rssi", str(packet.rssi))
+    published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/snr", str(packet.snr))
+    
+    # Parse and publish data, stamped with the RX done (DIO1 edge) time rather than the time it got here
+    data = None
+    if payload:
+        data, count = parse_and_publish_data(payload, datetime.fromtimestamp(packet.wallTime()))
+        published += count
+    
+    airtime = account_packet(receiver, packet, data)
+    if airtime is not None:
+        published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/airtime_ms", f"{airtime * 1000:.1f}")
+    
+    # RX done to the end of the MQTT fan-out
+    latency_ms = packet_latency(receiver, packet)
+    published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/rx_latency_ms", f"{latency_ms:.2f}")
+    return published
+
+def fanout_json(receiver, packet, payload):
+    """One JSON document per packet on the sending device's topic: the payload fields plus a 'lora' section with signal quality and timing"""
+    data = parse_payload(payload) if payload else None
+    airtime = account_packet(receiver, packet, data)
+    if isinstance(data, dict):
+        document = dict(data)
+    elif data is not None:
+        document = {'value': data}
+    else:
+        document = {'raw': payload}
+    device = packet_device(data) or 'unknown'
+    document['lora'] = {
+        'radio': receiver.radio_name,
+        'rssi': packet.rssi,
+        'snr': packet.snr,
+        'last_seen': datetime.fromtimestamp(packet.wallTime()).isoformat(),
+        'airtime_ms': round(airtime * 1000, 1) if airtime is not None else None,
+        # RX done to the document being handed to MQTT
+        'rx_latency_ms': round(packet_latency(receiver, packet), 2)
+    }
+    topic_device = device.translate(TOPIC_UNSAFE) or 'unknown'
+    return int(publish_to_mqtt(f"{MQTT_PREFIX}/devices/{topic_device}", codec.dumps(document)))
+
+def fanout_selected(receiver, packet, payload):
+    """Only the allowlisted fields (FANOUT_FIELDS) and per-packet topics; the field selection is part of each topic plan"""
+    published = 0
+    extras = fanout_extras
+    if 'rssi' in extras:
+        published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/rssi", str(packet.rssi))
+    if 'snr' in extras:
+        published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/snr", str(packet.snr))
+    data = parse_payload(payload) if payload else None
+    if data is not None:
+        if 'data' in extras:
+            published += publish_to_mqtt(f"{MQTT_PREFIX}/data", payload)
+        published += publish_fields(data)
+        if 'last_seen' in extras:
+            published += publish_to_mqtt(f"{MQTT_PREFIX}/last_seen", datetime.fromtimestamp(packet.wallTime()).isoformat())
+    airtime = account_packet(receiver, packet, data)
+    if airtime is not None and 'airtime_ms' in extras:
+        published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/airtime_ms", f"{airtime * 1000:.1f}")
+    latency_ms = packet_latency(receiver, packet)
+    if 'rx_latency_ms' in extras:
+        published += publish_to_mqtt(f"{MQTT_PREFIX}{receiver.topic_prefix}/rx_latency_ms", f"{latency_ms:.2f}")
+    return published
 
-def on_lora_receive(lora):
-    """Check for received LoRa messages"""
+FANOUT_MODES = {'full': fanout_full, 'json': fanout_json, 'selected': fanout_selected}
+# Per-packet topics fanout_selected can publish besides payload fields
+FANOUT_EXTRAS = ('data', 'rssi', 'snr', 'last_seen', 'airtime_ms', 'rx_latency_ms')
+# MQTT wildcards and level separators in device names used as a topic level
+TOPIC_UNSAFE = str.maketrans({'/': '_', '+': '_', '#': '_'})
+
+# Chosen by setup_fanout() at startup
+fanout_mode = 'full'
+fanout = fanout_full
+fanout_extras = frozenset()
+
+def setup_fanout(mode=None, fields=None):
+    """Bind the fan-out function for FANOUT_MODE and, for 'selected', compile the allowlist into the topic plans"""
+    global fanout_mode, fanout, fanout_extras, topic_plans
+    mode = (mode or FANOUT_MODE).lower()
+    if mode not in FANOUT_MODES:
+        raise ValueError(f"Unknown fan-out mode '{mode}', expected one of {', '.join(FANOUT_MODES)}")
+    fields = [field.strip().strip('/') for field in (FANOUT_FIELDS if fields is None else fields).split(',') if field.strip()]
+    if mode == 'selected':
+        if not fields:
+            raise ValueError("fanout_mode 'selected' needs fanout_fields")
+        fanout_extras = frozenset(field for field in fields if field in FANOUT_EXTRAS)
+        topic_plans = TopicPlanCache(TOPIC_PLAN_CACHE_SIZE, [field for field in fields if field not in FANOUT_EXTRAS])
+    else:
+        fanout_extras = frozenset()
+        topic_plans = TopicPlanCache(TOPIC_PLAN_CACHE_SIZE)
+    fanout_mode = mode
+    fanout = FANOUT_MODES[mode]
+    return mode
+
+def handle_lora_packet(receiver, packet):
+    """Publish a received packet (RxPacket snapshot) and its signal quality to MQTT with the configured fan-out"""
+    payload = packet.payload.decode('utf-8', errors='ignore')
+    logger.info(f"✅ LoRa RX [{receiver.radio_name}]: {len(payload)} bytes, RSSI={packet.rssi}dBm, SNR={packet.snr}dB")
+    logger.debug("Raw payload: %s", payload)
+    stats['fanout_publishes'] += fanout(receiver, packet, payload.strip())
+    stats['fanout_packets'] += 1
+
+def queue_lora_packet(receiver, packet):
+    """Hand a drained packet to the publish stage, applying RX_QUEUE_POLICY when the queue is full"""
+    stats['messages_received'] += 1
+    receiver.received += 1
+    item = (receiver, packet)
+    block = RX_QUEUE_POLICY == 'block'
+    while True:
+        try:
+            rx_queue.put_nowait(item)
+            break
+        except queue.Full:
+            pass
+        if block:
+            # This can be the GPIO callback thread serving every radio's DIO1, inside on_dio1() holding radio_lock:
+            # wait a bounded time for the publish thread, a stalled broker then costs packets instead of radios
+            block = False
+            start = time.monotonic()
+            try:
+                rx_queue.put(item, timeout=RX_QUEUE_BLOCK_MS / 1000)
+                break
+            except queue.Full:
+                stats['rx_queue_block_timeouts'] += 1
+            finally:
+                stats['rx_queue_blocked'] += 1
+                stats['rx_queue_blocked_time'] += time.monotonic() - start
+        try:
+            dropped, _ = rx_queue.get_nowait()
+        except queue.Empty:
+            continue
+        stats['rx_queue_dropped'] += 1
+        logger.warning(f"RX queue full ({RX_QUEUE_SIZE}), dropping oldest packet from {dropped.radio_name}")
+    stats['rx_queue_high_water'] = max(stats['rx_queue_high_water'], rx_queue.qsize())
+
+def on_lora_receive(receiver):
+    """Check for received LoRa messages (polling mode)"""
     global stats
+    lora = receiver.lora
     
     try:
         # Check IRQ status for any activity
         try:
             irq_status = lora.getIrqStatus()
             
-            # Log any IRQ activity (for debugging)
-            if irq_status != 0:
-                logger.debug(f"IRQ Status: 0x{irq_status:04X}")
+            # Log any IRQ activity (for debugging, SX126x IRQ flags)
+            if irq_status != 0 and isinstance(lora, SX126x):
+                logger.debug("IRQ Status: 0x%04X", irq_status)
                 
                 # Check for specific IRQs
                 if irq_status & lora.IRQ_PREAMBLE_DETECTED:
@@ -188,35 +653,7 @@ def on_lora_receive(lora):
             status = lora.status()
             
             if status == lora.STATUS_RX_DONE:
-                stats['messages_received'] += 1
-                
-                # Read payload
-                message = []
-                while lora.available() > 0:
-                    message.append(lora.read())
-                
-                # Convert to string
-                payload = bytes(message).decode('utf-8', errors='ignore')
-                
-                # Get RSSI and SNR (driver exposes packetRssi() and snr())
-                rssi = lora.packetRssi()
-                try:
-                    snr = lora.snr()
-                except AttributeError:
-                    # Older naming fallback
-                    snr = 0.0
-                    logger.warning("SNR method unavailable; defaulting to 0.0")
-                
-                logger.info(f"✅ LoRa RX: {len(payload)} bytes, RSSI={rssi}dBm, SNR={snr}dB")
-                logger.debug(f"Raw payload: {payload}")
-                
-                # Publish signal quality
-                publish_to_mqtt(f"{MQTT_PREFIX}/rssi", str(rssi))
-                publish_to_mqtt(f"{MQTT_PREFIX}/snr", str(snr))
-                
-                # Parse and publish data
-                if payload.strip():
-                    parse_and_publish_data(payload.strip())
+                queue_lora_packet(receiver, lora.receivePacket())
         except Exception as e:
             logger.error(f"Error checking status: {e}")
                 
@@ -226,6 +663,568 @@ def on_lora_receive(lora):
         traceback.print_exc()
         stats['errors'] += 1
 
+def on_lora_interrupt(receiver):
+    """Drain the packet signalled by a DIO1 edge (interrupt mode: from the DIO1 callback in continuous RX, the listen thread in listen mode)"""
+    global stats
+    lora = receiver.lora
+    
+    try:
+        status = lora.status()
+        if status == lora.STATUS_HEADER_ERR:
+            logger.warning(f"⚠️  Header error! [{receiver.radio_name}]")
+            return
+        if status == lora.STATUS_CRC_ERR:
+            logger.warning(f"⚠️  CRC error! [{receiver.radio_name}]")
+            return
+        if status != lora.STATUS_RX_DONE:
+            return
+        
+        # Drain the radio buffer before the next DIO1 edge is handled so the next packet cannot overwrite it
+        queue_lora_packet(receiver, lora.receivePacket())
+    except Exception as e:
+        logger.error(f"Error in LoRa interrupt handler: {e}")
+        stats['errors'] += 1
+
+class AirtimeMeter:
+    """Airtime of received packets: totals and exponentially decayed rolling utilization, constant memory"""
+    
+    # Time constants of the rolling utilization in seconds
+    windows = {'1m': 60, '15m': 900}
+    
+    def __init__(self):
+        self.packets = 0
+        self.airtime = 0.0
+        self.max_airtime = 0.0
+        # Airtime decayed with exp(-age / window), divided by the window it is the utilization over that window
+        self.decayed = dict.fromkeys(self.windows, 0.0)
+        self.updated = time.monotonic()
+    
+    def decay(self, now):
+        elapsed = now - self.updated
+        if elapsed <= 0:
+            return
+        for name, window in self.windows.items():
+            self.decayed[name] *= math.exp(-elapsed / window)
+        self.updated = now
+    
+    def add(self, airtime, now):
+        self.decay(now)
+        self.packets += 1
+        self.airtime += airtime
+        self.max_airtime = max(self.max_airtime, airtime)
+        for name in self.decayed:
+            self.decayed[name] += airtime
+    
+    def utilization(self, now):
+        """Share of time on air per rolling window"""
+        self.decay(now)
+        return {name: self.decayed[name] / window for name, window in self.windows.items()}
+    
+    def stats(self, now):
+        result = {
+            'packets': self.packets,
+            'airtime_s': round(self.airtime, 3),
+            'avg_airtime_ms': round(self.airtime / self.packets * 1000, 2) if self.packets else 0.0,
+            'max_airtime_ms': round(self.max_airtime * 1000, 2)
+        }
+        for name, value in self.utilization(now).items():
+            result[f"utilization_{name}"] = round(value, 5)
+        return result
+
+class RadioReceiver(threading.Thread):
+    """Receive thread for one radio, feeding the shared rx_queue"""
+    
+    # Seconds without a DIO1 edge or packet before the radio counts as wedged (0 disables)
+    irq_timeout = RADIO_IRQ_TIMEOUT
+    # Devices with their own airtime meter, later ones are counted as 'other'
+    max_airtime_devices = 64
+    
+    def __init__(self, radio_name, lora, interrupt_mode, topic_prefix='', profile=None):
+        super().__init__(name=f"rx-{radio_name}", daemon=True)
+        self.radio_name = radio_name
+        self.lora = lora
+        self.interrupt_mode = interrupt_mode and lora._irq != -1
+        self.topic_prefix = topic_prefix
+        # Profile re-applied after an in-process recovery, health checks are off without one
+        self.profile = profile
+        self.received = 0
+        self.running = True
+        self.dio1 = threading.Event()
+        # Held while a packet is drained and during health checks and recovery, which run on different threads
+        self.radio_lock = threading.Lock()
+        # Last hardware counter sample: (monotonic time, chip counters, received)
+        self.counter_sample = None
+        # RX-to-publish latencies in ms since the last stats publish (publish thread)
+        self.latencies = []
+        self.last_irq = time.monotonic()
+        self.next_health_check = self.last_irq + RADIO_HEALTH_INTERVAL
+        self.recoveries = 0
+        self.recovery_failures = 0
+        self.recovery_time = 0.0
+        self.recovery_max = 0.0
+        self.last_recovery = None
+        # SPI transactions spent draining packets, counted when the radio has an SPI profiler
+        self.spi_packets = 0
+        self.spi_packet_transactions = 0
+        self.spi_mark = 0
+        # Airtime of the packets heard on this radio's channel, overall and per sending device (publish thread)
+        self.airtime = AirtimeMeter()
+        self.device_airtime = {}
+        if self.interrupt_mode:
+            lora.onReceive(self.on_dio1)
+    
+    def on_dio1(self):
+        """DIO1 callback on the radio's GPIO callback thread, right after the driver read the IRQ status and RX buffer
+        
+        In continuous RX the next packet can land while this one is still in the buffer, so it is drained here before
+        the next edge is handled; this thread only hands the RxPacket to the publish queue.
+        """
+        self.last_irq = time.monotonic()
+        with self.radio_lock:
+            self.drain(on_lora_interrupt)
+    
+    def run(self):
+        while self.running:
+            if self.interrupt_mode:
+                # Packets are drained by on_dio1(), this thread only runs the health checks
+                self.dio1.wait(timeout=1.0)
+            else:
+                received = self.received
+                self.drain(on_lora_receive)
+                if self.received != received:
+                    self.last_irq = time.monotonic()
+                # Small delay to prevent CPU hogging
+                time.sleep(0.1)
+            self.check_health()
+    
+    def stop(self):
+        self.running = False
+        self.dio1.set()
+    
+    def drain(self, handler):
+        """Run a receive handler, counting the SPI transactions of the packets it drains"""
+        profiler = self.lora._profiler
+        if profiler is None:
+            handler(self)
+            return
+        received = self.received
+        handler(self)
+        # Since the previous drain, so the IRQ reads the driver's DIO1 handler did before waking this thread count too
+        transactions = profiler.transactions
+        if self.received != received:
+            self.spi_packets += self.received - received
+            self.spi_packet_transactions += transactions - self.spi_mark
+        self.spi_mark = transactions
+    
+    def spi_stats(self):
+        """SPI profile of this radio with the transactions each drained packet cost"""
+        result = self.lora._profiler.stats()
+        result['packets'] = self.spi_packets
+        result['transactions_per_packet'] = round(self.spi_packet_transactions / self.spi_packets, 2) if self.spi_packets else 0.0
+        return result
+    
+    def health_problem(self):
+        """Reason the radio needs recovery, None when it looks healthy"""
+        lora = self.lora
+        errors = lora.getDeviceErrors()
+        if errors:
+            return f"device errors 0x{errors:04X}"
+        mode = lora.getMode()
+        if mode != lora.STATUS_MODE_RX:
+            return f"radio left RX (mode 0x{mode:02X})"
+        return self.irq_silence()
+    
+    def irq_silence(self):
+        """Reason when DIO1 has been quiet for longer than irq_timeout"""
+        silence = time.monotonic() - self.last_irq
+        if self.irq_timeout and silence > self.irq_timeout:
+            return f"no IRQ for {silence:.0f} s"
+        return None
+    
+    def resume(self):
+        """Put the radio back into this receiver's receive mode after a recovery"""
+        self.lora.request(self.lora.RX_CONTINUOUS)
+    
+    def check_health(self):
+        """Run the periodic health check from the receive thread and recover the radio in place if needed"""
+        now = time.monotonic()
+        if not RADIO_HEALTH_INTERVAL or self.profile is None or not self.running or now < self.next_health_check:
+            return
+        self.next_health_check = now + RADIO_HEALTH_INTERVAL
+        with self.radio_lock:
+            try:
+                reason = self.health_problem()
+            except Exception as e:
+                reason = f"radio not responding ({e})"
+        if reason is not None:
+            self.recover(reason)
+    
+    def recover(self, reason):
+        """Reset and reconfigure the radio without restarting the gateway, returns True when it is receiving again"""
+        logger.warning(f"🔧 Radio {self.radio_name} unhealthy: {reason}, recovering...")
+        lora = self.lora
+        start = time.monotonic()
+        try:
+            with self.radio_lock:
+                if not lora.restart():
+                    raise Exception("radio did not come back after reset")
+                configure_radio(lora, self.profile)
+                lora.clearDeviceErrors()
+            # Outside radio_lock: re-arming DIO1 can join the GPIO callback thread, which takes radio_lock in on_dio1()
+            self.resume()
+        except Exception as e:
+            self.recovery_failures += 1
+            stats['errors'] += 1
+            logger.error(f"Radio {self.radio_name} recovery failed: {e}")
+            return False
+        elapsed = time.monotonic() - start
+        self.recoveries += 1
+        self.recovery_time += elapsed
+        self.recovery_max = max(self.recovery_max, elapsed)
+        self.last_irq = time.monotonic()
+        self.last_recovery = {'time': datetime.now().isoformat(), 'reason': reason, 'ms': round(elapsed * 1000, 3)}
+        logger.info(f"✅ Radio {self.radio_name} recovered in {elapsed * 1000:.1f} ms")
+        return True
+    
+    def account_airtime(self, length, device, rx_time):
+        """Add a received packet's time on air to the channel and device meters, returns the airtime in seconds"""
+        airtime = self.profile.timeOnAir(length)
+        self.airtime.add(airtime, rx_time)
+        device = 'unknown' if device is None else str(device)
+        if device not in self.device_airtime and len(self.device_airtime) >= self.max_airtime_devices:
+            device = 'other'
+        self.device_airtime.setdefault(device, AirtimeMeter()).add(airtime, rx_time)
+        return airtime
+    
+    def airtime_stats(self):
+        """Channel utilization and per-device airtime, with the pure ALOHA collision estimate for the last minute"""
+        now = time.monotonic()
+        result = self.airtime.stats(now)
+        # Chance that a packet overlaps another with offered load G: 1 - exp(-2G)
+        result['collision_probability_1m'] = round(1 - math.exp(-2 * result['utilization_1m']), 4)
+        result['devices'] = {device: meter.stats(now) for device, meter in self.device_airtime.items()}
+        return result
+    
+    def latency_stats(self):
+        """RX-to-publish latency since the previous call, where the RX time comes from"""
+        # Swap the list in one step: the publish thread keeps appending to the new one while this one is sorted
+        latencies, self.latencies = self.latencies, []
+        latencies.sort()
+        result = {
+            'count': len(latencies),
+            # kernel DIO1 edge timestamps from lgpio/gpiod, DIO1 handler entry with RPi.GPIO
+            'timestamp_source': 'kernel' if self.lora._edgeTime is not None else 'handler'
+        }
+        if latencies:
+            result.update({
+                'avg_ms': round(sum(latencies) / len(latencies), 3),
+                'p50_ms': round(latencies[len(latencies) // 2], 3),
+                'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                'max_ms': round(latencies[-1], 3)
+            })
+        return result
+    
+    def health_stats(self):
+        """Recovery counts and times"""
+        return {
+            'recoveries': self.recoveries,
+            'failures': self.recovery_failures,
+            'avg_recovery_ms': round(self.recovery_time / self.recoveries * 1000, 3) if self.recoveries else 0.0,
+            'max_recovery_ms': round(self.recovery_max * 1000, 3),
+            'last_recovery': self.last_recovery,
+            'seconds_since_irq': round(time.monotonic() - self.last_irq, 1)
+        }
+    
+    def sample_counters(self):
+        """Sample the chip's RX counters: totals, deltas and rates since the previous sample"""
+        now = time.monotonic()
+        counters = self.lora.getStats()
+        previous = self.counter_sample
+        self.counter_sample = (now, counters, self.received)
+        names = ('packets_received', 'crc_errors', 'header_errors')
+        sample = dict(zip(names, counters))
+        if previous is None:
+            return sample
+        
+        then, last, received = previous
+        elapsed = now - then
+        # 16-bit counters restart from zero when the chip is reset
+        deltas = [value - prev if value >= prev else value for value, prev in zip(counters, last)]
+        drained = self.received - received
+        sample['interval_seconds'] = round(elapsed, 1)
+        sample['delta'] = dict(zip(names, deltas), drained=drained)
+        sample['per_minute'] = {name: round(delta * 60 / elapsed, 2) for name, delta in sample['delta'].items()}
+        # Good packets the radio completed that the receive thread never drained (pipeline loss)
+        sample['pipeline_missed'] = max(0, deltas[0] - deltas[1] - deltas[2] - drained)
+        return sample
+
+class ListenReceiver(RadioReceiver):
+    """Duty-cycled receive thread: RX/sleep periods from the preamble length, listen() re-armed after every reception"""
+    
+    # SX1262 current draw in mA (datasheet, DC-DC regulator): RX at 125 kHz and warm-start sleep
+    RX_CURRENT_MA = 4.6
+    SLEEP_CURRENT_MA = 0.0012
+    # Preamble symbols the radio needs inside one RX window, and wake-up time from sleep in seconds
+    DETECT_SYMBOLS = 2
+    WAKEUP_TIME = 0.001
+    
+    def __init__(self, radio_name, lora, profile, periods, topic_prefix=''):
+        super().__init__(radio_name, lora, True, topic_prefix, profile)
+        self.rx_period, self.sleep_period = periods
+        self.duty = self.rx_period / (self.rx_period + self.sleep_period)
+        # Radio stays in RX for 2 * rxPeriod + sleepPeriod after a preamble that leads nowhere
+        self.extension = 2 * self.rx_period + self.sleep_period
+        self.armed_at = None
+        self.on_time = 0.0
+        self.total_time = 0.0
+        self.rearms = 0
+        self.rx_timeouts = 0
+        self.rx_errors = 0
+    
+    @classmethod
+    def periods(cls, profile):
+        """RX and sleep periods in seconds for a profile, None when its preamble is too short"""
+        return profile.listenPeriods(cls.DETECT_SYMBOLS, cls.WAKEUP_TIME)
+    
+    def sample_counters(self):
+        """Chip counters are not sampled: the SPI read would wake the radio from its sleep period"""
+        return None
+    
+    def on_dio1(self):
+        """Wake the receive thread: the radio leaves RX after each reception until arm(), so nothing can overwrite the buffer"""
+        self.dio1.set()
+    
+    def arm(self):
+        """Put the radio back into duty-cycled listen"""
+        self.lora.listen(self.rx_period * 1000, self.sleep_period * 1000)
+        self.armed_at = time.monotonic()
+        self.rearms += 1
+    
+    def health_problem(self):
+        """Only DIO1 silence is checked: any SPI command would wake the radio from its sleep period"""
+        return self.irq_silence()
+    
+    def resume(self):
+        self.armed_at = None
+        self.arm()
+    
+    def account(self, rx_time):
+        """Add the time since the last arm: duty-cycled, except rx_time of full RX at the end"""
+        elapsed = time.monotonic() - self.armed_at
+        rx_time = min(rx_time, elapsed)
+        self.on_time += (elapsed - rx_time) * self.duty + rx_time
+        self.total_time += elapsed
+    
+    def run(self):
+        lora = self.lora
+        lora.standby()
+        self.arm()
+        while self.running:
+            if not self.dio1.wait(timeout=1.0):
+                self.check_health()
+                continue
+            self.dio1.clear()
+            self.last_irq = time.monotonic()
+            status = lora.status()
+            if status == lora.STATUS_RX_DONE:
+                self.account(self.profile.timeOnAir(lora.available()))
+            else:
+                self.account(self.extension)
+                if status == lora.STATUS_RX_TIMEOUT:
+                    self.rx_timeouts += 1
+                elif status in (lora.STATUS_HEADER_ERR, lora.STATUS_CRC_ERR):
+                    self.rx_errors += 1
+            self.drain(on_lora_interrupt)
+            self.arm()
+            self.check_health()
+    
+    def listen_stats(self):
+        """Estimated radio-on time and current draw in listen mode"""
+        on_time = self.on_time
+        total_time = self.total_time
+        if self.armed_at is not None:
+            # Current listen period, no reception yet
+            elapsed = time.monotonic() - self.armed_at
+            on_time += elapsed * self.duty
+            total_time += elapsed
+        on_ratio = on_time / total_time if total_time else self.duty
+        current_ma = on_ratio * self.RX_CURRENT_MA + (1 - on_ratio) * self.SLEEP_CURRENT_MA
+        return {
+            'rx_period_ms': round(self.rx_period * 1000, 3),
+            'sleep_period_ms': round(self.sleep_period * 1000, 3),
+            'duty_cycle': round(self.duty, 4),
+            'radio_on_seconds': round(on_time, 1),
+            'radio_on_ratio': round(on_ratio, 4),
+            'estimated_current_ma': round(current_ma, 4),
+            'continuous_current_ma': self.RX_CURRENT_MA,
+            'rearms': self.rearms,
+            'rx_timeouts': self.rx_timeouts,
+            'rx_errors': self.rx_errors
+        }
+
+class ChannelScanner(RadioReceiver):
+    """Scanning receive thread: CAD on each channel in turn, RX on the channel where activity is detected"""
+    
+    CAD_SYMBOLS = {1: SX126x.CAD_ON_1_SYMB, 2: SX126x.CAD_ON_2_SYMB, 4: SX126x.CAD_ON_4_SYMB, 8: SX126x.CAD_ON_8_SYMB, 16: SX126x.CAD_ON_16_SYMB}
+    
+    # Every CAD ends with a DIO1 edge, so a few seconds of silence means the radio stopped answering
+    irq_timeout = 5
+    
+    def __init__(self, radio_name, lora, profile, channels, cad_symbols=2, topic_prefix=''):
+        super().__init__(radio_name, lora, True, topic_prefix, profile)
+        self.cad_symbols = cad_symbols
+        self.channels = {
+            frequency: {'scans': 0, 'hits': 0, 'misses': 0, 'packets': 0, 'false_detections': 0, 'rx_errors': 0,
+                        'cad_timeouts': 0, 'cad_time': 0.0, 'switch_time': 0.0, 'dwell_time': 0.0}
+            for frequency in channels
+        }
+        self.cycles = 0
+        self.cycle_time = 0.0
+        # RX timeout after activity is detected only has to cover the rest of the preamble and the header
+        self.rx_timeout_ms = int((profile.preambleTime() + 8 * profile.symbolTime()) * 1000) + 1
+        self.cad_wait = cad_symbols * profile.symbolTime() * 2 + 0.01
+        self.rx_wait = self.rx_timeout_ms / 1000 + profile.timeOnAir(255) + 0.05
+        lora.onCad(self.dio1.set)
+    
+    def on_dio1(self):
+        """Wake the scan thread: after a CAD hit the radio makes a single reception and waits for the next scan"""
+        self.dio1.set()
+    
+    def wait_status(self, timeout):
+        """Wait for the next DIO1 edge, returns the driver status or None on timeout"""
+        if not self.dio1.wait(timeout):
+            return None
+        self.dio1.clear()
+        self.last_irq = time.monotonic()
+        return self.lora.status()
+    
+    def health_problem(self):
+        """Device errors and DIO1 silence: the chip mode changes with every CAD"""
+        errors = self.lora.getDeviceErrors()
+        if errors:
+            return f"device errors 0x{errors:04X}"
+        return self.irq_silence()
+    
+    def resume(self):
+        self.lora.standby()
+    
+    def scan_channel(self, frequency, channel):
+        """Run CAD on one channel and receive the packet if there is activity"""
+        lora = self.lora
+        start = time.monotonic()
+        lora.retune(frequency)
+        self.dio1.clear()
+        lora.requestCad(self.CAD_SYMBOLS[self.cad_symbols], lora.CAD_EXIT_RX, self.rx_timeout_ms)
+        cad_start = time.monotonic()
+        channel['scans'] += 1
+        channel['switch_time'] += cad_start - start
+        try:
+            status = self.wait_status(self.cad_wait)
+            channel['cad_time'] += time.monotonic() - cad_start
+            if status is None:
+                # CAD done edge lost, put the radio back in standby before the next channel
+                channel['cad_timeouts'] += 1
+                lora.standby()
+                return
+            if status != lora.STATUS_CAD_DETECTED:
+                channel['misses'] += 1
+                return
+            
+            # Radio moved to RX on its own, stay on this channel until the packet is in or RX times out
+            channel['hits'] += 1
+            status = self.wait_status(self.rx_wait)
+            if status == lora.STATUS_RX_DONE:
+                channel['packets'] += 1
+                queue_lora_packet(self, lora.receivePacket())
+                return
+            if status in (lora.STATUS_HEADER_ERR, lora.STATUS_CRC_ERR):
+                channel['rx_errors'] += 1
+            else:
+                channel['false_detections'] += 1
+            lora.standby()
+        finally:
+            channel['dwell_time'] += time.monotonic() - cad_start
+    
+    def run(self):
+        self.lora.standby()
+        while self.running:
+            cycle_start = time.monotonic()
+            for frequency, channel in self.channels.items():
+                if not self.running:
+                    return
+                try:
+                    self.scan_channel(frequency, channel)
+                except Exception as e:
+                    logger.error(f"Error scanning {frequency / 1e6:.3f} MHz [{self.radio_name}]: {e}")
+                    stats['errors'] += 1
+                    time.sleep(0.1)
+            self.cycles += 1
+            self.cycle_time += time.monotonic() - cycle_start
+            self.check_health()
+    
+    def scan_stats(self):
+        """Per-channel CAD hit/miss rates, dwell and switch times"""
+        channels = {}
+        sweep = 0.0
+        for frequency, channel in self.channels.items():
+            scans = channel['scans']
+            if scans:
+                sweep += (channel['switch_time'] + channel['cad_time']) / scans
+            channels[f"{frequency / 1e6:.3f}"] = {
+                'scans': scans,
+                'hits': channel['hits'],
+                'misses': channel['misses'],
+                'packets': channel['packets'],
+                'false_detections': channel['false_detections'],
+                'rx_errors': channel['rx_errors'],
+                'cad_timeouts': channel['cad_timeouts'],
+                'hit_rate': round(channel['hits'] / scans, 4) if scans else 0.0,
+                'miss_rate': round(channel['misses'] / scans, 4) if scans else 0.0,
+                'cad_ms': round(channel['cad_time'] / scans * 1000, 3) if scans else 0.0,
+                'switch_ms': round(channel['switch_time'] / scans * 1000, 3) if scans else 0.0,
+                'dwell_ms': round(channel['dwell_time'] / scans * 1000, 3) if scans else 0.0
+            }
+        # Sweep: one switch + CAD per channel, without time spent receiving
+        sweep_ms = sweep * 1000
+        cad_ms = sweep_ms / len(self.channels)
+        preamble_ms = self.profile.preambleTime() * 1000
+        return {
+            'cycles': self.cycles,
+            'cycle_ms': round(self.cycle_time / self.cycles * 1000, 3) if self.cycles else 0.0,
+            'sweep_ms': round(sweep_ms, 3),
+            'preamble_ms': round(preamble_ms, 3),
+            # Share of packets whose preamble still covers a full CAD when the sweep gets back to their channel
+            'expected_catch_rate': round(min(1.0, max(0.0, (preamble_ms - cad_ms) / sweep_ms)), 4) if sweep_ms else 0.0,
+            'channels': channels
+        }
+
+def service_rx_queue(timeout=1.0):
+    """Publish the next queued packet, waiting up to timeout (publish thread)"""
+    try:
+        receiver, packet = rx_queue.get(timeout=timeout)
+    except queue.Empty:
+        return False
+    handle_lora_packet(receiver, packet)
+    return True
+
+class PublishWorker(threading.Thread):
+    """Publish stage: drains rx_queue to MQTT so a slow broker or a large payload never holds up the radio threads"""
+    
+    def __init__(self):
+        super().__init__(name="publish", daemon=True)
+        self.running = True
+    
+    def run(self):
+        while self.running:
+            try:
+                service_rx_queue(timeout=0.5)
+            except Exception as e:
+                logger.error(f"Error publishing packet: {e}")
+                stats['errors'] += 1
+    
+    def stop(self):
+        self.running = False
+
 def setup_mqtt():
     """Initialize MQTT connection"""
     global mqtt_client
@@ -255,9 +1254,157 @@ def setup_mqtt():
         logger.error(f"Failed to connect to MQTT broker: {e}")
         sys.exit(1)
 
-def setup_lora():
+# Waveshare SX1262 HAT pinout for Raspberry Pi (based on user's configuration)
+# CS: GPIO 8 (Pin 24) - SPI0 CE0
+# BUSY: GPIO 20 (Pin 38)
+# DIO1: GPIO 16 (Pin 36)
+# RST: GPIO 18 (Pin 12)
+# TXEN: GPIO 6 (Pin 31, DIO4)
+PRIMARY_RADIO = {
+    'name': 'radio0',
+    'chip': LORA_CHIP,  # sx126x or sx127x
+    'bus': 0,           # SPI bus 0
+    'cs': 0,            # SPI CS 0 (/dev/spidev0.0) - GPIO 8
+    'reset': 18,        # GPIO 18 (Pin 12) - RST
+    'busy': 20,         # GPIO 20 (Pin 38) - BUSY
+    'irq': 16,          # GPIO 16 (Pin 36) - DIO1
+    'txen': 6,          # GPIO 6 (Pin 31) - TXEN/DIO4
+    'rxen': -1,         # Not used
+    'cs_pin': -1 if LORA_HARDWARE_CS else 21,  # Driver default manual CS line, or CE0 driven by spidev
+    'freq': LORA_FREQ,
+    'sf': LORA_SF,
+    'bw': LORA_BW,
+    'cr': LORA_CR,
+}
+
+# Driver class per radio chip setting
+RADIO_CHIPS = {'sx126x': SX126x, 'sx127x': SX127x}
+
+def parse_radio_specs(spec):
+    """Parse LORA_EXTRA_RADIOS ('key=value,...;...') into radio settings"""
+    radios = []
+    int_keys = ('bus', 'cs', 'reset', 'busy', 'irq', 'txen', 'rxen', 'cs_pin', 'sf', 'bw', 'cr')
+    for index, entry in enumerate(part for part in spec.split(';') if part.strip()):
+        # Extra radios inherit LoRa settings from the primary, CS is left to spidev
+        radio = dict(PRIMARY_RADIO, name=f"radio{index + 1}", cs_pin=-1, txen=-1)
+        for item in entry.split(','):
+            key, _, value = item.partition('=')
+            key = key.strip().lower()
+            value = value.strip()
+            if key in int_keys:
+                radio[key] = int(value, 0)
+            elif key == 'freq':
+                radio[key] = float(value)
+            elif key == 'name':
+                radio[key] = value
+            elif key == 'chip':
+                if value.lower() not in RADIO_CHIPS:
+                    raise ValueError(f"Unknown radio chip '{value}' in '{entry}'")
+                radio[key] = value.lower()
+            else:
+                raise ValueError(f"Unknown radio setting '{key}' in '{entry}'")
+        radios.append(radio)
+    return radios
+
+def radio_profile(radio):
+    """LoRa settings for a radio spec as a RadioProfile"""
+    # ESP32 uses: preamble=8, variable length header, CRC on, IQ normal
+    return RadioProfile(
+        frequency=int(radio['freq'] * 1000000),  # MHz to Hz
+        sf=radio['sf'],
+        bw=radio['bw'],
+        cr=radio['cr'],
+        headerType=SX126x.HEADER_EXPLICIT,  # Variable length (not fixed)
+        preambleLength=8,                   # Match ESP32 LORA_PREAMBLE_LENGTH
+        crcType=True,                       # Match ESP32 CRC enabled
+        invertIq=False,                     # Match ESP32 LORA_IQ_INVERSION_ON false
+        txPower=LORA_POWER,                 # SX1262 supports up to +22dBm
+        txPowerVersion=SX126x.TX_POWER_SX1262
+    )
+
+def parse_scan_channels(spec):
+    """Parse LORA_SCAN_CHANNELS ('902.3,902.5,...' MHz) into frequencies in Hz"""
+    return [int(float(part) * 1000000) for part in spec.split(',') if part.strip()]
+
+def parse_sync_word(value):
+    """Parse a sync word option: '0x' prefixed hex, anything else decimal (so '012' is 12 on every chip)"""
+    value = value.strip()
+    return int(value, 16) if value.startswith(('0x', '0X')) else int(value)
+
+def apply_sync_word(lora):
+    """Write the configured sync word, returns a description of the applied register bytes"""
+    # ------------------------------------------------------------------
+    # Sync Word Handling
+    # ------------------------------------------------------------------
+    # Heltec SX1262 (esp32-s3) library transforms SetSyncWord(0x34) into
+    # register bytes MSB=0x34, LSB=0x24 (observed via direct register read).
+    # Our initial assumption of 0x3434 was incorrect, causing zero packets.
+    # We provide multiple override mechanisms:
+    # 1. LORA_SW_FORCE: full 16-bit value (e.g. 0x3424) applied directly.
+    # 2. LORA_SW_MSB + LORA_SW_LSB: raw register bytes (hex or decimal).
+    # 3. LORA_SW (legacy single byte): passed through setSyncWord; if <=0xFF
+    #    driver transforms it; we then read back to log actual register bytes.
+    # ------------------------------------------------------------------
+    applied_sync_desc = ""
+    if isinstance(lora, SX127x):
+        return apply_sync_word_sx127x(lora)
+    try:
+        if LORA_SW_FORCE:
+            force_val = parse_sync_word(LORA_SW_FORCE)
+            logger.info(f"Forcing 16-bit sync word 0x{force_val:04X} directly to registers")
+            msb = (force_val >> 8) & 0xFF
+            lsb = force_val & 0xFF
+            lora.writeRegister(lora.REG_LORA_SYNC_WORD_MSB, (msb, lsb), 2)
+            applied_sync_desc = f"raw=0x{force_val:04X} (MSB=0x{msb:02X} LSB=0x{lsb:02X})"
+        elif LORA_SW_MSB and LORA_SW_LSB:
+            msb = parse_sync_word(LORA_SW_MSB)
+            lsb = parse_sync_word(LORA_SW_LSB)
+            logger.info(f"Setting raw sync word bytes MSB=0x{msb:02X} LSB=0x{lsb:02X}")
+            lora.writeRegister(lora.REG_LORA_SYNC_WORD_MSB, (msb, lsb), 2)
+            applied_sync_desc = f"raw-bytes (MSB=0x{msb:02X} LSB=0x{lsb:02X})"
+        else:
+            # Legacy path: use driver transformation
+            logger.info(f"Setting legacy single-byte sync request 0x{LORA_SW:02X}")
+            if LORA_SW <= 0xFF:
+                lora.setSyncWord(LORA_SW)
+            else:
+                lora.setSyncWord(LORA_SW & 0xFFFF)
+            msb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB, 1)[0]
+            lsb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB+1, 1)[0]
+            applied_sync_desc = f"driver-transformed (requested=0x{LORA_SW:02X} actual MSB=0x{msb:02X} LSB=0x{lsb:02X})"
+    except Exception as e:
+        logger.error(f"Sync word configuration error: {e}")
+    return applied_sync_desc
+
+def apply_sync_word_sx127x(lora):
+    """SX127x sync word: one register byte, 16-bit values are folded the way SX126x radios expand a single byte"""
+    try:
+        if LORA_SW_FORCE:
+            sync_word = parse_sync_word(LORA_SW_FORCE)
+        elif LORA_SW_MSB and LORA_SW_LSB:
+            sync_word = (parse_sync_word(LORA_SW_MSB) << 8) | parse_sync_word(LORA_SW_LSB)
+        else:
+            sync_word = LORA_SW & 0xFFFF
+        lora.setSyncWord(sync_word)
+        return f"requested=0x{sync_word:02X} register=0x{lora.readRegister(lora.REG_SYNC_WORD):02X}"
+    except Exception as e:
+        logger.error(f"Sync word configuration error: {e}")
+        return ""
+
+def configure_radio(lora, profile):
+    """DIO2 RF switch, RadioProfile and sync word on a freshly reset radio, returns (applied groups, sync word description)"""
+    # Configure for Raspberry Pi RF switch (SX126x DIO2, SX127x modules switch on their own)
+    if isinstance(lora, SX126x):
+        lora.setDio2RfSwitch()
+    # Frequency, modulation, packet parameters and TX power in a single pass
+    applied = lora.applyProfile(profile)
+    return applied, apply_sync_word(lora)
+
+def setup_lora(radio=PRIMARY_RADIO, required=True):
     """Initialize LoRa radio"""
-    logger.info("Setting up SX1262 LoRa radio...")
+    name = radio['name']
+    chip = radio.get('chip', 'sx126x')
+    logger.info(f"Setting up {chip.upper()} LoRa radio {name}...")
     
     try:
         # Check if SPI device exists
@@ -267,130 +1414,102 @@ def setup_lora():
         
         # Check /dev contents
         import subprocess
-        try:
-            dev_list = subprocess.check_output(['ls', '-la', '/dev/'], text=True)
-            logger.debug(f"Contents of /dev/:\n{dev_list}")
-        except:
-            pass
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                dev_list = subprocess.check_output(['ls', '-la', '/dev/'], text=True)
+                logger.debug(f"Contents of /dev/:\n{dev_list}")
+            except:
+                pass
         
-        # Waveshare SX1262 HAT pinout for Raspberry Pi (based on user's configuration)
-        # CS: GPIO 8 (Pin 24) - SPI0 CE0
-        # BUSY: GPIO 20 (Pin 38)
-        # DIO1: GPIO 16 (Pin 36)
-        # RST: GPIO 18 (Pin 12)
-        # TXEN: GPIO 6 (Pin 31, DIO4)
-        busId = 0           # SPI bus 0
-        csId = 0            # SPI CS 0 (/dev/spidev0.0) - GPIO 8
-        resetPin = 18       # GPIO 18 (Pin 12) - RST
-        busyPin = 20        # GPIO 20 (Pin 38) - BUSY
-        irqPin = 16         # GPIO 16 (Pin 36) - DIO1
-        txenPin = 6         # GPIO 6 (Pin 31) - TXEN/DIO4
-        rxenPin = -1        # Not used
+        busId = radio['bus']
+        csId = radio['cs']
+        resetPin = radio['reset']
+        busyPin = radio['busy']
+        irqPin = radio['irq']
+        txenPin = radio['txen']
+        rxenPin = radio['rxen']
+        freq, sf, bw, cr = radio['freq'], radio['sf'], radio['bw'], radio['cr']
         
-        logger.info(f"Pin configuration: RESET={resetPin}, BUSY={busyPin}, IRQ={irqPin}, TXEN={txenPin}")
+        if chip == 'sx127x':
+            logger.info(f"Pin configuration: SPI={busId}.{csId}, RESET={resetPin}, DIO0={irqPin}, TXEN={txenPin}")
+        else:
+            logger.info(f"Pin configuration: SPI={busId}.{csId}, RESET={resetPin}, BUSY={busyPin}, IRQ={irqPin}, TXEN={txenPin}")
         
-        logger.info("Creating SX126x object...")
-        lora = SX126x()
-        logger.info("SX126x object created")
+        global gpio_backend
+        if gpio_backend is None:
+            gpio_backend = gpioBackend(LORA_GPIO_BACKEND)
+            logger.info(f"GPIO backend: {LORA_GPIO_BACKEND}")
         
-        # Initialize the radio
-        logger.info("Calling lora.begin()...")
-        begin_result = lora.begin(busId, csId, resetPin, busyPin, irqPin, txenPin, rxenPin)
+        emulator = None
+        if chip == 'sx127x':
+            if LORA_GPIO_BACKEND == 'emulator':
+                raise Exception("The emulator GPIO backend only models SX126x radios")
+            # SX127x has no BUSY pin and leaves chip select to spidev
+            logger.info("Creating SX127x object...")
+            lora = SX127x()
+            lora.setGpio(gpio_backend)
+            logger.info("Calling lora.begin()...")
+            begin_result = lora.begin(busId, csId, resetPin, irqPin, txenPin, rxenPin)
+        else:
+            logger.info("Creating SX126x object...")
+            lora = SX126x()
+            lora.setGpio(gpio_backend)
+            if LORA_GPIO_BACKEND == 'emulator':
+                emulator = SX126xEmulator(gpio_backend, busyPin, irqPin, resetPin)
+                lora.setSpiDevice(emulator.spiDevice())
+            lora.setCsPin(radio['cs_pin'])
+            cs_desc = 'spidev (hardware CE)' if radio['cs_pin'] == -1 else f"GPIO {radio['cs_pin']} (manual)"
+            logger.info(f"Chip select: {cs_desc}")
+            busy_modes = {'spin': lora.BUSY_WAIT_SPIN, 'backoff': lora.BUSY_WAIT_BACKOFF, 'edge': lora.BUSY_WAIT_EDGE}
+            lora.setBusyWait(busy_modes.get(LORA_BUSY_WAIT, lora.BUSY_WAIT_BACKOFF))
+            logger.info(f"SX126x object created (BUSY wait: {LORA_BUSY_WAIT})")
+            
+            # Initialize the radio
+            logger.info("Calling lora.begin()...")
+            begin_result = lora.begin(busId, csId, resetPin, busyPin, irqPin, txenPin, rxenPin)
         logger.info(f"lora.begin() returned: {begin_result}")
         
         if not begin_result:
-            raise Exception("Failed to initialize SX1262 radio")
+            raise Exception(f"Failed to initialize {chip.upper()} radio")
         
         logger.info("Radio initialized successfully")
         
-        # Configure for Raspberry Pi RF switch
-        logger.info("Configuring DIO2 RF switch...")
-        lora.setDio2RfSwitch()
-        logger.info("DIO2 RF switch configured")
-        
-        # Set frequency (convert MHz to Hz)
-        logger.info(f"Setting frequency to {LORA_FREQ} MHz...")
-        lora.setFrequency(int(LORA_FREQ * 1000000))
+        # Start the chip's RX counters (packets, CRC and header errors) from zero
+        lora.resetStats()
         
-        # Configure modulation parameters
-        logger.info(f"Setting spreading factor to {LORA_SF}...")
-        lora.setSpreadingFactor(LORA_SF)
+        # Start from a clean device error state so the health checks only see new errors
+        lora.clearDeviceErrors()
         
-        logger.info(f"Setting bandwidth to {LORA_BW} Hz...")
-        lora.setBandwidth(LORA_BW)
-        
-        logger.info(f"Setting code rate to 4/{LORA_CR}...")
-        lora.setCodeRate(LORA_CR)
-        
-        # ------------------------------------------------------------------
-        # Sync Word Handling
-        # ------------------------------------------------------------------
-        # Heltec SX1262 (esp32-s3) library transforms SetSyncWord(0x34) into
-        # register bytes MSB=0x34, LSB=0x24 (observed via direct register read).
-        # Our initial assumption of 0x3434 was incorrect, causing zero packets.
-        # We provide multiple override mechanisms:
-        # 1. LORA_SW_FORCE: full 16-bit value (e.g. 0x3424) applied directly.
-        # 2. LORA_SW_MSB + LORA_SW_LSB: raw register bytes (hex or decimal).
-        # 3. LORA_SW (legacy single byte): passed through setSyncWord; if <=0xFF
-        #    driver transforms it; we then read back to log actual register bytes.
-        # ------------------------------------------------------------------
-        applied_sync_desc = ""
-        try:
-            if LORA_SW_FORCE:
-                force_val = int(LORA_SW_FORCE, 0) if LORA_SW_FORCE.startswith(('0x','0X')) else int(LORA_SW_FORCE)
-                logger.info(f"Forcing 16-bit sync word 0x{force_val:04X} directly to registers")
-                msb = (force_val >> 8) & 0xFF
-                lsb = force_val & 0xFF
-                lora.writeRegister(lora.REG_LORA_SYNC_WORD_MSB, (msb, lsb), 2)
-                applied_sync_desc = f"raw=0x{force_val:04X} (MSB=0x{msb:02X} LSB=0x{lsb:02X})"
-            elif LORA_SW_MSB and LORA_SW_LSB:
-                msb = int(LORA_SW_MSB, 0) if LORA_SW_MSB.startswith(('0x','0X')) else int(LORA_SW_MSB)
-                lsb = int(LORA_SW_LSB, 0) if LORA_SW_LSB.startswith(('0x','0X')) else int(LORA_SW_LSB)
-                logger.info(f"Setting raw sync word bytes MSB=0x{msb:02X} LSB=0x{lsb:02X}")
-                lora.writeRegister(lora.REG_LORA_SYNC_WORD_MSB, (msb, lsb), 2)
-                applied_sync_desc = f"raw-bytes (MSB=0x{msb:02X} LSB=0x{lsb:02X})"
-            else:
-                # Legacy path: use driver transformation
-                logger.info(f"Setting legacy single-byte sync request 0x{LORA_SW:02X}")
-                if LORA_SW <= 0xFF:
-                    lora.setSyncWord(LORA_SW)
-                else:
-                    lora.setSyncWord(LORA_SW & 0xFFFF)
-                msb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB, 1)[0]
-                lsb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB+1, 1)[0]
-                applied_sync_desc = f"driver-transformed (requested=0x{LORA_SW:02X} actual MSB=0x{msb:02X} LSB=0x{lsb:02X})"
-        except Exception as e:
-            logger.error(f"Sync word configuration error: {e}")
+        # RF switch, profile and sync word, the same steps an in-process recovery repeats
+        profile = radio_profile(radio)
+        logger.info(f"Applying {profile}...")
+        config_start = time.monotonic()
+        applied, applied_sync_desc = configure_radio(lora, profile)
+        logger.info(f"Radio profile applied in {(time.monotonic() - config_start) * 1000:.1f} ms ({', '.join(applied)})")
         logger.info(f"Sync word applied: {applied_sync_desc}")
         
-        # Set packet parameters to match ESP32 Heltec configuration
-        logger.info("Setting packet parameters...")
-        # ESP32 uses: preamble=8, variable length header, CRC on, IQ normal
-        lora.setHeaderType(lora.HEADER_EXPLICIT)  # Variable length (not fixed)
-        lora.setPreambleLength(8)  # Match ESP32 LORA_PREAMBLE_LENGTH
-        lora.setCrcEnable(True)    # Match ESP32 CRC enabled
-        lora.setInvertIq(False)    # Match ESP32 LORA_IQ_INVERSION_ON false
-        logger.info("  Preamble: 8, Header: Explicit, CRC: On, IQ: Normal")
-        
-        # Set TX power (SX1262 supports up to +22dBm)
-        logger.info(f"Setting TX power to {LORA_POWER} dBm...")
-        lora.setTxPower(LORA_POWER, lora.TX_POWER_SX1262)
-        
         # Set to continuous receive mode
         logger.info("Setting to continuous receive mode...")
         lora.request(lora.RX_CONTINUOUS)
         logger.info("Receive mode active (continuous)")
+        if emulator is not None:
+            emulator.startTraffic(LORA_EMULATOR_RATE)
+            logger.info(f"Emulated radio, receiving {LORA_EMULATOR_RATE:g} packets/s")
         
-        logger.info(f"LoRa configured:")
-        logger.info(f"  Frequency: {LORA_FREQ} MHz")
-        logger.info(f"  Spreading Factor: {LORA_SF}")
-        logger.info(f"  Bandwidth: {LORA_BW} Hz")
-        logger.info(f"  Coding Rate: 4/{LORA_CR}")
+        logger.info(f"LoRa configured ({name}):")
+        logger.info(f"  Frequency: {freq} MHz")
+        logger.info(f"  Spreading Factor: {sf}")
+        logger.info(f"  Bandwidth: {bw} Hz")
+        logger.info(f"  Coding Rate: 4/{cr}")
+        logger.info(f"  Low Data Rate Optimization: {'On' if profile.ldroEnabled() else 'Off'}")
         # Read back final sync word bytes for confirmation
         try:
-            final_msb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB, 1)[0]
-            final_lsb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB+1, 1)[0]
-            logger.info(f"  Sync Word Registers: MSB=0x{final_msb:02X} LSB=0x{final_lsb:02X} (combined 0x{final_msb:02X}{final_lsb:02X})")
+            if isinstance(lora, SX127x):
+                logger.info(f"  Sync Word Register: 0x{lora.readRegister(lora.REG_SYNC_WORD):02X}")
+            else:
+                final_msb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB, 1)[0]
+                final_lsb = lora.readRegister(lora.REG_LORA_SYNC_WORD_MSB+1, 1)[0]
+                logger.info(f"  Sync Word Registers: MSB=0x{final_msb:02X} LSB=0x{final_lsb:02X} (combined 0x{final_msb:02X}{final_lsb:02X})")
         except Exception as e:
             logger.warning(f"  Sync Word readback failed: {e}")
         logger.info(f"  Preamble Length: 8")
@@ -399,28 +1518,150 @@ def setup_lora():
         logger.info(f"  IQ Inversion: Normal")
         logger.info(f"  TX Power: {LORA_POWER} dBm")
         
+        # Enabled after the sync word readback so it still comes from the chip
+        if LORA_REGISTER_CACHE and isinstance(lora, SX126x):
+            lora.setRegisterCache(True)
+            logger.info("  Register cache: Enabled")
+        
+        # Profile from here on so the counters cover receiving, not the one-off setup
+        if LORA_SPI_PROFILE:
+            lora.setSpiProfiler(SpiProfiler())
+            logger.info("  SPI profiler: Enabled")
+        
         return lora
         
     except Exception as e:
-        logger.error(f"Failed to initialize LoRa radio: {e}")
+        logger.error(f"Failed to initialize LoRa radio {name}: {e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        if required:
+            sys.exit(1)
+        return None
 
-def publish_statistics():
+def publish_statistics(receivers=()):
     """Publish gateway statistics to MQTT"""
     stats_payload = {
         'messages_received': stats['messages_received'],
         'messages_parsed': stats['messages_parsed'],
         'mqtt_published': stats['mqtt_published'],
         'errors': stats['errors'],
+        'rx_queue_dropped': stats['rx_queue_dropped'],
+        'fanout': {
+            'mode': fanout_mode,
+            'packets': stats['fanout_packets'],
+            'publishes': stats['fanout_publishes'],
+            'publishes_per_packet': round(stats['fanout_publishes'] / stats['fanout_packets'], 2) if stats['fanout_packets'] else 0.0
+        },
+        'topic_plan_cache': topic_plans.stats(),
+        'json_codec': {'library': codec.name, 'fallbacks': codec.fallbacks},
+        'changes_only': delta_filter.stats() if delta_filter is not None else {'enabled': False},
+        'rx_queue': {
+            'policy': RX_QUEUE_POLICY,
+            'size': RX_QUEUE_SIZE,
+            'depth': rx_queue.qsize(),
+            'high_water': stats['rx_queue_high_water'],
+            'dropped': stats['rx_queue_dropped'],
+            'blocked': stats['rx_queue_blocked'],
+            'blocked_ms': round(stats['rx_queue_blocked_time'] * 1000, 3),
+            'block_timeouts': stats['rx_queue_block_timeouts']
+        },
         'uptime_seconds': int((datetime.now() - datetime.fromisoformat(stats['start_time'])).total_seconds()),
         'start_time': stats['start_time']
     }
-    publish_to_mqtt(f"{MQTT_PREFIX}/gateway/stats", json.dumps(stats_payload))
+    radios = {}
+    for receiver in receivers:
+        radios[receiver.radio_name] = {'received': receiver.received}
+        # Time the driver spent waiting on the BUSY pin (SX126x only)
+        if isinstance(receiver.lora, SX126x):
+            busy = receiver.lora.busyStats()
+            radios[receiver.radio_name]['busy_wait'] = {
+                'count': busy['count'],
+                'timeouts': busy['timeouts'],
+                'total_ms': round(busy['total_ms'], 3),
+                'max_ms': round(busy['max_ms'], 3),
+                'avg_ms': round(busy['total_ms'] / busy['count'], 4) if busy['count'] else 0.0,
+                # Which commands the wait time went to
+                'opcodes': {
+                    name: {
+                        'count': op['count'],
+                        'timeouts': op['timeouts'],
+                        'total_ms': round(op['total_ms'], 3),
+                        'max_ms': round(op['max_ms'], 3),
+                        'avg_ms': round(op['total_ms'] / op['count'], 4)
+                    }
+                    for name, op in busy['opcodes'].items()
+                }
+            }
+        radios[receiver.radio_name]['latency'] = receiver.latency_stats()
+        # SPI round trips saved by the register shadow
+        regs = receiver.lora.registerCacheStats() if isinstance(receiver.lora, SX126x) else {'enabled': False}
+        if regs['enabled']:
+            radios[receiver.radio_name]['register_cache'] = {
+                'hits': regs['hits'],
+                'misses': regs['misses'],
+                'skipped_writes': regs['skipped'],
+                'saved': regs['saved'],
+                'saved_per_packet': round(regs['saved'] / receiver.received, 2) if receiver.received else 0.0,
+                'invalidations': regs['invalidations']
+            }
+        # Radio-level loss from the chip's own counters, next to the pipeline counters
+        try:
+            counters = receiver.sample_counters()
+            if counters is not None:
+                radios[receiver.radio_name]['radio_counters'] = counters
+        except Exception as e:
+            logger.warning(f"Reading radio counters failed [{receiver.radio_name}]: {e}")
+        if isinstance(receiver, ChannelScanner):
+            radios[receiver.radio_name]['scan'] = receiver.scan_stats()
+        if isinstance(receiver, ListenReceiver):
+            radios[receiver.radio_name]['listen'] = receiver.listen_stats()
+        if RADIO_HEALTH_INTERVAL and receiver.profile is not None:
+            radios[receiver.radio_name]['health'] = receiver.health_stats()
+    if radios:
+        stats_payload['radios'] = radios
+    publish_to_mqtt(f"{MQTT_PREFIX}/gateway/stats", codec.dumps(stats_payload))
+    if LORA_SPI_PROFILE:
+        publish_spi_stats(receivers)
+    publish_airtime_stats(receivers)
+
+def publish_airtime_stats(receivers):
+    """Log and publish channel utilization and per-device airtime of each radio"""
+    airtime = {}
+    for receiver in receivers:
+        if receiver.profile is None:
+            continue
+        channel = receiver.airtime_stats()
+        airtime[receiver.radio_name] = channel
+        utilization = channel['utilization_1m']
+        message = (f"📶 Airtime [{receiver.radio_name}]: {utilization:.1%} of the last minute, {channel['utilization_15m']:.1%} of the last 15 min, "
+                   f"collision chance {channel['collision_probability_1m']:.1%}")
+        # Pure ALOHA throughput peaks at 18% load, beyond it collisions cost more than the extra traffic
+        if utilization > 0.18:
+            logger.warning(f"{message} - channel close to saturation")
+        else:
+            logger.info(message)
+    if airtime:
+        publish_to_mqtt(f"{MQTT_PREFIX}/gateway/airtime", codec.dumps(airtime))
+
+def publish_spi_stats(receivers):
+    """Log and publish the per-opcode SPI profile of each radio"""
+    spi_stats = {}
+    for receiver in receivers:
+        if receiver.lora._profiler is None:
+            continue
+        profile = receiver.spi_stats()
+        spi_stats[receiver.radio_name] = profile
+        busiest = ', '.join(f"{name} {op['calls']}" for name, op in list(profile['opcodes'].items())[:5])
+        logger.info(f"🔌 SPI [{receiver.radio_name}]: {profile['transactions']} transactions, {profile['bytes']} bytes, "
+                    f"{profile['transactions_per_packet']} per packet, BUSY {profile['busy_ms']:.1f} ms, transfer {profile['transfer_ms']:.1f} ms ({busiest})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"SPI profile [{receiver.radio_name}]: {json.dumps(profile)}")
+    if spi_stats:
+        publish_to_mqtt(f"{MQTT_PREFIX}/gateway/spi_stats", codec.dumps(spi_stats))
 
 def main():
     """Main gateway loop"""
+    global delta_filter
     logger.info("========================================")
     logger.info("SX1262 LoRa Gateway for Home Assistant")
     logger.info("========================================")
@@ -439,49 +1680,134 @@ def main():
         logger.error("Failed to connect to MQTT broker after 10 attempts")
         sys.exit(1)
     
-    # Setup LoRa
+    try:
+        extra_radios = parse_radio_specs(LORA_EXTRA_RADIOS)
+    except ValueError as e:
+        logger.error(f"Invalid extra radio configuration: {e}")
+        sys.exit(1)
+    
+    try:
+        setup_fanout()
+    except ValueError as e:
+        logger.error(f"Invalid fan-out configuration: {e}")
+        sys.exit(1)
+    selected = f" ({len(topic_plans.fields)} fields, {', '.join(sorted(fanout_extras)) or 'no per-packet topics'})" if fanout_mode == 'selected' else ""
+    logger.info(f"MQTT fan-out: {fanout_mode}{selected}, JSON codec: {codec.name}")
+    
+    if PUBLISH_CHANGES_ONLY:
+        if fanout_mode == 'json':
+            logger.warning("publish_changes_only applies to field topics, the json fan-out publishes every document")
+        try:
+            delta_filter = DeltaFilter(parse_deadbands(PUBLISH_DEADBAND), PUBLISH_REFRESH_INTERVAL)
+        except ValueError as e:
+            logger.error(f"Invalid publish deadband configuration: {e}")
+            sys.exit(1)
+        refresh = f"refresh every {PUBLISH_REFRESH_INTERVAL} s" if PUBLISH_REFRESH_INTERVAL else "no refresh"
+        logger.info(f"Publishing changed fields only ({refresh}, deadbands: {PUBLISH_DEADBAND or 'none'})")
+    
+    # Setup LoRa: primary HAT is required, extra radios are skipped if they fail
+    # Listen mode is driven by DIO1 edges like interrupt mode; extra radios stay in continuous RX
+    interrupt_mode = RX_MODE in ('interrupt', 'listen')
     lora = setup_lora()
+    profile = radio_profile(PRIMARY_RADIO)
+    scan_channels = parse_scan_channels(LORA_SCAN_CHANNELS)
+    # CAD scanning and duty-cycled listen use SX126x commands, other chips stay in continuous RX
+    sx126x = isinstance(lora, SX126x)
+    if scan_channels and not sx126x:
+        logger.error("Channel scanning needs an SX126x radio, staying on the configured frequency")
+        scan_channels = []
+    if scan_channels and (not interrupt_mode or lora._irq == -1):
+        logger.error("Channel scanning needs DIO1 interrupts (rx_mode: interrupt), staying on the configured frequency")
+        scan_channels = []
+    listen_periods = None
+    if RX_MODE == 'listen' and not scan_channels:
+        listen_periods = ListenReceiver.periods(profile)
+        if not sx126x:
+            logger.error("Listen mode needs an SX126x radio, using continuous receive")
+            listen_periods = None
+        elif lora._irq == -1:
+            logger.error("Listen mode needs the DIO1 pin, using continuous receive")
+            listen_periods = None
+        elif listen_periods is None:
+            logger.error(f"Preamble of {profile.preambleLength} symbols is too short for duty-cycled listen at SF{profile.sf}/{profile.bw} Hz without losing packets, using continuous receive")
+    if scan_channels:
+        receivers = [ChannelScanner(PRIMARY_RADIO['name'], lora, profile, scan_channels, LORA_SCAN_CAD_SYMBOLS)]
+        logger.info(f"Scanning {len(scan_channels)} channels with {LORA_SCAN_CAD_SYMBOLS}-symbol CAD: {LORA_SCAN_CHANNELS}")
+    elif listen_periods is not None:
+        receivers = [ListenReceiver(PRIMARY_RADIO['name'], lora, profile, listen_periods)]
+        rx_ms, sleep_ms = (period * 1000 for period in listen_periods)
+        logger.info(f"Listen mode: RX {rx_ms:.2f} ms / sleep {sleep_ms:.2f} ms (radio on {receivers[0].duty:.0%} while idle)")
+    else:
+        receivers = [RadioReceiver(PRIMARY_RADIO['name'], lora, interrupt_mode, profile=profile)]
+    for radio in extra_radios:
+        extra = setup_lora(radio, required=False)
+        if extra is not None:
+            receivers.append(RadioReceiver(radio['name'], extra, interrupt_mode, f"/{radio['name']}", radio_profile(radio)))
+    
+    for receiver in receivers:
+        receiver.start()
+        mode = 'interrupt (DIO1)' if receiver.interrupt_mode else 'polling (100 ms)'
+        if isinstance(receiver, ChannelScanner):
+            mode = f"channel scan ({len(receiver.channels)} channels)"
+        if isinstance(receiver, ListenReceiver):
+            mode = f"duty-cycled listen (DIO1, {receiver.duty:.0%} on)"
+        logger.info(f"Receive pipeline [{receiver.radio_name}]: {mode}")
+    
+    if RADIO_HEALTH_INTERVAL:
+        silence = f", IRQ silence limit {RADIO_IRQ_TIMEOUT} s" if RADIO_IRQ_TIMEOUT else ""
+        logger.info(f"Radio health checks every {RADIO_HEALTH_INTERVAL} s with in-process recovery{silence}")
+    logger.info(f"Gateway ready! Listening for LoRa messages on {len(receivers)} radio(s)...")
     
-    logger.info("Gateway ready! Listening for LoRa messages...")
+    # Publish stage runs on its own thread, the main thread only keeps time for heartbeats and stats
+    publisher = PublishWorker()
+    publisher.start()
+    block_desc = f" (up to {RX_QUEUE_BLOCK_MS} ms, then drop-oldest)" if RX_QUEUE_POLICY == 'block' else ""
+    logger.info(f"Publish queue: {RX_QUEUE_SIZE} packets, {RX_QUEUE_POLICY} when full{block_desc}")
     
     # Publish initial stats
-    publish_statistics()
+    publish_statistics(receivers)
     last_stats_time = time.time()
     last_heartbeat = time.time()
     
     try:
         while True:
-            # Check for received packets
-            on_lora_receive(lora)
+            time.sleep(1.0)
             
             # Heartbeat every 10 seconds
             if time.time() - last_heartbeat > 10:
                 # Instant RSSI sample (may show channel energy even without packets)
-                try:
-                    rssi_inst = lora.rssiInst()
-                    logger.info(f"💓 Heartbeat - Listening... (pkts {stats['messages_received']}) RSSIinst={rssi_inst:.1f}dBm")
-                except Exception:
-                    logger.info(f"💓 Heartbeat - Listening... (pkts {stats['messages_received']})")
+                for receiver in receivers:
+                    # Any SPI command would wake a duty-cycled radio out of its sleep period
+                    if isinstance(receiver, ListenReceiver):
+                        logger.info(f"💓 Heartbeat [{receiver.radio_name}] - Listening (duty-cycled)... (pkts {receiver.received})")
+                        continue
+                    try:
+                        rssi_inst = receiver.lora.rssiInst()
+                        logger.info(f"💓 Heartbeat [{receiver.radio_name}] - Listening... (pkts {receiver.received}) RSSIinst={rssi_inst:.1f}dBm")
+                    except Exception:
+                        logger.info(f"💓 Heartbeat [{receiver.radio_name}] - Listening... (pkts {receiver.received})")
                 last_heartbeat = time.time()
             
             # Publish statistics every 60 seconds
             if time.time() - last_stats_time > 60:
-                publish_statistics()
+                publish_statistics(receivers)
                 last_stats_time = time.time()
             
-            # Small delay to prevent CPU hogging
-            time.sleep(0.1)
-            
     except KeyboardInterrupt:
         logger.info("Shutting down gracefully...")
     except Exception as e:
         logger.error(f"Fatal error in main loop: {e}")
         stats['errors'] += 1
     finally:
+        for receiver in receivers:
+            receiver.stop()
+        publisher.stop()
+        publisher.join(timeout=2.0)
+        
         # Publish offline status
         if mqtt_client and mqtt_connected:
             mqtt_client.publish(f"{MQTT_PREFIX}/status", "offline", retain=True)
-            publish_statistics()
+            publish_statistics(receivers)
             mqtt_client.loop_stop()
             mqtt_client.disconnect()
         
@@ -3,6 +3,7 @@
 bashio::log.info "Starting SX1262 LoRa Gateway..."
 
 # Get configuration
+LORA_CHIP=$(bashio::config 'lora_chip')
 LORA_FREQ=$(bashio::config 'lora_frequency')
 LORA_SF=$(bashio::config 'lora_spreading_factor')
 LORA_BW=$(bashio::config 'lora_bandwidth')
@@ -12,6 +13,40 @@ LORA_SW_FORCE=$(bashio::config 'lora_sync_word_force')
 LORA_SW_MSB=$(bashio::config 'lora_sync_word_msb')
 LORA_SW_LSB=$(bashio::config 'lora_sync_word_lsb')
 LORA_POWER=$(bashio::config 'lora_tx_power')
+LORA_BUSY_WAIT=$(bashio::config 'lora_busy_wait')
+LORA_REGISTER_CACHE=$(bashio::config 'lora_register_cache')
+LORA_SPI_PROFILE=$(bashio::config 'lora_spi_profile')
+LORA_GPIO_BACKEND=$(bashio::config 'lora_gpio_backend')
+LORA_HARDWARE_CS=$(bashio::config 'lora_hardware_cs')
+RX_MODE=$(bashio::config 'rx_mode')
+RX_QUEUE_SIZE=$(bashio::config 'rx_queue_size')
+RX_QUEUE_POLICY=$(bashio::config 'rx_queue_policy')
+RX_QUEUE_BLOCK_MS=$(bashio::config 'rx_queue_block_ms')
+LORA_EXTRA_RADIOS=""
+if bashio::config.has_value 'lora_extra_radios'; then
+    LORA_EXTRA_RADIOS=$(bashio::config 'lora_extra_radios')
+fi
+LORA_SCAN_CHANNELS=""
+if bashio::config.has_value 'lora_scan_channels'; then
+    LORA_SCAN_CHANNELS=$(bashio::config 'lora_scan_channels')
+fi
+LORA_SCAN_CAD_SYMBOLS=$(bashio::config 'lora_scan_cad_symbols')
+RADIO_HEALTH_INTERVAL=$(bashio::config 'radio_health_interval')
+RADIO_IRQ_TIMEOUT=$(bashio::config 'radio_irq_timeout')
+AIRTIME_DEVICE_KEY=$(bashio::config 'airtime_device_key')
+TOPIC_PLAN_CACHE_SIZE=$(bashio::config 'topic_plan_cache_size')
+FANOUT_MODE=$(bashio::config 'fanout_mode')
+FANOUT_FIELDS=""
+if bashio::config.has_value 'fanout_fields'; then
+    FANOUT_FIELDS=$(bashio::config 'fanout_fields')
+fi
+PUBLISH_CHANGES_ONLY=$(bashio::config 'publish_changes_only')
+PUBLISH_DEADBAND=""
+if bashio::config.has_value 'publish_deadband'; then
+    PUBLISH_DEADBAND=$(bashio::config 'publish_deadband')
+fi
+PUBLISH_REFRESH_INTERVAL=$(bashio::config 'publish_refresh_interval')
+JSON_CODEC=$(bashio::config 'json_codec')
 MQTT_HOST=$(bashio::config 'mqtt_host')
 MQTT_PORT=$(bashio::config 'mqtt_port')
 MQTT_USER=$(bashio::config 'mqtt_username')
@@ -25,7 +60,11 @@ bashio::log.info "Bandwidth: ${LORA_BW} Hz"
 bashio::log.info "MQTT Broker: ${MQTT_HOST}:${MQTT_PORT}"
 
 # Export config as environment variables
-export LORA_FREQ LORA_SF LORA_BW LORA_CR LORA_SW LORA_SW_FORCE LORA_SW_MSB LORA_SW_LSB LORA_POWER
+export LORA_CHIP LORA_FREQ LORA_SF LORA_BW LORA_CR LORA_SW LORA_SW_FORCE LORA_SW_MSB LORA_SW_LSB LORA_POWER LORA_BUSY_WAIT LORA_REGISTER_CACHE LORA_SPI_PROFILE
+export LORA_GPIO_BACKEND LORA_HARDWARE_CS
+export RX_MODE RX_QUEUE_SIZE RX_QUEUE_POLICY RX_QUEUE_BLOCK_MS LORA_EXTRA_RADIOS LORA_SCAN_CHANNELS LORA_SCAN_CAD_SYMBOLS
+export RADIO_HEALTH_INTERVAL RADIO_IRQ_TIMEOUT AIRTIME_DEVICE_KEY TOPIC_PLAN_CACHE_SIZE
+export FANOUT_MODE FANOUT_FIELDS PUBLISH_CHANGES_ONLY PUBLISH_DEADBAND PUBLISH_REFRESH_INTERVAL JSON_CODEC
 export MQTT_HOST MQTT_PORT MQTT_USER MQTT_PASS MQTT_PREFIX
 export LOG_LEVEL
 
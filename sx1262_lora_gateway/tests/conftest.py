@@ -0,0 +1,47 @@
+"""
+Shared setup for the tests: the benchmark hardware fakes stand in for spidev,
+RPi.GPIO, lgpio, gpiod and (when not installed) paho-mqtt, so LoRaRF and
+lora_gateway.py import off-target. Radios are driven through LoRaRF.emulator.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import _fakes
+
+_fakes.install()
+
+from LoRaRF import SX126x, SX126xEmulator, EmulatedGpio
+
+RESET_PIN = 18
+BUSY_PIN = 20
+IRQ_PIN = 16
+
+
+@pytest.fixture
+def chip():
+    """Emulated SX126x on its own GPIO, with every SPI frame it receives recorded in chip.frames"""
+    gpio = EmulatedGpio()
+    chip = SX126xEmulator(gpio, busy=BUSY_PIN, irq=IRQ_PIN, reset=RESET_PIN)
+    chip.frames = []
+    xfer = chip.xfer
+    def record(data):
+        chip.frames.append(list(data))
+        return xfer(data)
+    chip.xfer = record
+    return chip
+
+
+@pytest.fixture
+def radio(chip):
+    """SX126x driver wired to the emulated chip, begun and in standby"""
+    lora = SX126x()
+    lora.setGpio(chip.gpio)
+    lora.setSpiDevice(chip.spiDevice())
+    assert lora.begin(0, 0, RESET_PIN, BUSY_PIN, IRQ_PIN, -1, -1)
+    yield lora
+    chip.stopTraffic()
@@ -0,0 +1,117 @@
+"""Gateway publish stage: change-only filter, topic plan cache and publish queue overflow policies"""
+
+import queue
+import threading
+import time
+import types
+
+import pytest
+
+import lora_gateway as gw
+
+PREFIX = gw.MQTT_PREFIX
+
+
+def test_delta_filter_suppresses_unchanged_and_deadband():
+    delta = gw.DeltaFilter({f"{PREFIX}/level": 0.5})
+    topics = [f"{PREFIX}/level", f"{PREFIX}/state"]
+    assert delta.select(topics, [85.2, 'ok'], 0.0) == [(topics[0], '85.2'), (topics[1], 'ok')]
+    assert delta.select(topics, [85.2, 'ok'], 1.0) == []
+    # within the deadband of the last published value, then past it
+    assert delta.select(topics, [85.5, 'ok'], 2.0) == []
+    assert delta.select(topics, [85.8, 'low'], 3.0) == [(topics[0], '85.8'), (topics[1], 'low')]
+    stats = delta.stats()
+    assert (stats['sent'], stats['suppressed']) == (4, 4)
+
+
+def test_delta_filter_deadband_ignores_bools_and_refreshes():
+    delta = gw.DeltaFilter({'*': 1.0}, refresh=60)
+    topic = [f"{PREFIX}/on"]
+    delta.select(topic, [True], 0.0)
+    assert delta.select(topic, [False], 1.0) == [(topic[0], 'False')]
+    assert delta.select(topic, [False], 30.0) == []
+    assert delta.select(topic, [False], 61.0) == [(topic[0], 'False')]
+    assert delta.stats()['refreshed'] == 1
+
+
+def test_topic_plan_cache_hits_and_evicts_least_recently_used():
+    cache = gw.TopicPlanCache(2)
+    shapes = {}
+    for name, data in (('a', {'x': 1}), ('b', {'x': {'y': 2}}), ('c', {'z': [1, 2]})):
+        shapes[name] = gw.payload_shape(data, [])
+    assert cache.plan('dev', shapes['a']) == (None, [f"{PREFIX}/x"])
+    assert cache.plan('dev', shapes['b']) == (None, [f"{PREFIX}/x/y"])
+    cache.plan('dev', shapes['a'])
+    # c evicts b, the least recently used
+    assert cache.plan('dev', shapes['c']) == (None, [f"{PREFIX}/z/0", f"{PREFIX}/z/1"])
+    cache.plan('dev', shapes['a'])
+    cache.plan('dev', shapes['b'])
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (2, 4, 2, 2)
+
+
+def test_topic_plan_cache_allowlist_and_disabled():
+    cache = gw.TopicPlanCache(0, fields=['water/level'])
+    data = {'water': {'level': 85.2, 'state': 0}, 'batt': 4.1}
+    leaves = []
+    indices, topics = cache.plan('dev', gw.payload_shape(data, leaves))
+    assert topics == [f"{PREFIX}/water/level"]
+    assert [leaves[i] for i in indices] == [85.2]
+    cache.plan('dev', gw.payload_shape(data, []))
+    assert cache.stats()['entries'] == 0 and cache.stats()['misses'] == 2
+
+
+@pytest.fixture
+def rx_queue(monkeypatch):
+    """Two-packet publish queue with fresh queue counters"""
+    rx_queue = queue.Queue(maxsize=2)
+    monkeypatch.setattr(gw, 'rx_queue', rx_queue)
+    monkeypatch.setattr(gw, 'RX_QUEUE_SIZE', 2)
+    for key in ('messages_received', 'rx_queue_dropped', 'rx_queue_blocked', 'rx_queue_block_timeouts', 'rx_queue_high_water'):
+        monkeypatch.setitem(gw.stats, key, 0)
+    monkeypatch.setitem(gw.stats, 'rx_queue_blocked_time', 0.0)
+    return rx_queue
+
+
+def queued(rx_queue):
+    return [packet for _, packet in list(rx_queue.queue)]
+
+
+def receiver():
+    return types.SimpleNamespace(radio_name='test', received=0)
+
+
+def test_drop_oldest_policy(rx_queue, monkeypatch):
+    monkeypatch.setattr(gw, 'RX_QUEUE_POLICY', 'drop-oldest')
+    radio = receiver()
+    for packet in ('p1', 'p2', 'p3'):
+        gw.queue_lora_packet(radio, packet)
+    assert queued(rx_queue) == ['p2', 'p3']
+    assert (gw.stats['rx_queue_dropped'], gw.stats['rx_queue_high_water'], radio.received) == (1, 2, 3)
+
+
+def test_block_policy_waits_for_room(rx_queue, monkeypatch):
+    monkeypatch.setattr(gw, 'RX_QUEUE_POLICY', 'block')
+    monkeypatch.setattr(gw, 'RX_QUEUE_BLOCK_MS', 2000)
+    radio = receiver()
+    gw.queue_lora_packet(radio, 'p1')
+    gw.queue_lora_packet(radio, 'p2')
+    threading.Timer(0.05, rx_queue.get).start()
+    gw.queue_lora_packet(radio, 'p3')
+    assert queued(rx_queue) == ['p2', 'p3']
+    assert (gw.stats['rx_queue_blocked'], gw.stats['rx_queue_block_timeouts'], gw.stats['rx_queue_dropped']) == (1, 0, 0)
+    assert gw.stats['rx_queue_blocked_time'] > 0.0
+
+
+def test_block_policy_drops_oldest_after_timeout(rx_queue, monkeypatch):
+    # a stalled publish stage must not hold the DIO1 callback thread
+    monkeypatch.setattr(gw, 'RX_QUEUE_POLICY', 'block')
+    monkeypatch.setattr(gw, 'RX_QUEUE_BLOCK_MS', 20)
+    radio = receiver()
+    gw.queue_lora_packet(radio, 'p1')
+    gw.queue_lora_packet(radio, 'p2')
+    start = time.monotonic()
+    gw.queue_lora_packet(radio, 'p3')
+    assert time.monotonic() - start < 1.0
+    assert queued(rx_queue) == ['p2', 'p3']
+    assert (gw.stats['rx_queue_block_timeouts'], gw.stats['rx_queue_dropped']) == (1, 1)
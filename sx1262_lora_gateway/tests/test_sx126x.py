@@ -0,0 +1,153 @@
+"""SX126x driver against the emulated chip"""
+
+import threading
+
+SET_PACKET_PARAMS = 0x8C
+WRITE_REGISTER = 0x0D
+READ_REGISTER = 0x1D
+CALIBRATE_IMAGE = 0x98
+
+
+def frames(chip, opcode):
+    return [frame for frame in chip.frames if frame[0] == opcode]
+
+
+def wait_for_dio1(lora, arm):
+    """Run arm() with an onReceive/onCad callback attached and wait until the DIO1 handler has called it"""
+    done = threading.Event()
+    lora.onReceive(done.set)
+    lora.onCad(done.set)
+    arm()
+    assert done.wait(2.0), "no DIO1 callback"
+
+
+def test_packet_round_trip(radio, chip):
+    radio.request(radio.RX_CONTINUOUS)
+    wait_for_dio1(radio, lambda: chip.receive(b'{"dev": "t", "seq": 1}', rssi=-61.0, snr=7.5))
+    assert radio.status() == radio.STATUS_RX_DONE
+    packet = radio.receivePacket()
+    assert packet.payload == b'{"dev": "t", "seq": 1}'
+    assert packet.rssi == -61.0
+    assert packet.snr == 7.5
+    assert packet.irq & radio.IRQ_RX_DONE
+    # continuous RX stays armed for the next packet
+    wait_for_dio1(radio, lambda: chip.receive(b'second'))
+    assert radio.status() == radio.STATUS_RX_DONE
+    assert radio.receivePacket().payload == b'second'
+
+
+def test_packet_longer_than_short_frame(radio, chip):
+    # ReadBuffer bursts go through the preallocated frame
+    payload = bytes(range(200))
+    radio.request(radio.RX_CONTINUOUS)
+    wait_for_dio1(radio, lambda: chip.receive(payload))
+    radio.status()
+    assert radio.receivePacket().payload == payload
+
+
+def test_stats_counters_are_16_bit(radio, chip):
+    chip.counters = [0x1234, 0x0102, 0x0300]
+    assert radio.getStats() == (0x1234, 0x0102, 0x0300)
+    radio.resetStats()
+    assert radio.getStats() == (0, 0, 0)
+
+
+def test_device_errors_include_low_byte(radio, chip):
+    # calibration and PLL lock errors live in the low byte of OpError
+    chip.deviceErrors = 0x0121
+    assert radio.getDeviceErrors() == 0x0121
+    radio.clearDeviceErrors()
+    assert radio.getDeviceErrors() == 0
+
+
+def test_packet_setters_keep_preamble_and_header_order(radio, chip):
+    # SetPacketParams: preamble length MSB and LSB, header type, payload length, CRC
+    radio.setLoRaPacket(radio.HEADER_IMPLICIT, 8, 32, True, False)
+    for setter in (lambda: radio.setCrcEnable(False), lambda: radio.setPayloadLength(16), lambda: radio.setInvertIq(False)):
+        setter()
+        assert frames(chip, SET_PACKET_PARAMS)[-1][1:4] == [0, 8, radio.HEADER_IMPLICIT]
+    assert frames(chip, SET_PACKET_PARAMS)[-1][1:6] == [0, 8, radio.HEADER_IMPLICIT, 16, radio.CRC_OFF]
+
+
+def test_single_byte_sync_word_fits_registers(radio, chip):
+    radio.setSyncWord(0x34)
+    assert chip.registers[radio.REG_LORA_SYNC_WORD_MSB] == 0x34
+    assert chip.registers[radio.REG_LORA_SYNC_WORD_MSB + 1] == 0x44
+    radio.setSyncWord(0x3424)
+    assert chip.registers[radio.REG_LORA_SYNC_WORD_MSB] == 0x34
+    assert chip.registers[radio.REG_LORA_SYNC_WORD_MSB + 1] == 0x24
+
+
+def test_register_shadow_skips_repeats_and_invalidates_on_reset(radio, chip):
+    radio.setRegisterCache(True)
+    chip.frames.clear()
+    radio.writeRegister(radio.REG_IQ_POLARITY_SETUP, (0x0D,), 1)
+    radio.writeRegister(radio.REG_IQ_POLARITY_SETUP, (0x0D,), 1)
+    assert list(radio.readRegister(radio.REG_IQ_POLARITY_SETUP, 1)) == [0x0D]
+    stats = radio.registerCacheStats()
+    assert (stats['writes'], stats['skipped'], stats['hits']) == (1, 1, 1)
+    assert len(frames(chip, WRITE_REGISTER)) == 1 and not frames(chip, READ_REGISTER)
+
+    # the reset clears the chip's registers, the shadow must not answer for them afterwards
+    assert radio.reset()
+    assert radio.registerCacheStats()['invalidations'] == 1
+    assert list(radio.readRegister(radio.REG_IQ_POLARITY_SETUP, 1)) == [0]
+    assert radio.registerCacheStats()['misses'] == 1
+    radio.writeRegister(radio.REG_IQ_POLARITY_SETUP, (0x0D,), 1)
+    assert chip.registers[radio.REG_IQ_POLARITY_SETUP] == 0x0D
+
+
+def test_register_shadow_never_skips_write_to_clear_registers(radio, chip):
+    radio.setRegisterCache(True)
+    writes = len(frames(chip, WRITE_REGISTER))
+    radio.writeRegister(radio.REG_EVENT_MASK, (0x02,), 1)
+    radio.writeRegister(radio.REG_EVENT_MASK, (0x02,), 1)
+    assert len(frames(chip, WRITE_REGISTER)) == writes + 2
+    # and reads of them always go to the chip, which may have changed them
+    chip.registers[radio.REG_EVENT_MASK] = 0x00
+    assert list(radio.readRegister(radio.REG_EVENT_MASK, 1)) == [0x00]
+    assert radio.registerCacheStats()['skipped'] == 0
+
+
+def test_image_calibration_once_per_band(radio, chip):
+    radio.setFrequency(915000000)
+    calibrations = len(frames(chip, CALIBRATE_IMAGE))
+    assert calibrations == 1
+    radio.setFrequency(920000000)
+    assert radio.retune(902300000) is False
+    assert len(frames(chip, CALIBRATE_IMAGE)) == calibrations
+    assert abs(chip.frequency - 902300000) < 100
+
+    # leaving the band calibrates once for the new band
+    assert radio.retune(868100000) is True
+    assert len(frames(chip, CALIBRATE_IMAGE)) == calibrations + 1
+    assert radio.retune(868300000) is False
+    assert len(frames(chip, CALIBRATE_IMAGE)) == calibrations + 1
+
+    # a reset loses the calibration
+    radio.reset()
+    radio.setFrequency(868300000)
+    assert len(frames(chip, CALIBRATE_IMAGE)) == calibrations + 2
+
+
+def test_cad_detects_preamble_on_channel(radio, chip):
+    radio.setFrequency(915000000)
+    chip.transmit(915000000, b'busy', preambleTime=0.2, airtime=0.3)
+    wait_for_dio1(radio, lambda: radio.requestCad(radio.CAD_ON_2_SYMB, radio.CAD_EXIT_STDBY))
+    assert radio.status() == radio.STATUS_CAD_DETECTED
+
+
+def test_cad_done_on_quiet_channel(radio, chip):
+    radio.setFrequency(915000000)
+    chip.transmit(902300000, b'elsewhere', preambleTime=0.2, airtime=0.3)
+    wait_for_dio1(radio, lambda: radio.requestCad(radio.CAD_ON_2_SYMB, radio.CAD_EXIT_STDBY))
+    assert radio.status() == radio.STATUS_CAD_DONE
+
+
+def test_busy_stats_per_opcode(radio):
+    radio.resetBusyStats()
+    radio.getIrqStatus()
+    radio.getIrqStatus()
+    opcodes = radio.busyStats()['opcodes']
+    assert opcodes['GetIrqStatus']['count'] == 2
+    assert radio.busyStats()['count'] == 2